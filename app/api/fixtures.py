@@ -2,6 +2,7 @@
 Fixtures API Endpoints
 """
 
+import asyncio
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -20,6 +21,8 @@ class FixtureResponse(BaseModel):
     league: str
     home_team: str
     away_team: str
+    home_team_id: Optional[str] = None
+    away_team_id: Optional[str] = None
     venue: Optional[str] = None
     status: str
 
@@ -37,7 +40,8 @@ async def get_upcoming_fixtures(
     """
     days_ahead = min(max(days_ahead, 1), 14)  # Limit between 1-14 days
     
-    fixtures = fixture_service.fetch_all_leagues_fixtures(days_ahead=days_ahead)
+    # Blocking fan-out over the leagues; keep it off the event loop
+    fixtures = await asyncio.to_thread(fixture_service.fetch_all_leagues_fixtures, days_ahead)
     
     # Filter by league if specified
     if league:
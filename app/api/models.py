@@ -0,0 +1,173 @@
+"""
+Model Admin API Endpoints
+"""
+
+import asyncio
+import hmac
+import itertools
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Dict, Optional, Set
+from app.core.config import settings
+from app.services.model_registry import model_registry
+from app.services.inference_executor import inference_executor
+from pydantic import BaseModel
+
+router = APIRouter()
+
+# Background loads: tasks kept referenced until they finish, and the latest outcomes
+MAX_LOAD_JOBS = 20
+_load_tasks: Set[asyncio.Task] = set()
+_load_jobs: "OrderedDict[int, Dict]" = OrderedDict()
+_job_ids = itertools.count(1)
+
+
+class LoadModelRequest(BaseModel):
+    """Request body for loading a model version"""
+    model_path: Optional[str] = None
+    arrays_path: Optional[str] = None
+    activate: bool = False
+
+
+class ShadowRequest(BaseModel):
+    """Request body for shadow scoring"""
+    version: Optional[str] = None
+    fraction: float = 0.05
+
+
+class RouteRequest(BaseModel):
+    """Request body for routing an endpoint to a model version"""
+    route: str
+    version: Optional[str] = None
+
+
+def require_admin(x_admin_key: str = Header(None)):
+    """Allow the request only with the configured admin key"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Model admin API disabled (ADMIN_API_KEY not set)")
+    if not hmac.compare_digest((x_admin_key or "").encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+def _is_loadable_path(path: str) -> bool:
+    """Whether a path lies inside one of MODEL_LOAD_DIRS (model pickles execute code when loaded)"""
+    resolved = Path(path).resolve()
+    for directory in filter(None, (d.strip() for d in settings.MODEL_LOAD_DIRS.split(','))):
+        if resolved.is_relative_to(Path(directory).resolve()):
+            return True
+    return False
+
+
+async def _load_in_background(job: Dict, request: LoadModelRequest):
+    """Load a version off the event loop, recording the outcome in the job"""
+    source = job["source"]
+    try:
+        loaded = await asyncio.to_thread(
+            model_registry.load, request.model_path, request.arrays_path, request.activate
+        )
+        job.update(status="loaded", version=loaded.version)
+        state = "active" if request.activate else "resident"
+        print(f"✅ Model {loaded.version} loaded from {source} in {loaded.load_seconds:.2f}s ({state})")
+        if request.activate:
+            inference_executor.reload()
+    except Exception as e:
+        job.update(status="failed", error=str(e))
+        print(f"❌ Error loading model from {source}: {e}")
+    finally:
+        job["finished_at"] = datetime.utcnow()
+
+
+@router.get("", dependencies=[Depends(require_admin)])
+async def list_versions():
+    """Resident model versions with load time and latency"""
+    return {
+        "versions": model_registry.get_versions(),
+        "shadow": model_registry.get_shadow_info(),
+        "routes": model_registry.get_routes(),
+        "loads": list(_load_jobs.values())
+    }
+
+
+@router.post("/load", status_code=202, dependencies=[Depends(require_admin)])
+async def load_version(request: LoadModelRequest):
+    """
+    Load a model version in the background. Serving continues on the current
+    version; poll GET /models to see the load job finish (or fail).
+    
+    - **model_path**: joblib .pkl file, or
+    - **arrays_path**: directory written by scripts/convert_model.py
+      (either must be inside one of MODEL_LOAD_DIRS)
+    - **activate**: swap to it as soon as it is loaded; required to replace a
+      version that is already loaded
+    """
+    source = request.arrays_path or request.model_path
+    if not source:
+        raise HTTPException(status_code=400, detail="model_path or arrays_path is required")
+    if not _is_loadable_path(source):
+        raise HTTPException(status_code=403, detail=f"Models can only be loaded from MODEL_LOAD_DIRS ({settings.MODEL_LOAD_DIRS})")
+    
+    job = {"job": next(_job_ids), "source": source, "activate": request.activate, "status": "loading",
+           "version": None, "error": None, "started_at": datetime.utcnow(), "finished_at": None}
+    _load_jobs[job["job"]] = job
+    while len(_load_jobs) > MAX_LOAD_JOBS:
+        _load_jobs.popitem(last=False)
+    
+    task = asyncio.create_task(_load_in_background(job, request))
+    _load_tasks.add(task)
+    task.add_done_callback(_load_tasks.discard)
+    return job
+
+
+@router.post("/{version}/activate", dependencies=[Depends(require_admin)])
+async def activate_version(version: str):
+    """Atomically switch serving traffic to a resident version"""
+    try:
+        model_registry.activate(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    # Process pool workers hold their own copy of the model
+    inference_executor.reload()
+    return {"active": version}
+
+
+@router.post("/shadow", dependencies=[Depends(require_admin)])
+async def set_shadow(request: ShadowRequest):
+    """
+    Shadow-score a fraction of prediction batches on a resident candidate.
+    Scoring runs on a background thread and never delays responses.
+    Send version null to stop.
+    """
+    try:
+        model_registry.set_shadow(request.version, request.fraction)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"shadow": model_registry.get_shadow_info()}
+
+
+@router.post("/routes", dependencies=[Depends(require_admin)])
+async def set_route(request: RouteRequest):
+    """
+    Serve an endpoint route (e.g. predict_fast) from a resident version, such
+    as a variant from scripts/build_model_variants.py. Send version null to
+    route it back to the active model.
+    """
+    try:
+        model_registry.set_route(request.route, request.version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"routes": model_registry.get_routes()}
+
+
+@router.delete("/{version}", dependencies=[Depends(require_admin)])
+async def unload_version(version: str):
+    """Drop a resident version that is not active"""
+    try:
+        model_registry.unload(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"unloaded": version}
@@ -2,12 +2,15 @@
 Prediction API Endpoints
 """
 
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, AsyncSessionLocal
 from app.services.prediction_service import prediction_service
 from app.services.ml_service import ml_service
+from app.services.inference_executor import inference_executor
 from app.schemas.prediction import PredictionResponse
 from pydantic import BaseModel
 
@@ -37,6 +40,23 @@ async def generate_prediction(
     - **match_date**: Match date and time
     - **fixture_id**: Optional ID for the fixture
     """
+    return await _predict(request, db, route="predict")
+
+
+@router.post("/predict/fast", response_model=PredictionResponse)
+async def generate_fast_prediction(
+    request: PredictionRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate a prediction on the cheaper model variant routed to `predict_fast`
+    (see MODEL_VARIANTS); uses the active model when none is configured.
+    """
+    return await _predict(request, db, route="predict_fast")
+
+
+async def _predict(request: PredictionRequest, db: Session, route: str) -> PredictionResponse:
+    """Generate a prediction with the model version serving `route`"""
     # Check if model is loaded
     if not ml_service.is_loaded():
         raise HTTPException(
@@ -45,17 +65,32 @@ async def generate_prediction(
         )
     
     try:
-        prediction = prediction_service.generate_prediction(
-            db=db,
-            home_team=request.home_team,
-            away_team=request.away_team,
-            league=request.league,
-            match_date=request.match_date,
-            fixture_id=request.fixture_id
-        )
+        if settings.DB_ASYNC_ENABLED or settings.INFERENCE_BATCH_ENABLED or inference_executor.enabled:
+            prediction = await prediction_service.generate_prediction_async(
+                home_team=request.home_team,
+                away_team=request.away_team,
+                league=request.league,
+                match_date=request.match_date,
+                fixture_id=request.fixture_id,
+                session_factory=AsyncSessionLocal if settings.DB_ASYNC_ENABLED else None,
+                db=db,
+                route=route
+            )
+        else:
+            # Synchronous feature queries and inference in a worker thread, off the event loop
+            prediction = await asyncio.to_thread(
+                prediction_service.generate_prediction,
+                db=db,
+                home_team=request.home_team,
+                away_team=request.away_team,
+                league=request.league,
+                match_date=request.match_date,
+                fixture_id=request.fixture_id,
+                route=route
+            )
         
         return prediction
-        
+    
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -77,7 +112,8 @@ async def test_prediction(db: Session = Depends(get_db)):
     
     # Generate test prediction
     try:
-        prediction = prediction_service.generate_prediction(
+        prediction = await asyncio.to_thread(
+            prediction_service.generate_prediction,
             db=db,
             home_team="Arsenal",
             away_team="Chelsea",
@@ -87,7 +123,7 @@ async def test_prediction(db: Session = Depends(get_db)):
         )
         
         return prediction
-        
+    
     except Exception as e:
         return {
             "error": str(e),
@@ -0,0 +1,213 @@
+"""
+In-process caching
+Bounded LRU cache with per-entry TTL, hit/miss counters and explicit invalidation,
+plus single-flight deduplication of concurrent identical computations
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl_seconds"""
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a live entry (and mark it recently used), or None"""
+        with self._lock:
+            entry = self._data.get(key)
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store an entry, evicting the least recently used ones beyond max_entries"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def _peek(self, key: Hashable) -> Optional[Any]:
+        """Live entry without touching counters or recency"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, computing and storing it on a miss.
+        Concurrent misses for the same key share one computation.
+        """
+        value = self.get(key)
+        if value is None:
+            value = self._flights.do(key, lambda: self._compute_and_set(key, compute))
+        return value
+    
+    def _compute_and_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        # A caller that missed just before another one stored the value finds it here
+        value = self._peek(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+    
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drop entries. With no predicate the whole cache is cleared.
+        
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._data)
+                self._data.clear()
+                return removed
+            
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def get_stats(self) -> Dict:
+        """Get cache size and counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class _Call:
+    """One in-flight synchronous computation"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncCall:
+    """One in-flight async computation and how many callers await it"""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one computation.
+    The first caller computes; callers arriving before it finishes wait for
+    and share its result (or its exception).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, _AsyncCall] = {}
+        self.leaders = 0
+        self.shared = 0
+    
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Run compute() once per key across threads"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        
+        try:
+            call.value = compute()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    async def do_async(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await compute() once per key on the running event loop.
+        
+        The computation runs as its own task. A cancelled caller stops waiting
+        without affecting the others; the task is cancelled only once no caller
+        is left waiting for it.
+        """
+        call = self._async_calls.get(key)
+        if call is None:
+            call = self._async_calls[key] = _AsyncCall(asyncio.get_running_loop().create_task(compute()))
+            self.leaders += 1
+            
+            def finished(task: asyncio.Task, call: _AsyncCall = call) -> None:
+                if self._async_calls.get(key) is call:
+                    del self._async_calls[key]
+                # Mark the outcome retrieved even when nobody was left waiting
+                task.cancelled() or task.exception()
+            
+            call.task.add_done_callback(finished)
+        else:
+            self.shared += 1
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Everyone gave up on it; later callers start a fresh computation
+                if self._async_calls.get(key) is call:
+                    del self._async_calls[key]
+                call.task.cancel()
+    
+    def get_stats(self) -> Dict:
+        """Get in-flight count and how many callers shared a computation"""
+        return {
+            "in_flight": len(self._calls) + len(self._async_calls),
+            "computations": self.leaders,
+            "shared": self.shared
+        }
@@ -23,9 +23,49 @@ class Settings(BaseSettings):
     DB_USER: str = "postgres"
     DB_PASSWORD: str = ""
     
+    # Async database access (asyncpg) for feature queries
+    DB_ASYNC_ENABLED: bool = False
+    DB_ASYNC_POOL_SIZE: int = 10
+    DB_ASYNC_MAX_OVERFLOW: int = 10
+    
     # ML Model
     MODEL_PATH: str = "../ml-pipeline/models/random_forest_v1.0.0.pkl"
     MODEL_VERSION: str = "v1.0.0"
+    INFERENCE_BACKEND: str = "sklearn"  # sklearn | compiled (flat-array tree evaluator)
+    MODEL_ARRAYS_PATH: str = ""  # directory from scripts/convert_model.py; used instead of MODEL_PATH when present
+    MODEL_MMAP_MODE: str = "r"  # memory-map model arrays read-only; empty to load into process memory
+    MODEL_PRELOAD: bool = False  # load the model at import time, before gunicorn --preload forks workers
+    MODEL_VARIANTS: str = ""  # route=path pairs from scripts/build_model_variants.py, e.g. "predict_fast=models/variants/trees-25.pkl"
+    
+    # Startup: load the model and feature indexes after the server starts accepting requests
+    STARTUP_BACKGROUND_LOAD: bool = True  # /health answers at once; /health/ready flips when loaded
+    STARTUP_WARMUP_ENABLED: bool = False  # run dummy predictions before reporting ready
+    STARTUP_WARMUP_ROUNDS: int = 20
+    
+    # Model admin endpoints (load / activate / shadow); disabled when empty
+    ADMIN_API_KEY: str = ""
+    MODEL_LOAD_DIRS: str = "models,../ml-pipeline/models"  # comma-separated; /models/load only reads from these
+    
+    # Where async endpoints run feature computation and inference
+    INFERENCE_EXECUTOR: str = "inline"  # inline (event loop) | thread | process (workers with the model preloaded)
+    INFERENCE_EXECUTOR_WORKERS: int = 4
+    
+    # Inference micro-batching for concurrent /predict calls
+    INFERENCE_BATCH_ENABLED: bool = False
+    INFERENCE_BATCH_MAX_SIZE: int = 64
+    INFERENCE_BATCH_MAX_WAIT_MS: float = 5.0
+    
+    # Feature engineering
+    FEATURE_BACKEND: str = "orm"  # orm | sql (one query per match) | index (in-memory) | snapshots (team_form_snapshots)
+    FEATURE_REFRESH_SECONDS: int = 300  # how often match changes reach the index, snapshots and caches
+    FEATURE_CACHE_ENABLED: bool = True
+    FEATURE_CACHE_MAX_ENTRIES: int = 10000  # entries expire after CACHE_TTL seconds
+    PREDICTION_FEATURES_DIR: str = "data/prediction_features"  # scripts/generate_predictions.py output ("" disables)
+    
+    # Prediction cache (same inputs + model version within the TTL reuse the result)
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_TTL: int = 300
+    PREDICTION_CACHE_MAX_ENTRIES: int = 5000
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -36,6 +76,30 @@ class Settings(BaseSettings):
     API_FOOTBALL_BASE_URL: str = "https://v3.football.api-sports.io"
     ODDS_API_KEY: str = ""
     ODDS_API_BASE_URL: str = "https://api.the-odds-api.com/v4"
+    ODDS_SNAPSHOT_TTL: int = 300  # seconds a league's odds payload is served without refetching
+    ODDS_SNAPSHOT_STALE_TTL: int = 1800  # further seconds it is served while refreshing in the background
+    ODDS_API_CACHE_TTL: int = 60  # seconds a raw Odds API response is shared between fixture and odds lookups
+    ODDS_API_CACHE_MAX_ENTRIES: int = 256
+    
+    # Odds polling scheduler: refresh league odds ahead of requests within the plan's monthly quota
+    ODDS_SCHEDULER_ENABLED: bool = False
+    ODDS_API_MONTHLY_QUOTA: int = 500  # requests per billing period (free plan)
+    ODDS_API_QUOTA_RESET_DAY: int = 1  # day of month (UTC) the quota resets, 1-28
+    ODDS_API_QUOTA_RESERVE: float = 0.1  # share of the quota kept for fixture lookups and manual checks
+    ODDS_POLL_TIERS: str = "3:900,24:3600,72:21600"  # hours to next kickoff:poll interval seconds
+    ODDS_POLL_MIN_INTERVAL: int = 300
+    ODDS_POLL_MAX_INTERVAL: int = 86400  # leagues with no kickoff within the tiers
+    ODDS_POLL_TICK_SECONDS: int = 60
+    ODDS_SCHEDULER_STATE_DIR: str = "data/odds_state"  # shared by the app processes on a host; one of them polls
+    
+    # Upstream HTTP (one pooled keep-alive client; HTTP/2 when the h2 package is installed)
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 10
+    HTTP_MAX_PER_HOST: int = 6
+    HTTP2_ENABLED: bool = True
+    HTTP_FANOUT_WORKERS: int = 8
+    UPSTREAM_DEADLINE_SECONDS: float = 15.0  # multi-league fetches return whatever arrived by then
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
@@ -50,6 +114,11 @@ class Settings(BaseSettings):
         password = quote_plus(self.DB_PASSWORD)
         return f"postgresql://{self.DB_USER}:{password}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
     
+    @property
+    def async_database_url(self) -> str:
+        """Get database URL for the asyncpg driver"""
+        return self.database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
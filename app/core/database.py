@@ -17,6 +17,21 @@ engine = create_engine(
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional async engine for non-blocking feature queries
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC_ENABLED:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        pool_pre_ping=True,
+        pool_size=settings.DB_ASYNC_POOL_SIZE,
+        max_overflow=settings.DB_ASYNC_MAX_OVERFLOW
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 
 def get_db() -> Session:
     """
@@ -28,3 +43,12 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency for getting an async database session.
+    Requires DB_ASYNC_ENABLED=true.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,127 @@
+"""
+HTTP Client
+Shared pooled client for upstream APIs, and concurrent fan-out with an overall deadline
+"""
+
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from app.core.config import settings
+
+# httpx speaks HTTP/2 only with the optional h2 package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+class HttpClientPool:
+    """
+    One keep-alive httpx.Client shared by every upstream call, with a cap on
+    concurrent requests per host, plus a thread pool for fetching several
+    resources at once.
+    """
+    
+    def __init__(self):
+        self._client: Optional[httpx.Client] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "fanouts": 0, "timed_out": 0}
+    
+    @property
+    def client(self) -> httpx.Client:
+        """The shared client (created on first use)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+                        timeout=settings.HTTP_TIMEOUT,
+                        limits=httpx.Limits(
+                            max_connections=settings.HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                            keepalive_expiry=30
+                        )
+                    )
+        return self._client
+    
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(settings.HTTP_MAX_PER_HOST)
+            return self._host_slots[host]
+    
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        """GET on the shared client, waiting for a free slot on the host"""
+        with self._host_slot(url):
+            self.stats["requests"] += 1
+            return self.client.get(url, **kwargs)
+    
+    def fetch_all(self, calls: Dict[Hashable, Callable[[], Any]],
+                  deadline: Optional[float] = None) -> Tuple[Dict[Hashable, Any], List[Hashable]]:
+        """
+        Run calls concurrently and wait at most `deadline` seconds for all of them.
+        
+        Args:
+            calls: Key -> zero-argument callable
+            deadline: Overall seconds to wait (settings.UPSTREAM_DEADLINE_SECONDS by default)
+        
+        Returns:
+            (results of the calls that finished, keys that timed out or failed)
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=settings.HTTP_FANOUT_WORKERS, thread_name_prefix="upstream"
+                    )
+        
+        deadline = settings.UPSTREAM_DEADLINE_SECONDS if deadline is None else deadline
+        self.stats["fanouts"] += 1
+        
+        futures = {self._executor.submit(call): key for key, call in calls.items()}
+        done, not_done = wait(futures, timeout=deadline)
+        
+        results, missing = {}, []
+        for future in done:
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                print(f"Upstream call {key} failed: {e}")
+                missing.append(key)
+        
+        # Late calls keep running in the background; their results are dropped
+        for future in not_done:
+            future.cancel()
+            missing.append(futures[future])
+        self.stats["timed_out"] += len(not_done)
+        
+        return results, missing
+    
+    def close(self) -> None:
+        """Close pooled connections and the fan-out threads"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def get_info(self) -> Dict:
+        """Pool settings and counters"""
+        return {
+            "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive": settings.HTTP_MAX_KEEPALIVE,
+            "max_per_host": settings.HTTP_MAX_PER_HOST,
+            "deadline_seconds": settings.UPSTREAM_DEADLINE_SECONDS,
+            **self.stats
+        }
+
+
+# Global HTTP client pool
+http_pool = HttpClientPool()
@@ -0,0 +1,252 @@
+"""
+Metrics
+Fixed-memory latency histograms and counters, exported as JSON and Prometheus text
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Recent samples kept per histogram for percentiles
+WINDOW_SIZE = 2048
+
+# Prometheus bucket upper bounds
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape(text: str, quotes: bool = True) -> str:
+    """Escape a label value (or HELP text, without quotes) for the Prometheus text format"""
+    text = str(text).replace('\\', '\\\\').replace('\n', '\\n')
+    return text.replace('"', '\\"') if quotes else text
+
+
+class RollingHistogram:
+    """
+    Percentiles over the last WINDOW_SIZE samples (a preallocated ring buffer)
+    plus cumulative bucket counts, sum and count since start.
+    """
+    
+    def __init__(self, buckets: Tuple[float, ...], window: int = WINDOW_SIZE,
+                 forward: Optional[Callable[[float], None]] = None):
+        self.buckets = buckets
+        self._forward = forward  # also hands each sample to the registry (see MetricsRegistry.forward)
+        self._ring = np.zeros(window)
+        self._next = 0
+        self._filled = 0
+        self._bucket_counts = np.zeros(len(buckets) + 1, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float) -> None:
+        """Record one sample"""
+        with self._lock:
+            self._ring[self._next] = value
+            self._next = (self._next + 1) % len(self._ring)
+            self._filled = min(self._filled + 1, len(self._ring))
+            self._bucket_counts[np.searchsorted(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+        if self._forward is not None:
+            self._forward(value)
+    
+    def percentiles(self, qs=(50, 95, 99)) -> Dict[str, Optional[float]]:
+        """Percentiles of the recent window"""
+        with self._lock:
+            samples = self._ring[:self._filled].copy()
+        if not len(samples):
+            return {f"p{q}": None for q in qs}
+        return {f"p{q}": float(v) for q, v in zip(qs, np.percentile(samples, qs))}
+    
+    def cumulative_buckets(self) -> List[Tuple[str, int]]:
+        """(upper bound, cumulative count) pairs including +Inf"""
+        with self._lock:
+            counts = np.cumsum(self._bucket_counts)
+        bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+        return list(zip(bounds, counts.tolist()))
+    
+    def distribution(self) -> Dict[str, int]:
+        """Count per bucket (not cumulative) since start"""
+        with self._lock:
+            counts = self._bucket_counts.tolist()
+        bounds = [f"<={b:g}" for b in self.buckets] + [f">{self.buckets[-1]:g}"]
+        return dict(zip(bounds, counts))
+    
+    def summary(self) -> Dict:
+        """Count, mean and recent percentiles"""
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            **self.percentiles()
+        }
+
+
+class MetricsRegistry:
+    """Named, labelled histograms and counters"""
+    
+    def __init__(self):
+        self._histograms: Dict[str, Dict[LabelKey, RollingHistogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._outbox: Optional[List[Tuple]] = None  # samples and increments for the parent process
+    
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+    
+    def describe(self, name: str, text: str) -> None:
+        """Set the HELP text of a metric"""
+        self._help[name] = text
+    
+    def histogram(self, name: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS,
+                  **labels) -> RollingHistogram:
+        """Get or create a histogram"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = RollingHistogram(
+                    buckets, forward=lambda value: self._send(('observe', name, key, buckets, value))
+                )
+            return series[key]
+    
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a sample on a latency histogram"""
+        self.histogram(name, **labels).observe(value)
+    
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Increment a counter"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+        self._send(('inc', name, key, amount))
+    
+    def _send(self, event: Tuple) -> None:
+        """Queue an observation for the parent process while forwarding"""
+        if self._outbox is not None:
+            with self._lock:
+                self._outbox.append(event)
+    
+    def forward(self) -> None:
+        """
+        Start queueing every sample and increment in this process (a pool worker),
+        so the parent can record them: the worker sends drain() back with each
+        result and the parent passes it to replay().
+        """
+        self._outbox = []
+    
+    def drain(self) -> List[Tuple]:
+        """Take the queued observations (empty unless forward() was called)"""
+        if self._outbox is None:
+            return []
+        with self._lock:
+            events, self._outbox = self._outbox, []
+        return events
+    
+    def replay(self, events: List[Tuple]) -> None:
+        """Record observations drained in a worker process"""
+        for kind, name, key, *values in events:
+            labels = dict(key)
+            if kind == 'observe':
+                buckets, value = values
+                self.histogram(name, buckets, **labels).observe(value)
+            else:
+                self.inc(name, values[0], **labels)
+    
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Time a block in milliseconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000, **labels)
+    
+    def timed(self, name: str, **labels):
+        """Decorator timing every call of a function or coroutine function in milliseconds"""
+        def decorator(fn):
+            if asyncio.iscoroutinefunction(fn):
+                @wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(name, **labels):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+            
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def get_histogram_summary(self, name: str, **labels) -> Optional[Dict]:
+        """Summary of one histogram series, or None if never observed"""
+        histogram = self._histograms.get(name, {}).get(self._key(labels))
+        return histogram.summary() if histogram else None
+    
+    def get_counter(self, name: str, **labels) -> float:
+        """Current counter value"""
+        return self._counters.get(name, {}).get(self._key(labels), 0)
+    
+    def snapshot(self) -> Dict:
+        """All series as JSON-friendly dicts"""
+        with self._lock:
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+        
+        return {
+            "histograms": {
+                name: [{"labels": dict(key), **histogram.summary()} for key, histogram in series.items()]
+                for name, series in histograms.items()
+            },
+            "counters": {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in counters.items()
+            }
+        }
+    
+    def render_prometheus(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        def label_text(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = key + extra
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+        
+        with self._lock:
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+        
+        lines = []
+        for name, series in sorted(counters.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {_escape(self._help[name], quotes=False)}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{label_text(key)} {value:g}")
+        
+        for name, series in sorted(histograms.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {_escape(self._help[name], quotes=False)}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in series.items():
+                for bound, count in histogram.cumulative_buckets():
+                    lines.append(f"{name}_bucket{label_text(key, (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{label_text(key)} {histogram.sum:g}")
+                lines.append(f"{name}_count{label_text(key)} {histogram.count}")
+        
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
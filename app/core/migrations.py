@@ -0,0 +1,245 @@
+"""
+Schema migrations
+Versioned, ordered DDL for the tables the backend reads, tracked in schema_migrations
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+class Migration:
+    """A single versioned schema change with its rollback"""
+    
+    def __init__(self, version: int, name: str, up: List[str], down: List[str]):
+        self.version = version
+        self.name = name
+        self.up = up
+        self.down = down
+
+
+# Ordered list of migrations. Never edit an applied migration - add a new one.
+# Indexes are built CONCURRENTLY so the table stays writable during deploys.
+# A build that fails leaves the migration pending; rerunning drops the INVALID index and rebuilds it.
+MIGRATIONS = [
+    Migration(
+        version=1,
+        name="matches_historical_feature_indexes",
+        up=[
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_matches_historical_home_team_date "
+            "ON matches_historical (home_team, date DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_matches_historical_away_team_date "
+            "ON matches_historical (away_team, date DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_matches_historical_league_date "
+            "ON matches_historical (league, date DESC)",
+            # Each branch of the H2H OR predicate is an equality on (home_team, away_team)
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_matches_historical_pair_date "
+            "ON matches_historical (home_team, away_team, date DESC)",
+            "ANALYZE matches_historical",
+        ],
+        down=[
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_matches_historical_pair_date",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_matches_historical_league_date",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_matches_historical_away_team_date",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_matches_historical_home_team_date",
+        ],
+    ),
+    Migration(
+        version=2,
+        name="team_form_snapshots",
+        up=[
+            "CREATE TABLE IF NOT EXISTS team_form_snapshots ("
+            "id SERIAL PRIMARY KEY, "
+            "team VARCHAR(100) NOT NULL, "
+            "date DATE NOT NULL, "
+            "match_id INTEGER NOT NULL, "
+            "scored INTEGER NOT NULL, "
+            "conceded INTEGER NOT NULL, "
+            "avg_scored DOUBLE PRECISION NOT NULL, "
+            "avg_conceded DOUBLE PRECISION NOT NULL, "
+            "games_played INTEGER NOT NULL, "
+            "home_avg_scored DOUBLE PRECISION NOT NULL, "
+            "home_avg_conceded DOUBLE PRECISION NOT NULL, "
+            "home_games_played INTEGER NOT NULL, "
+            "away_avg_scored DOUBLE PRECISION NOT NULL, "
+            "away_avg_conceded DOUBLE PRECISION NOT NULL, "
+            "away_games_played INTEGER NOT NULL, "
+            "updated_at TIMESTAMP)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_team_form_snapshots_team_date "
+            "ON team_form_snapshots (team, date DESC, match_id DESC)",
+            # Change log of matches_historical, so feature stores follow other writers
+            # (e.g. the ML pipeline loader) without rescanning the table
+            "CREATE TABLE IF NOT EXISTS matches_historical_changes ("
+            "id BIGSERIAL PRIMARY KEY, "
+            "operation VARCHAR(10) NOT NULL, "
+            "match_id INTEGER, "
+            "date DATE, "
+            "home_team VARCHAR(100), "
+            "away_team VARCHAR(100), "
+            "changed_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'))",
+            "CREATE OR REPLACE FUNCTION log_matches_historical_change() RETURNS trigger AS $$ "
+            "BEGIN "
+            "IF TG_OP = 'TRUNCATE' THEN "
+            "INSERT INTO matches_historical_changes (operation) VALUES (TG_OP); "
+            "RETURN NULL; "
+            "END IF; "
+            "IF TG_OP IN ('UPDATE', 'DELETE') THEN "
+            "INSERT INTO matches_historical_changes (operation, match_id, date, home_team, away_team) "
+            "VALUES (TG_OP, OLD.id, OLD.date, OLD.home_team, OLD.away_team); "
+            "END IF; "
+            "IF TG_OP IN ('INSERT', 'UPDATE') THEN "
+            "INSERT INTO matches_historical_changes (operation, match_id, date, home_team, away_team) "
+            "VALUES (TG_OP, NEW.id, NEW.date, NEW.home_team, NEW.away_team); "
+            "END IF; "
+            "RETURN NULL; "
+            "END $$ LANGUAGE plpgsql",
+            "DROP TRIGGER IF EXISTS matches_historical_log_rows ON matches_historical",
+            "CREATE TRIGGER matches_historical_log_rows "
+            "AFTER INSERT OR UPDATE OR DELETE ON matches_historical "
+            "FOR EACH ROW EXECUTE FUNCTION log_matches_historical_change()",
+            "DROP TRIGGER IF EXISTS matches_historical_log_truncate ON matches_historical",
+            "CREATE TRIGGER matches_historical_log_truncate "
+            "AFTER TRUNCATE ON matches_historical "
+            "FOR EACH STATEMENT EXECUTE FUNCTION log_matches_historical_change()",
+        ],
+        down=[
+            "DROP TRIGGER IF EXISTS matches_historical_log_truncate ON matches_historical",
+            "DROP TRIGGER IF EXISTS matches_historical_log_rows ON matches_historical",
+            "DROP FUNCTION IF EXISTS log_matches_historical_change()",
+            "DROP TABLE IF EXISTS matches_historical_changes",
+            "DROP TABLE IF EXISTS team_form_snapshots",
+        ],
+    ),
+]
+
+
+def _ensure_migrations_table(conn) -> None:
+    """Create the bookkeeping table if it does not exist"""
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR(200) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+# Name of the index a CREATE INDEX CONCURRENTLY statement builds
+_CONCURRENT_INDEX = re.compile(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+
+
+def _index_is_valid(conn, name: str) -> Optional[bool]:
+    """pg_index.indisvalid of an index in the current schema, or None if it does not exist"""
+    return conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = :name AND n.nspname = current_schema()"
+        ),
+        {"name": name}
+    ).scalar()
+
+
+def _drop_if_invalid(conn, name: str) -> None:
+    """
+    Drop an index left INVALID by a failed or interrupted concurrent build.
+    
+    IF NOT EXISTS would otherwise skip it, leaving an index the planner never uses.
+    """
+    if _index_is_valid(conn, name) is False:
+        print(f"   ⚠️  Dropping invalid index {name} to rebuild it")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
+def get_applied_versions(engine: Engine) -> Dict[int, datetime]:
+    """Get applied migration versions and when they were applied"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        _ensure_migrations_table(conn)
+        rows = conn.execute(text("SELECT version, applied_at FROM schema_migrations")).all()
+    
+    return {row.version: row.applied_at for row in rows}
+
+
+def migrate_up(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """
+    Apply pending migrations in order.
+    
+    Args:
+        engine: SQLAlchemy engine
+        target: Highest version to apply (default: latest)
+    
+    Returns:
+        Versions that were applied
+    """
+    applied = get_applied_versions(engine)
+    done = []
+    
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for migration in MIGRATIONS:
+            if migration.version in applied:
+                continue
+            if target is not None and migration.version > target:
+                break
+            
+            print(f"Applying migration {migration.version}: {migration.name}")
+            indexes = []
+            for statement in migration.up:
+                match = _CONCURRENT_INDEX.match(statement)
+                index = match.group(1) if match else None
+                if index:
+                    indexes.append(index)
+                    _drop_if_invalid(conn, index)
+                
+                try:
+                    conn.execute(text(statement))
+                except Exception:
+                    # Don't leave an INVALID index behind; the migration stays pending and is retried
+                    if index:
+                        _drop_if_invalid(conn, index)
+                    raise
+            
+            # Only record the migration once every index it builds is usable
+            invalid = [index for index in indexes if not _index_is_valid(conn, index)]
+            if invalid:
+                raise RuntimeError(
+                    f"Migration {migration.version} left invalid indexes: {', '.join(invalid)}"
+                )
+            
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": migration.version, "n": migration.name, "t": datetime.utcnow()}
+            )
+            done.append(migration.version)
+    
+    return done
+
+
+def migrate_down(engine: Engine, target: int) -> List[int]:
+    """
+    Roll back applied migrations newer than target, newest first.
+    
+    Returns:
+        Versions that were rolled back
+    """
+    applied = get_applied_versions(engine)
+    done = []
+    
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for migration in reversed(MIGRATIONS):
+            if migration.version <= target or migration.version not in applied:
+                continue
+            
+            print(f"Rolling back migration {migration.version}: {migration.name}")
+            for statement in migration.down:
+                conn.execute(text(statement))
+            
+            conn.execute(
+                text("DELETE FROM schema_migrations WHERE version = :v"),
+                {"v": migration.version}
+            )
+            done.append(migration.version)
+    
+    return done
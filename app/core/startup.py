@@ -0,0 +1,80 @@
+"""
+Startup State
+Tracks the background startup phases that gate readiness
+"""
+
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+
+class StartupState:
+    """
+    Timed startup phases and the readiness flag.
+    
+    The process is live as soon as it serves HTTP; it is ready once every
+    phase has run and none of the required ones failed.
+    """
+    
+    def __init__(self):
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.ready = False
+        self.phases: List[Dict] = []
+        self._start = 0.0
+    
+    def begin(self) -> None:
+        """Reset phases at the start of a startup run"""
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+        self.ready = False
+        self.phases = []
+        self._start = time.perf_counter()
+    
+    @contextmanager
+    def phase(self, name: str, required: bool = True) -> Iterator[Dict]:
+        """
+        Time one phase. Exceptions are recorded instead of raised; a failed
+        required phase keeps the app from becoming ready.
+        """
+        record = {"name": name, "status": "running", "required": required, "seconds": None, "error": None}
+        self.phases.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+            if record["status"] == "running":
+                record["status"] = "done"
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = str(e)
+            print(f"⚠️  Startup phase '{name}' failed: {e}")
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 3)
+    
+    def finish(self) -> bool:
+        """Mark startup complete; ready unless a required phase failed"""
+        self.finished_at = datetime.utcnow()
+        self.ready = not any(p["required"] and p["status"] == "failed" for p in self.phases)
+        return self.ready
+    
+    def get_info(self) -> Dict:
+        """Readiness and per-phase timings"""
+        if self.finished_at is not None:
+            total = (self.finished_at - self.started_at).total_seconds()
+        elif self.started_at is not None:
+            total = time.perf_counter() - self._start
+        else:
+            total = None
+        
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "total_seconds": round(total, 3) if total is not None else None,
+            "phases": list(self.phases)
+        }
+
+
+# Global startup state instance
+startup_state = StartupState()
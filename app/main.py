@@ -3,10 +3,29 @@ Main FastAPI Application
 """
 
 from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
+from app.core.http import http_pool
+from app.core.metrics import metrics
+from app.core.startup import startup_state
 from app.services.ml_service import ml_service
+from app.services.history_index import history_index
+from app.services.form_snapshot_service import form_snapshot_service
+from app.services.match_change_log import match_change_log
+from app.services.feature_service import feature_service
+from app.services.inference_batcher import inference_batcher
+from app.services.inference_executor import inference_executor
+from app.services.prediction_service import prediction_service
+from app.services.odds_api import odds_api
+from app.services.odds_service import odds_service
+from app.services.odds_scheduler import odds_scheduler
+from app.services.team_registry import team_registry
+from app.core.database import SessionLocal
 from datetime import datetime
+import asyncio
+import gc
 
 # Create FastAPI app
 app = FastAPI(
@@ -17,6 +36,14 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Preload-before-fork: under `gunicorn --preload` this runs once in the master,
+# and forked workers share the model pages instead of each unpickling a copy
+if settings.MODEL_PRELOAD:
+    print("Preloading ML model before worker fork...")
+    if ml_service.load_model():
+        # Keep the preloaded objects out of GC passes so workers don't dirty their pages
+        gc.freeze()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,36 +57,183 @@ app.add_middleware(
 # Startup event
 @app.on_event("startup")
 async def startup_event():
-    """Load ML model on startup"""
+    """Start serving, then load the ML model and feature indexes"""
+    global _startup_task
     print("=" * 60)
     print(f"🚀 Starting {settings.PROJECT_NAME}")
     print("=" * 60)
     
-    # Load ML model
-    print("\nLoading ML model...")
-    success = ml_service.load_model()
+    startup_state.begin()
+    
+    # Coalesce concurrent predictions into batched model calls
+    if settings.INFERENCE_BATCH_ENABLED:
+        inference_batcher.start()
+        print(f"✅ Inference batching enabled (max {settings.INFERENCE_BATCH_MAX_SIZE} per batch, "
+              f"{settings.INFERENCE_BATCH_MAX_WAIT_MS} ms wait)")
+    
+    # Accept traffic (and /health liveness checks) while the model loads
+    if settings.STARTUP_BACKGROUND_LOAD:
+        _startup_task = asyncio.create_task(load_application())
+        print("\nLoading model and feature indexes in the background (see /health/ready)")
+    else:
+        await load_application()
+
+
+# Background tasks (kept referenced so they aren't garbage collected, and cancelled on shutdown)
+_startup_task = None
+_refresh_task = None
+
+
+def _load_history_index() -> int:
+    """Build the in-memory history index on its own session"""
+    db = SessionLocal()
+    try:
+        return history_index.load(db)
+    finally:
+        db.close()
+
+
+def _load_team_names() -> int:
+    """Register the team names in matches_historical with the team registry"""
+    db = SessionLocal()
+    try:
+        return team_registry.load_history_names(db)
+    finally:
+        db.close()
+
+
+async def load_application():
+    """Load the model and feature indexes, warm up, then mark the app ready"""
+    # Load ML model (already loaded in the master when preloaded)
+    with startup_state.phase("model") as phase:
+        if ml_service.is_loaded():
+            print(f"\nML model preloaded ({ml_service.model_version})")
+            phase["status"] = "preloaded"
+        else:
+            print("\nLoading ML model...")
+            if not await asyncio.to_thread(ml_service.load_model):
+                phase["status"] = "failed"
+                print("⚠️  WARNING: Model could not be loaded!")
+                print("   Prediction endpoints will not work until model is available.")
+    
+    # Cheaper model variants for specific endpoint routes (serving falls back to the active model)
+    if settings.MODEL_VARIANTS and ml_service.is_loaded():
+        with startup_state.phase("model_variants", required=False):
+            await asyncio.to_thread(ml_service.load_variants)
+    
+    # Map upstream team names onto the spellings in matches_historical
+    with startup_state.phase("team_registry", required=False):
+        names = await asyncio.to_thread(_load_team_names)
+        print(f"✅ Team registry: {names} historical team names")
+    
+    # Load in-memory history index (falls back to database queries, so not required)
+    if settings.FEATURE_BACKEND == 'index':
+        print("\nLoading history index...")
+        with startup_state.phase("history_index", required=False) as phase:
+            try:
+                rows = await asyncio.to_thread(_load_history_index)
+                print(f"✅ History index loaded ({rows} matches)")
+            except Exception as e:
+                phase["status"] = "failed"
+                phase["error"] = str(e)
+                print(f"⚠️  WARNING: History index could not be loaded: {e}")
+                print("   Falling back to database feature queries.")
+    
+    # Pool for feature computation and inference (started after the model, team
+    # registry and history index are loaded, so forked workers inherit them)
+    if inference_executor.enabled:
+        with startup_state.phase("inference_executor"):
+            inference_executor.start()
+            print(f"✅ Inference executor: {settings.INFERENCE_EXECUTOR} pool, "
+                  f"{settings.INFERENCE_EXECUTOR_WORKERS} workers")
+    
+    # Keep the history index or form snapshots, and the feature and prediction caches, in step with new results
+    if (settings.FEATURE_BACKEND in ('index', 'snapshots')
+            or settings.FEATURE_CACHE_ENABLED or settings.PREDICTION_CACHE_ENABLED):
+        _start_feature_refresh()
+    
+    # Dummy predictions so the first real request doesn't pay cold-cache costs
+    if settings.STARTUP_WARMUP_ENABLED and ml_service.is_loaded():
+        with startup_state.phase("warmup", required=False) as phase:
+            phase.update(await asyncio.to_thread(ml_service.warmup, settings.STARTUP_WARMUP_ROUNDS))
+            print(f"✅ Warmup: {phase['rounds']} rounds, single-row "
+                  f"{phase['first_ms']} ms -> {phase['last_ms']} ms")
     
-    if not success:
-        print("⚠️  WARNING: Model could not be loaded!")
-        print("   Prediction endpoints will not work until model is available.")
+    # Poll league odds on a quota-aware schedule instead of on demand
+    if settings.ODDS_SCHEDULER_ENABLED:
+        odds_scheduler.start()
+        print(f"✅ Odds polling scheduler: {settings.ODDS_API_MONTHLY_QUOTA} requests/month quota "
+              f"(see /health/odds)")
+    
+    ready = startup_state.finish()
     
     print("\n" + "=" * 60)
-    print("✅ Application started successfully!")
+    if ready:
+        print(f"✅ Application ready ({startup_state.get_info()['total_seconds']}s)")
+    else:
+        print("⚠️  Application started but not ready (see /health/ready)")
     print(f"📖 API Docs: http://localhost:8000/docs")
     print("=" * 60 + "\n")
 
 
+def _refresh_feature_store_once() -> int:
+    """Merge historical match changes into the active feature store; returns how many were seen"""
+    db = SessionLocal()
+    try:
+        if settings.FEATURE_BACKEND == 'snapshots':
+            changes = form_snapshot_service.sync_changes(db)
+        elif settings.FEATURE_BACKEND == 'index' and history_index.is_loaded():
+            changes = history_index.refresh(db)
+        else:
+            # Queries read matches_historical directly; only the caches can go stale
+            changes = match_change_log.poll(db)
+        
+        if match_change_log.is_available(db):
+            match_change_log.prune(db)
+        return changes
+    finally:
+        db.close()
+
+
+def _start_feature_refresh() -> None:
+    """Start the feature store refresh loop once"""
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(refresh_feature_store())
+
+
+async def refresh_feature_store():
+    """Pick up historical match changes now, then every FEATURE_REFRESH_SECONDS"""
+    while True:
+        try:
+            changes = await asyncio.to_thread(_refresh_feature_store_once)
+            if changes:
+                feature_service.invalidate_cache()
+                prediction_service.invalidate_cache()
+                print(f"Feature store refreshed: {changes} updates")
+        except Exception as e:
+            print(f"Error refreshing feature store: {e}")
+        await asyncio.sleep(settings.FEATURE_REFRESH_SECONDS)
+
+
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("\n👋 Shutting down application...")
+    for task in (_startup_task, _refresh_task):
+        if task is not None and not task.done():
+            task.cancel()
+    await inference_batcher.stop()
+    odds_scheduler.stop()
+    inference_executor.shutdown()
+    http_pool.close()
 
 
 # Health check endpoints
 @app.get("/health")
 async def health_check():
-    """Basic health check"""
+    """Liveness check; answers while the model is still loading"""
     from app.schemas.prediction import HealthResponse
     
     return HealthResponse(
@@ -69,6 +243,16 @@ async def health_check():
     )
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness check: 200 once the model is loaded (and warmed up), else 503, with startup phase timings"""
+    info = startup_state.get_info()
+    return JSONResponse(
+        status_code=200 if info["ready"] else 503,
+        content=jsonable_encoder(info)
+    )
+
+
 @app.get("/health/model")
 async def model_health():
     """ML model health check"""
@@ -78,6 +262,51 @@ async def model_health():
     return ModelHealthResponse(**info)
 
 
+@app.get("/health/features")
+async def features_health():
+    """Feature engineering backend and cache health check"""
+    return {
+        "backend": settings.FEATURE_BACKEND,
+        "history_index": history_index.get_info(),
+        "cache": feature_service.get_cache_stats()
+    }
+
+
+@app.get("/health/inference")
+async def inference_health():
+    """Inference executor, micro-batching and prediction cache health check"""
+    return {
+        "executor": inference_executor.get_stats(),
+        "batching": inference_batcher.get_stats(),
+        "prediction_cache": prediction_service.get_cache_stats()
+    }
+
+
+@app.get("/health/teams")
+async def teams_health():
+    """Team registry size and names that could not be resolved to a canonical team"""
+    return team_registry.get_report()
+
+
+@app.get("/health/odds")
+async def odds_health():
+    """Odds API snapshot cache, gateway and quota, polling plan and HTTP pool health check"""
+    return {
+        **odds_service.get_cache_stats(),
+        "gateway": odds_api.get_stats(),
+        "schedule": odds_scheduler.get_info(),
+        "http": http_pool.get_info()
+    }
+
+
+@app.get("/metrics")
+async def metrics_endpoint(format: str = "prometheus"):
+    """Latency histograms and counters (Prometheus text, or JSON with ?format=json)"""
+    if format == "json":
+        return metrics.snapshot()
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -91,6 +320,7 @@ async def root():
 
 
 # Include API routers
-from app.api import predictions, fixtures
+from app.api import predictions, fixtures, models
 app.include_router(predictions.router, prefix=f"{settings.API_V1_PREFIX}/predictions", tags=["predictions"])
 app.include_router(fixtures.router, prefix=f"{settings.API_V1_PREFIX}/fixtures", tags=["fixtures"])
+app.include_router(models.router, prefix=f"{settings.API_V1_PREFIX}/models", tags=["models"])
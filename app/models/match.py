@@ -2,7 +2,7 @@
 Database models - reuse from ML pipeline
 """
 
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, Float, Date, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -34,3 +34,62 @@ class HistoricalMatch(Base):
     over_25_odds = Column(Float)
     under_25_odds = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TeamFormSnapshot(Base):
+    """Rolling last-5 form of a team right after one of its matches"""
+    __tablename__ = 'team_form_snapshots'
+    
+    id = Column(Integer, primary_key=True)
+    team = Column(String(100), nullable=False)
+    date = Column(Date, nullable=False)
+    match_id = Column(Integer, nullable=False)
+    
+    # The team's goals in that match, to detect corrected results
+    scored = Column(Integer, nullable=False)
+    conceded = Column(Integer, nullable=False)
+    
+    # Overall form
+    avg_scored = Column(Float, nullable=False)
+    avg_conceded = Column(Float, nullable=False)
+    games_played = Column(Integer, nullable=False)
+    
+    # Home-only form
+    home_avg_scored = Column(Float, nullable=False)
+    home_avg_conceded = Column(Float, nullable=False)
+    home_games_played = Column(Integer, nullable=False)
+    
+    # Away-only form
+    away_avg_scored = Column(Float, nullable=False)
+    away_avg_conceded = Column(Float, nullable=False)
+    away_games_played = Column(Integer, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+
+class MatchChange(Base):
+    """
+    One version of a matches_historical row that was inserted, updated or deleted.
+    Written by a trigger (see app/core/migrations.py); an update logs the old and the new row.
+    """
+    __tablename__ = 'matches_historical_changes'
+    
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True)
+    operation = Column(String(10), nullable=False)  # INSERT | UPDATE | DELETE | TRUNCATE
+    
+    # The row's values; NULL for TRUNCATE, which changes every row
+    match_id = Column(Integer)
+    date = Column(Date)
+    home_team = Column(String(100))
+    away_team = Column(String(100))
+    
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Indexes for the feature-engineering hot paths (created by migrations, see app/core/migrations.py)
+Index('ix_matches_historical_home_team_date', HistoricalMatch.home_team, HistoricalMatch.date.desc())
+Index('ix_matches_historical_away_team_date', HistoricalMatch.away_team, HistoricalMatch.date.desc())
+Index('ix_matches_historical_league_date', HistoricalMatch.league, HistoricalMatch.date.desc())
+Index('ix_matches_historical_pair_date', HistoricalMatch.home_team, HistoricalMatch.away_team, HistoricalMatch.date.desc())
+Index('ix_team_form_snapshots_team_date', TeamFormSnapshot.team, TeamFormSnapshot.date.desc(), TeamFormSnapshot.match_id.desc())
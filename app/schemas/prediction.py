@@ -4,7 +4,7 @@ Pydantic schemas for API requests and responses
 
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, List, Optional
 
 
 class PredictionResponse(BaseModel):
@@ -113,7 +113,13 @@ class ModelHealthResponse(BaseModel):
     model_version: str
     model_path: str
     features_count: int
+    inference_backend: Optional[str] = None
     last_prediction_at: Optional[datetime] = None
+    latency_ms: Dict[str, Any] = {}
+    batch_sizes: Dict[str, Any] = {}
+    versions: List[Dict[str, Any]] = []
+    routes: Dict[str, str] = {}
+    shadow: Optional[Dict[str, Any]] = None
     
     class Config:
         json_schema_extra = {
@@ -122,6 +128,7 @@ class ModelHealthResponse(BaseModel):
                 "model_version": "v1.0.0",
                 "model_path": "../ml-pipeline/models/random_forest_v1.0.0.pkl",
                 "features_count": 16,
+                "inference_backend": "sklearn",
                 "last_prediction_at": "2026-01-08T11:45:00Z"
             }
         }
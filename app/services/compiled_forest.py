@@ -0,0 +1,153 @@
+"""
+Compiled Forest
+Flat-array evaluator for scikit-learn tree ensembles
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional
+
+# sklearn marks leaves with this child index
+TREE_LEAF = -1
+
+# Arrays written by CompiledForest.save, one .npy file each
+ARRAY_NAMES = ('feature', 'threshold', 'children_left', 'children_right', 'value', 'roots')
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier / ExtraTreesClassifier flattened into
+    contiguous NumPy arrays.
+    
+    All trees share one node table; every row walks every tree at once, one
+    level per step, so a prediction costs max_depth vectorized operations
+    instead of a joblib dispatch per tree.
+    """
+    
+    def __init__(self, model):
+        estimators = getattr(model, 'estimators_', None)
+        # Boosted ensembles keep an array of regressors per stage, which this layout does not cover
+        if not isinstance(estimators, list) or not estimators or not all(hasattr(tree, 'tree_') for tree in estimators):
+            raise ValueError(f"Cannot compile {type(model).__name__}: expected a fitted tree ensemble classifier")
+        
+        self.classes_ = model.classes_
+        self.n_features = model.n_features_in_
+        self.n_trees = len(estimators)
+        
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        
+        for estimator in estimators:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == TREE_LEAF
+            
+            # Children become global node ids; leaves point at themselves so
+            # rows that reach a leaf early stay there
+            node_ids = np.arange(offset, offset + tree.node_count)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            
+            # Class distribution per node (older sklearn stores counts)
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+            
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+        
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.children_left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+        self.children_right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.node_count = offset
+        self.metadata = {}
+    
+    def save(self, directory: str, metadata: Optional[Dict] = None) -> None:
+        """
+        Write the arrays as .npy files plus forest.json, so workers can
+        memory-map them instead of unpickling the sklearn model.
+        
+        Args:
+            directory: Output directory (created if missing)
+            metadata: Extra JSON-serializable fields, e.g. feature_names and version
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        for name in ARRAY_NAMES:
+            np.save(directory / f'{name}.npy', getattr(self, name))
+        
+        header = {
+            'classes': np.asarray(self.classes_).tolist(),
+            'n_features': int(self.n_features),
+            'n_trees': int(self.n_trees),
+            'max_depth': int(self.max_depth),
+            'node_count': int(self.node_count),
+            'metadata': metadata or {}
+        }
+        (directory / 'forest.json').write_text(json.dumps(header, indent=2))
+    
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'CompiledForest':
+        """
+        Load a forest written by save. With mmap_mode='r' the arrays are
+        read-only views of the page cache, shared by every process on the host.
+        """
+        directory = Path(directory)
+        header = json.loads((directory / 'forest.json').read_text())
+        
+        forest = cls.__new__(cls)
+        for name in ARRAY_NAMES:
+            setattr(forest, name, np.load(directory / f'{name}.npy', mmap_mode=mmap_mode))
+        
+        forest.classes_ = np.array(header['classes'])
+        forest.n_features = header['n_features']
+        forest.n_trees = header['n_trees']
+        forest.max_depth = header['max_depth']
+        forest.node_count = header['node_count']
+        forest.metadata = header['metadata']
+        return forest
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities, matching the source model's predict_proba.
+        
+        Args:
+            X: Array of shape (n_rows, n_features)
+        
+        Returns:
+            Array of shape (n_rows, n_classes)
+        """
+        # sklearn evaluates splits on float32 inputs
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        # Index the flattened input: row offset + feature of the current node
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(X.shape[0]) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        
+        for _ in range(self.max_depth):
+            go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+        
+        return self.value[nodes].mean(axis=1)
+    
+    def get_info(self) -> dict:
+        """Get compiled model dimensions"""
+        return {
+            "trees": self.n_trees,
+            "nodes": self.node_count,
+            "max_depth": self.max_depth,
+            "bytes": sum(a.nbytes for a in (
+                self.feature, self.threshold, self.children_left, self.children_right, self.value
+            ))
+        }
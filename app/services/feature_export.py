@@ -0,0 +1,218 @@
+"""
+Point-in-time Feature Export
+Computes the model features for every historical match as of its kickoff in one vectorized pass,
+and records the features of predicted fixtures as they were at prediction time
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from app.services.feature_vector import FEATURE_NAMES
+
+# Same order as FeatureService._build_features
+FEATURE_COLUMNS = list(FEATURE_NAMES)
+
+
+def load_matches_frame(db: Session) -> pd.DataFrame:
+    """Load matches_historical into a DataFrame with one query"""
+    from app.models.match import HistoricalMatch
+    
+    query = db.query(
+        HistoricalMatch.id,
+        HistoricalMatch.date,
+        HistoricalMatch.league,
+        HistoricalMatch.season,
+        HistoricalMatch.home_team,
+        HistoricalMatch.away_team,
+        HistoricalMatch.home_goals,
+        HistoricalMatch.away_goals,
+        HistoricalMatch.total_goals,
+        HistoricalMatch.over_25_odds,
+        HistoricalMatch.under_25_odds
+    )
+    return pd.read_sql(query.statement, db.bind)
+
+
+def _rolling_before(frame: pd.DataFrame, group_cols, value_cols, games: int) -> pd.DataFrame:
+    """
+    Mean and count of each value over the previous `games` rows of its group,
+    counting only rows with a strictly earlier date.
+    
+    `frame` must be sorted by group_cols, date, id.
+    """
+    grouped = frame.groupby(group_cols, sort=False)
+    result = pd.DataFrame(index=frame.index)
+    
+    for col in value_cols:
+        result[f'{col}_mean'] = grouped[col].transform(
+            lambda s: s.shift(1).rolling(games, min_periods=1).mean()
+        )
+    result['count'] = grouped[value_cols[0]].transform(
+        lambda s: s.shift(1).rolling(games, min_periods=0).count()
+    )
+    
+    # Matches on the same date must not see each other: every row takes the
+    # window of the first row of its (group, date), which only spans earlier dates.
+    # Rows of a (group, date) are contiguous, so that row is cumcount positions back.
+    same_day = frame.groupby(group_cols + ['date'], sort=False).cumcount().to_numpy()
+    first_row = np.arange(len(frame)) - same_day
+    result = result.iloc[first_row]
+    result.index = frame.index
+    return result
+
+
+def _team_form(matches: pd.DataFrame, games: int) -> pd.DataFrame:
+    """Overall and venue form for both teams of every match, indexed by match id"""
+    home = pd.DataFrame({
+        'id': matches['id'], 'date': matches['date'], 'team': matches['home_team'],
+        'venue': 'home', 'scored': matches['home_goals'], 'conceded': matches['away_goals']
+    })
+    away = pd.DataFrame({
+        'id': matches['id'], 'date': matches['date'], 'team': matches['away_team'],
+        'venue': 'away', 'scored': matches['away_goals'], 'conceded': matches['home_goals']
+    })
+    
+    team_games = pd.concat([home, away], ignore_index=True)
+    team_games = team_games.sort_values(['team', 'date', 'id'], kind='stable').reset_index(drop=True)
+    
+    overall = _rolling_before(team_games, ['team'], ['scored', 'conceded'], games)
+    by_venue = _rolling_before(team_games, ['team', 'venue'], ['scored', 'conceded'], games)
+    
+    team_games['avg_scored'] = overall['scored_mean'].fillna(0.0)
+    team_games['avg_conceded'] = overall['conceded_mean'].fillna(0.0)
+    team_games['games_played'] = overall['count'].astype(int)
+    team_games['venue_avg_scored'] = by_venue['scored_mean'].fillna(0.0)
+    team_games['venue_avg_conceded'] = by_venue['conceded_mean'].fillna(0.0)
+    
+    columns = ['avg_scored', 'avg_conceded', 'games_played', 'venue_avg_scored', 'venue_avg_conceded']
+    home_form = team_games[team_games['venue'] == 'home'].set_index('id')[columns]
+    away_form = team_games[team_games['venue'] == 'away'].set_index('id')[columns]
+    
+    return home_form.add_prefix('home_').join(away_form.add_prefix('away_'))
+
+
+def _totals_average(matches: pd.DataFrame, group_cols, games: int) -> pd.DataFrame:
+    """Average total goals over the previous `games` matches of each group, indexed by match id"""
+    ordered = matches.sort_values(group_cols + ['date', 'id'], kind='stable').reset_index(drop=True)
+    rolled = _rolling_before(ordered, group_cols, ['total_goals'], games)
+    rolled['id'] = ordered['id']
+    return rolled.set_index('id')
+
+
+def compute_point_in_time_features(matches: pd.DataFrame, games: int = 5,
+                                   league_games: int = 100) -> pd.DataFrame:
+    """
+    Compute engineer_features_for_match's 18 features for every match, as of its own date.
+    
+    Args:
+        matches: Frame from load_matches_frame
+        games: Form and H2H window
+        league_games: League context window
+    
+    Returns:
+        One row per match with identifiers, the features and the Over 2.5 label
+    """
+    matches = matches.copy()
+    matches['date'] = pd.to_datetime(matches['date'])
+    
+    # Unordered pair key for head-to-head
+    home_first = matches['home_team'] <= matches['away_team']
+    matches['pair_low'] = np.where(home_first, matches['home_team'], matches['away_team'])
+    matches['pair_high'] = np.where(home_first, matches['away_team'], matches['home_team'])
+    
+    form = _team_form(matches, games)
+    h2h = _totals_average(matches, ['pair_low', 'pair_high'], games)
+    league = _totals_average(matches, ['league'], league_games)
+    
+    out = matches[['id', 'date', 'league', 'season', 'home_team', 'away_team', 'total_goals']].set_index('id')
+    out = out.join(form)
+    
+    out = out.rename(columns={
+        'home_venue_avg_scored': 'home_home_avg_scored',
+        'home_venue_avg_conceded': 'home_home_avg_conceded',
+        'away_venue_avg_scored': 'away_away_avg_scored',
+        'away_venue_avg_conceded': 'away_away_avg_conceded',
+    })
+    
+    out['h2h_avg_goals'] = h2h['total_goals_mean'].fillna(0.0)
+    out['h2h_games'] = h2h['count'].astype(int)
+    out['league_avg_goals'] = league['total_goals_mean'].fillna(2.5)
+    
+    # Derived features
+    out['total_avg_scored'] = out['home_avg_scored'] + out['away_avg_scored']
+    out['goal_diff_home'] = out['home_avg_scored'] - out['home_avg_conceded']
+    out['goal_diff_away'] = out['away_avg_scored'] - out['away_avg_conceded']
+    
+    # Bookmaker odds as recorded for the match, with the same defaults as live predictions
+    odds = matches.set_index('id')[['over_25_odds', 'under_25_odds']]
+    out['over_25_odds'] = odds['over_25_odds'].fillna(2.0)
+    out['under_25_odds'] = odds['under_25_odds'].fillna(2.0)
+    
+    out['over_25'] = (out['total_goals'] > 2.5).astype(int)
+    out['season'] = out['season'].fillna('unknown')
+    
+    return out.reset_index()[
+        ['id', 'date', 'league', 'season', 'home_team', 'away_team']
+        + FEATURE_COLUMNS + ['total_goals', 'over_25']
+    ].sort_values(['date', 'id'], kind='stable').reset_index(drop=True)
+
+
+def add_team_ids(features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add canonical home_team_id / away_team_id columns (see team_registry), so
+    historical rows and predicted fixtures, whose names come from different
+    sources, can be joined by team.
+    """
+    from app.services.team_registry import team_registry
+    
+    for side in ('home', 'away'):
+        names = features[f'{side}_team']
+        ids = {name: team_registry.team_key(name, source='export') for name in names.unique()}
+        features[f'{side}_team_id'] = names.map(ids)
+    return features
+
+
+def export_features_parquet(features: pd.DataFrame, output_dir: str) -> None:
+    """Write features as a Parquet dataset partitioned by league and season, replacing an earlier export"""
+    # A plain partitioned write adds files next to the existing ones, so a rerun would duplicate every row
+    features.to_parquet(
+        output_dir,
+        partition_cols=['league', 'season'],
+        index=False,
+        existing_data_behavior='delete_matching'
+    )
+
+
+def prediction_features_frame(fixtures: List[Dict], features_list: List, predictions: List) -> pd.DataFrame:
+    """
+    One row per predicted fixture: identifiers, the features the model was given and its output.
+    
+    Args:
+        fixtures: Dicts with home_team, away_team, league and match_date
+        features_list: Their FeatureVectors (or feature dicts), in the same order
+        predictions: Their PredictionResponses, in the same order
+    """
+    rows = [
+        {
+            'fixture_id': prediction.fixture_id,
+            'date': fixture['match_date'],
+            'league': fixture['league'],
+            'home_team': fixture['home_team'],
+            'away_team': fixture['away_team'],
+            **{name: features.get(name, 0.0) for name in FEATURE_COLUMNS},
+            'over_25_probability': prediction.over_25_probability,
+            'model_version': prediction.model_version,
+            'generated_at': prediction.generated_at
+        }
+        for fixture, features, prediction in zip(fixtures, features_list, predictions)
+    ]
+    return pd.DataFrame(rows, columns=[
+        'fixture_id', 'date', 'league', 'home_team', 'away_team'
+    ] + FEATURE_COLUMNS + ['over_25_probability', 'model_version', 'generated_at'])
+
+
+def append_prediction_features(features: pd.DataFrame, output_dir: str) -> None:
+    """Add a run's rows to the Parquet dataset of predicted fixtures, partitioned by league"""
+    # Every write adds new files to the partitions, so earlier runs are kept
+    features.to_parquet(output_dir, partition_cols=['league'], index=False)
@@ -3,15 +3,66 @@ Feature Engineering Service
 Calculates features for upcoming matches, reusing logic from ML pipeline
 """
 
+import asyncio
+import numpy as np
 import pandas as pd
+from bisect import bisect_left
+from sqlalchemy import select, union_all, literal, func, case, and_, or_, true, tuple_
 from sqlalchemy.orm import Session
-from typing import Dict
-from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+from datetime import date, datetime, timedelta
+from functools import wraps
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.feature_vector import FeatureVector
+from app.services.history_index import HistoryIndex, history_index
+from app.services.team_registry import team_registry
+from app.services.form_snapshot_service import form_snapshot_service, SNAPSHOT_GAMES
+
+
+# Memoized team form, H2H and league context results (cleared when new results load)
+feature_cache = TTLCache(max_entries=settings.FEATURE_CACHE_MAX_ENTRIES, ttl_seconds=settings.CACHE_TTL)
+
+
+def team_form_key(team_name: str, as_of_date: datetime, venue: str = 'all', games: int = 5) -> Tuple:
+    """feature_cache key of calculate_team_form"""
+    return ('team_form', team_name, as_of_date.date(), venue, games)
+
+
+def h2h_key(home_team: str, away_team: str, as_of_date: datetime, games: int = 5) -> Tuple:
+    """feature_cache key of calculate_h2h (the pair is unordered)"""
+    return ('h2h', *sorted((home_team, away_team)), as_of_date.date(), games)
+
+
+def league_context_key(league: str, as_of_date: datetime) -> Tuple:
+    """feature_cache key of calculate_league_context"""
+    return ('league_context', league, as_of_date.date())
+
+
+def memoized(key):
+    """
+    Cache a FeatureService calculation in feature_cache.
+    `key` maps the call's arguments (after db) to its cache key.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, db, *args, **kwargs):
+            if not settings.FEATURE_CACHE_ENABLED:
+                return method(self, db, *args, **kwargs)
+            
+            result = feature_cache.get_or_compute(
+                key(*args, **kwargs),
+                lambda: method(self, db, *args, **kwargs)
+            )
+            return dict(result)
+        return wrapper
+    return decorator
 
 
 class FeatureService:
     """Service for calculating features for predictions"""
     
+    @memoized(team_form_key)
     def calculate_team_form(self, db: Session, team_name: str, as_of_date: datetime, 
                            venue: str = 'all', games: int = 5) -> Dict[str, float]:
         """
@@ -27,54 +78,59 @@ class FeatureService:
         Returns:
             Dictionary with form metrics
         """
+        # Answer from memory when the history index is enabled
+        if settings.FEATURE_BACKEND == 'index' and history_index.is_loaded():
+            return history_index.team_form(team_name, as_of_date, venue, games)
+        
+        # Single point lookup when materialized snapshots are enabled
+        if settings.FEATURE_BACKEND == 'snapshots' and games == SNAPSHOT_GAMES:
+            return form_snapshot_service.latest_form(db, team_name, as_of_date, venue)
+        
         # Query recent matches from database
+        if venue == 'all':
+            matches = (
+                db.execute(self._venue_games_statement(team_name, as_of_date, 'home', games)).all() +
+                db.execute(self._venue_games_statement(team_name, as_of_date, 'away', games)).all()
+            )
+        else:
+            matches = db.execute(self._venue_games_statement(team_name, as_of_date, venue, games)).all()
+        
+        return self._form_from_matches(team_name, matches, games)
+    
+    def _venue_games_statement(self, team_name: str, as_of_date: datetime, venue: str, games: int = 5):
+        """Last `games` matches a team played at one venue before a date"""
         from app.models.match import HistoricalMatch
         
-        if venue == 'home':
-            matches = db.query(HistoricalMatch).filter(
-                HistoricalMatch.home_team == team_name,
-                HistoricalMatch.date < as_of_date.date()
-            ).order_by(HistoricalMatch.date.desc()).limit(games).all()
-            
-            goals_scored = [m.home_goals for m in matches]
-            goals_conceded = [m.away_goals for m in matches]
-            
-        elif venue == 'away':
-            matches = db.query(HistoricalMatch).filter(
-                HistoricalMatch.away_team == team_name,
-                HistoricalMatch.date < as_of_date.date()
-            ).order_by(HistoricalMatch.date.desc()).limit(games).all()
-            
-            goals_scored = [m.away_goals for m in matches]
-            goals_conceded = [m.home_goals for m in matches]
-            
-        else:  # all
-            home_matches = db.query(HistoricalMatch).filter(
-                HistoricalMatch.home_team == team_name,
-                HistoricalMatch.date < as_of_date.date()
-            ).order_by(HistoricalMatch.date.desc()).limit(games).all()
-            
-            away_matches = db.query(HistoricalMatch).filter(
-                HistoricalMatch.away_team == team_name,
-                HistoricalMatch.date < as_of_date.date()
-            ).order_by(HistoricalMatch.date.desc()).limit(games).all()
-            
-            all_matches = sorted(
-                home_matches + away_matches,
-                key=lambda x: x.date,
-                reverse=True
-            )[:games]
-            
-            goals_scored = []
-            goals_conceded = []
-            
-            for m in all_matches:
-                if m.home_team == team_name:
-                    goals_scored.append(m.home_goals)
-                    goals_conceded.append(m.away_goals)
-                else:
-                    goals_scored.append(m.away_goals)
-                    goals_conceded.append(m.home_goals)
+        team_col = HistoricalMatch.home_team if venue == 'home' else HistoricalMatch.away_team
+        
+        return select(
+            HistoricalMatch.date,
+            HistoricalMatch.home_team,
+            HistoricalMatch.home_goals,
+            HistoricalMatch.away_goals
+        ).where(
+            team_col == team_name,
+            HistoricalMatch.date < as_of_date.date()
+        ).order_by(HistoricalMatch.date.desc()).limit(games)
+    
+    def _form_from_matches(self, team_name: str, matches: List, games: int = 5) -> Dict[str, float]:
+        """Average the most recent `games` of the fetched matches from the team's perspective"""
+        all_matches = sorted(
+            matches,
+            key=lambda x: x.date,
+            reverse=True
+        )[:games]
+        
+        goals_scored = []
+        goals_conceded = []
+        
+        for m in all_matches:
+            if m.home_team == team_name:
+                goals_scored.append(m.home_goals)
+                goals_conceded.append(m.away_goals)
+            else:
+                goals_scored.append(m.away_goals)
+                goals_conceded.append(m.home_goals)
         
         if len(goals_scored) == 0:
             return {
@@ -83,31 +139,40 @@ class FeatureService:
                 'games_played': 0
             }
         
-        import numpy as np
         return {
             'avg_scored': float(np.mean(goals_scored)),
             'avg_conceded': float(np.mean(goals_conceded)),
             'games_played': len(goals_scored)
         }
     
+    @memoized(h2h_key)
     def calculate_h2h(self, db: Session, home_team: str, away_team: str,
                       as_of_date: datetime, games: int = 5) -> Dict[str, float]:
         """Calculate head-to-head statistics"""
+        if settings.FEATURE_BACKEND == 'index' and history_index.is_loaded():
+            return history_index.h2h(home_team, away_team, as_of_date, games)
+        
+        matches = db.execute(self._h2h_statement(home_team, away_team, as_of_date, games)).all()
+        return self._h2h_from_matches(matches)
+    
+    def _h2h_statement(self, home_team: str, away_team: str, as_of_date: datetime, games: int = 5):
+        """Last `games` meetings of two teams, either way round, before a date"""
         from app.models.match import HistoricalMatch
         
-        matches = db.query(HistoricalMatch).filter(
+        return select(HistoricalMatch.total_goals).where(
             ((HistoricalMatch.home_team == home_team) & (HistoricalMatch.away_team == away_team)) |
             ((HistoricalMatch.home_team == away_team) & (HistoricalMatch.away_team == home_team)),
             HistoricalMatch.date < as_of_date.date()
-        ).order_by(HistoricalMatch.date.desc()).limit(games).all()
-        
+        ).order_by(HistoricalMatch.date.desc()).limit(games)
+    
+    def _h2h_from_matches(self, matches: List) -> Dict[str, float]:
+        """Head-to-head statistics from fetched meetings"""
         if len(matches) == 0:
             return {
                 'h2h_avg_goals': 0.0,
                 'h2h_games': 0
             }
         
-        import numpy as np
         total_goals = [m.total_goals for m in matches]
         
         return {
@@ -115,25 +180,291 @@ class FeatureService:
             'h2h_games': len(matches)
         }
     
+    @memoized(league_context_key)
     def calculate_league_context(self, db: Session, league: str,
                                  as_of_date: datetime) -> Dict[str, float]:
         """Calculate league-wide statistics"""
+        if settings.FEATURE_BACKEND == 'index' and history_index.is_loaded():
+            return history_index.league_context(league, as_of_date)
+        
+        matches = db.execute(self._league_statement(league, as_of_date)).all()
+        return self._league_context_from_matches(matches)
+    
+    def _league_statement(self, league: str, as_of_date: datetime, games: int = 100):
+        """Last `games` matches in a league before a date"""
         from app.models.match import HistoricalMatch
         
         # Get last 100 matches in league
-        matches = db.query(HistoricalMatch).filter(
+        return select(HistoricalMatch.total_goals).where(
             HistoricalMatch.league == league,
             HistoricalMatch.date < as_of_date.date()
-        ).order_by(HistoricalMatch.date.desc()).limit(100).all()
-        
+        ).order_by(HistoricalMatch.date.desc()).limit(games)
+    
+    def _league_context_from_matches(self, matches: List) -> Dict[str, float]:
+        """League statistics from fetched matches"""
         if len(matches) == 0:
             return {'league_avg_goals': 2.5}
         
-        import numpy as np
         return {
             'league_avg_goals': float(np.mean([m.total_goals for m in matches]))
         }
     
+    def _single_query_statement(self, home_team: str, away_team: str, league: str,
+                                as_of_date: datetime, games: int = 5, league_games: int = 100):
+        """
+        Build one SELECT that returns every form, H2H and league aggregate for a match.
+        
+        Every branch reads only its last N rows (ORDER BY date DESC LIMIT N, served by
+        the (team, date DESC) / (league, date DESC) indexes) before anything is ranked:
+        a team's last N games overall are among its last N home and last N away games,
+        so ROW_NUMBER() over those at most 2N rows gives the same windows as the
+        per-feature queries.
+        """
+        from app.models.match import HistoricalMatch
+        
+        day = as_of_date.date()
+        
+        def last_rows(limit, *columns, where):
+            """The newest `limit` rows before the match date, as a subquery"""
+            subquery = select(HistoricalMatch.date, *columns).where(
+                *where, HistoricalMatch.date < day
+            ).order_by(HistoricalMatch.date.desc()).limit(limit).subquery()
+            return select(*subquery.c)
+        
+        def team_games(role, team, venue):
+            if venue == 'home':
+                scored, conceded, team_col = HistoricalMatch.home_goals, HistoricalMatch.away_goals, HistoricalMatch.home_team
+            else:
+                scored, conceded, team_col = HistoricalMatch.away_goals, HistoricalMatch.home_goals, HistoricalMatch.away_team
+            
+            return last_rows(
+                games,
+                literal(role).label('role'),
+                literal(venue).label('venue'),
+                scored.label('scored'),
+                conceded.label('conceded'),
+                where=[team_col == team]
+            )
+        
+        games_cte = union_all(
+            team_games('home', home_team, 'home'),
+            team_games('home', home_team, 'away'),
+            team_games('away', away_team, 'home'),
+            team_games('away', away_team, 'away')
+        ).cte('team_games')
+        
+        ranked = select(
+            games_cte.c.role,
+            games_cte.c.venue,
+            games_cte.c.scored,
+            games_cte.c.conceded,
+            func.row_number().over(
+                partition_by=games_cte.c.role,
+                order_by=games_cte.c.date.desc()
+            ).label('rn_all'),
+            func.row_number().over(
+                partition_by=(games_cte.c.role, games_cte.c.venue),
+                order_by=games_cte.c.date.desc()
+            ).label('rn_venue')
+        ).cte('ranked_games')
+        
+        def form_columns(role, venue):
+            last_all = and_(ranked.c.role == role, ranked.c.rn_all <= games)
+            last_venue = and_(ranked.c.role == role, ranked.c.venue == venue, ranked.c.rn_venue <= games)
+            return [
+                func.avg(case((last_all, ranked.c.scored))).label(f'{role}_avg_scored'),
+                func.avg(case((last_all, ranked.c.conceded))).label(f'{role}_avg_conceded'),
+                func.count(case((last_all, 1))).label(f'{role}_games_played'),
+                func.avg(case((last_venue, ranked.c.scored))).label(f'{role}_{venue}_avg_scored'),
+                func.avg(case((last_venue, ranked.c.conceded))).label(f'{role}_{venue}_avg_conceded'),
+                func.count(case((last_venue, 1))).label(f'{role}_{venue}_games_played'),
+            ]
+        
+        form = select(*form_columns('home', 'home'), *form_columns('away', 'away')).cte('form')
+        
+        # One branch per direction of the pair, each on the (home_team, away_team, date DESC) index
+        h2h_games = union_all(
+            last_rows(games, HistoricalMatch.total_goals,
+                      where=[HistoricalMatch.home_team == home_team, HistoricalMatch.away_team == away_team]),
+            last_rows(games, HistoricalMatch.total_goals,
+                      where=[HistoricalMatch.home_team == away_team, HistoricalMatch.away_team == home_team])
+        ).cte('h2h_games')
+        
+        h2h_ranked = select(
+            h2h_games.c.total_goals,
+            func.row_number().over(order_by=h2h_games.c.date.desc()).label('rn')
+        ).cte('h2h_ranked')
+        
+        h2h = select(
+            func.avg(h2h_ranked.c.total_goals).label('h2h_avg_goals'),
+            func.count().label('h2h_games')
+        ).where(h2h_ranked.c.rn <= games).cte('h2h')
+        
+        league_games_cte = last_rows(
+            league_games, HistoricalMatch.total_goals, where=[HistoricalMatch.league == league]
+        ).cte('league_games')
+        
+        league_ctx = select(
+            func.avg(league_games_cte.c.total_goals).label('league_avg_goals')
+        ).cte('league_ctx')
+        
+        return select(form, h2h, league_ctx).select_from(
+            form.join(h2h, true()).join(league_ctx, true())
+        )
+    
+    def engineer_features_for_match_sql(
+        self,
+        db: Session,
+        home_team: str,
+        away_team: str,
+        league: str,
+        match_date: datetime,
+        over_25_odds: float = None,
+        under_25_odds: float = None
+    ) -> FeatureVector:
+        """
+        Generate all features for a match in a single database round trip.
+        Produces the same values as engineer_features_for_match with the ORM backend.
+        """
+        home_team, away_team = team_registry.history_name(home_team), team_registry.history_name(away_team)
+        row = db.execute(
+            self._single_query_statement(home_team, away_team, league, match_date)
+        ).one()
+        
+        return self._features_from_single_row(row, over_25_odds, under_25_odds)
+    
+    def _features_from_single_row(self, row, over_25_odds: float = None,
+                                  under_25_odds: float = None) -> FeatureVector:
+        """Build the features from the result row of _single_query_statement"""
+        def form(prefix):
+            return {
+                'avg_scored': float(getattr(row, f'{prefix}_avg_scored') or 0.0),
+                'avg_conceded': float(getattr(row, f'{prefix}_avg_conceded') or 0.0),
+                'games_played': int(getattr(row, f'{prefix}_games_played'))
+            }
+        
+        h2h = {
+            'h2h_avg_goals': float(row.h2h_avg_goals or 0.0),
+            'h2h_games': int(row.h2h_games or 0)
+        }
+        
+        league_ctx = {
+            'league_avg_goals': float(row.league_avg_goals) if row.league_avg_goals is not None else 2.5
+        }
+        
+        return self._build_features(
+            form('home'), form('home_home'), form('away'), form('away_away'),
+            h2h, league_ctx, over_25_odds, under_25_odds
+        )
+    
+    async def _fetch_async(self, session_factory, statement) -> List:
+        """Run one statement on its own pooled async session"""
+        async with session_factory() as session:
+            return (await session.execute(statement)).all()
+    
+    async def engineer_features_for_match_async(
+        self,
+        session_factory,
+        home_team: str,
+        away_team: str,
+        league: str,
+        match_date: datetime,
+        over_25_odds: float = None,
+        under_25_odds: float = None
+    ) -> FeatureVector:
+        """
+        Async version of engineer_features_for_match.
+        
+        The independent form, H2H and league queries run concurrently, each on its
+        own session from the async pool, so the event loop is never blocked on I/O.
+        Components already in the feature cache are not queried again.
+        
+        Args:
+            session_factory: Async session factory (AsyncSessionLocal)
+        """
+        # Query with the spellings stored in matches_historical
+        home_team, away_team = team_registry.history_name(home_team), team_registry.history_name(away_team)
+        
+        # In-memory index answers without I/O
+        if settings.FEATURE_BACKEND == 'index' and history_index.is_loaded():
+            return self.engineer_features_for_match(
+                None, home_team, away_team, league, match_date,
+                over_25_odds=over_25_odds,
+                under_25_odds=under_25_odds
+            )
+        
+        if settings.FEATURE_BACKEND == 'sql':
+            rows = await self._fetch_async(
+                session_factory,
+                self._single_query_statement(home_team, away_team, league, match_date)
+            )
+            return self._features_from_single_row(rows[0], over_25_odds, under_25_odds)
+        
+        # Same keys as the memoized sync calculations, so both paths share entries
+        cache_keys = {
+            'home_form': team_form_key(home_team, match_date, 'all'),
+            'home_home_form': team_form_key(home_team, match_date, 'home'),
+            'away_form': team_form_key(away_team, match_date, 'all'),
+            'away_away_form': team_form_key(away_team, match_date, 'away'),
+            'h2h': h2h_key(home_team, away_team, match_date),
+            'league_ctx': league_context_key(league, match_date),
+        }
+        
+        components = {}
+        if settings.FEATURE_CACHE_ENABLED:
+            for name, key in cache_keys.items():
+                cached = feature_cache.get(key)
+                if cached is not None:
+                    components[name] = dict(cached)
+        
+        # Statements needed for the components that missed the cache
+        needs = {
+            'home_at_home': ('home_form', 'home_home_form'),
+            'home_away': ('home_form',),
+            'away_home': ('away_form',),
+            'away_at_away': ('away_form', 'away_away_form'),
+            'h2h': ('h2h',),
+            'league': ('league_ctx',),
+        }
+        statements = {
+            'home_at_home': lambda: self._venue_games_statement(home_team, match_date, 'home'),
+            'home_away': lambda: self._venue_games_statement(home_team, match_date, 'away'),
+            'away_home': lambda: self._venue_games_statement(away_team, match_date, 'home'),
+            'away_at_away': lambda: self._venue_games_statement(away_team, match_date, 'away'),
+            'h2h': lambda: self._h2h_statement(home_team, away_team, match_date),
+            'league': lambda: self._league_statement(league, match_date),
+        }
+        wanted = [
+            name for name, used_by in needs.items()
+            if any(component not in components for component in used_by)
+        ]
+        
+        results = dict(zip(wanted, await asyncio.gather(*(
+            self._fetch_async(session_factory, statements[name]()) for name in wanted
+        ))))
+        
+        builders = {
+            'home_form': lambda: self._form_from_matches(home_team, results['home_at_home'] + results['home_away']),
+            'home_home_form': lambda: self._form_from_matches(home_team, results['home_at_home']),
+            'away_form': lambda: self._form_from_matches(away_team, results['away_home'] + results['away_at_away']),
+            'away_away_form': lambda: self._form_from_matches(away_team, results['away_at_away']),
+            'h2h': lambda: self._h2h_from_matches(results['h2h']),
+            'league_ctx': lambda: self._league_context_from_matches(results['league']),
+        }
+        computed = {name: build() for name, build in builders.items() if name not in components}
+        
+        if settings.FEATURE_CACHE_ENABLED:
+            for name, value in computed.items():
+                feature_cache.set(cache_keys[name], value)
+        components.update(computed)
+        
+        return self._build_features(
+            components['home_form'], components['home_home_form'],
+            components['away_form'], components['away_away_form'],
+            components['h2h'], components['league_ctx'],
+            over_25_odds, under_25_odds
+        )
+    
     def engineer_features_for_match(
         self,
         db: Session,
@@ -143,11 +474,21 @@ class FeatureService:
         match_date: datetime,
         over_25_odds: float = None,
         under_25_odds: float = None
-    ) -> Dict[str, float]:
+    ) -> FeatureVector:
         """
         Generate all features for a match.
-        Returns feature dictionary ready for model prediction.
+        Returns a FeatureVector ready for model prediction.
         """
+        # Query with the spellings stored in matches_historical
+        home_team, away_team = team_registry.history_name(home_team), team_registry.history_name(away_team)
+        
+        if settings.FEATURE_BACKEND == 'sql':
+            return self.engineer_features_for_match_sql(
+                db, home_team, away_team, league, match_date,
+                over_25_odds=over_25_odds,
+                under_25_odds=under_25_odds
+            )
+        
         # Home team features
         home_form = self.calculate_team_form(db, home_team, match_date, venue='all')
         home_home_form = self.calculate_team_form(db, home_team, match_date, venue='home')
@@ -162,36 +503,221 @@ class FeatureService:
         # League context
         league_ctx = self.calculate_league_context(db, league, match_date)
         
-        # Build feature dict
-        features = {
-            'home_avg_scored': home_form['avg_scored'],
-            'home_avg_conceded': home_form['avg_conceded'],
-            'home_games_played': home_form['games_played'],
-            'home_home_avg_scored': home_home_form['avg_scored'],
-            'home_home_avg_conceded': home_home_form['avg_conceded'],
-            
-            'away_avg_scored': away_form['avg_scored'],
-            'away_avg_conceded': away_form['avg_conceded'],
-            'away_games_played': away_form['games_played'],
-            'away_away_avg_scored': away_away_form['avg_scored'],
-            'away_away_avg_conceded': away_away_form['avg_conceded'],
-            
-            'h2h_avg_goals': h2h['h2h_avg_goals'],
-            'h2h_games': h2h['h2h_games'],
+        return self._build_features(
+            home_form, home_home_form, away_form, away_away_form,
+            h2h, league_ctx, over_25_odds, under_25_odds
+        )
+    
+    def _fetch_team_windows(self, db: Session, teams: Set[str], min_day: date,
+                            max_day: date, games: int) -> List:
+        """
+        Fetch every match needed for the form windows of a set of teams.
+        
+        Per team and venue this is the last `games` matches before min_day plus
+        everything between min_day and max_day, which covers each fixture's window.
+        """
+        from app.models.match import HistoricalMatch
+        
+        before_window = HistoricalMatch.date < min_day
+        
+        def venue_games(team_col):
+            return select(
+                HistoricalMatch.id,
+                HistoricalMatch.date,
+                func.row_number().over(
+                    partition_by=(team_col, before_window),
+                    order_by=HistoricalMatch.date.desc()
+                ).label('rn')
+            ).where(team_col.in_(teams), HistoricalMatch.date < max_day)
+        
+        ranked = union_all(
+            venue_games(HistoricalMatch.home_team),
+            venue_games(HistoricalMatch.away_team)
+        ).subquery('ranked_games')
+        
+        needed_ids = select(ranked.c.id).where(
+            or_(ranked.c.rn <= games, ranked.c.date >= min_day)
+        )
+        
+        return db.query(
+            HistoricalMatch.id,
+            HistoricalMatch.date,
+            HistoricalMatch.home_team,
+            HistoricalMatch.away_team,
+            HistoricalMatch.home_goals,
+            HistoricalMatch.away_goals
+        ).filter(HistoricalMatch.id.in_(needed_ids)).all()
+    
+    def _fetch_ranked_totals(self, db: Session, partition_cols: Tuple, condition,
+                             min_day: date, max_day: date, games: int) -> List:
+        """Fetch total goals for the last `games` matches per partition before min_day and all later ones"""
+        from app.models.match import HistoricalMatch
+        
+        ranked = select(
+            HistoricalMatch.date,
+            HistoricalMatch.league,
+            HistoricalMatch.home_team,
+            HistoricalMatch.away_team,
+            HistoricalMatch.total_goals,
+            func.row_number().over(
+                partition_by=(*partition_cols, HistoricalMatch.date < min_day),
+                order_by=HistoricalMatch.date.desc()
+            ).label('rn')
+        ).where(condition, HistoricalMatch.date < max_day).subquery('ranked_totals')
+        
+        return db.execute(
+            select(ranked).where(or_(ranked.c.rn <= games, ranked.c.date >= min_day))
+        ).all()
+    
+    def _group_totals(self, rows: List, key) -> Dict:
+        """Group total-goals rows into date-sorted (dates, totals) lists per key"""
+        grouped = {}
+        
+        for row in sorted(rows, key=lambda r: r.date):
+            dates, totals = grouped.setdefault(key(row), ([], []))
+            dates.append(row.date)
+            totals.append(row.total_goals)
+        
+        return grouped
+    
+    def _last_n_totals(self, grouped: Dict, key, day: date, games: int) -> List[int]:
+        """Total goals of the last `games` grouped matches strictly before day"""
+        dates, totals = grouped.get(key, ([], []))
+        end = bisect_left(dates, day)
+        return totals[max(0, end - games):end]
+    
+    def engineer_features_for_matches(self, db: Session, fixtures: List[Dict],
+                                      games: int = 5, league_games: int = 100) -> List[FeatureVector]:
+        """
+        Generate features for many fixtures with a fixed number of set-based queries.
+        
+        Distinct teams, pairs and leagues are fetched once each (three queries in
+        total), then every fixture's windows are cut from the fetched histories.
+        
+        Args:
+            db: Database session
+            fixtures: Dicts with home_team, away_team, league, match_date and
+                optional over_25_odds / under_25_odds
+            games: Number of recent games for form and H2H
+            league_games: Number of recent league matches for league context
+        
+        Returns:
+            List of FeatureVectors aligned with the input order
+        """
+        from app.models.match import HistoricalMatch
+        
+        if not fixtures:
+            return []
+        
+        # Query with the spellings stored in matches_historical
+        fixtures = [
+            {
+                **fixture,
+                'home_team': team_registry.history_name(fixture['home_team']),
+                'away_team': team_registry.history_name(fixture['away_team'])
+            }
+            for fixture in fixtures
+        ]
+        
+        days = [fixture['match_date'].date() for fixture in fixtures]
+        min_day, max_day = min(days), max(days)
+        
+        teams = {fixture['home_team'] for fixture in fixtures} | {fixture['away_team'] for fixture in fixtures}
+        pairs = {(fixture['home_team'], fixture['away_team']) for fixture in fixtures}
+        pairs |= {(away, home) for home, away in pairs}
+        leagues = {fixture['league'] for fixture in fixtures}
+        
+        # Query 1: team form windows, answered through a throwaway history index
+        team_index = HistoryIndex()
+        team_index.load_rows(self._fetch_team_windows(db, teams, min_day, max_day, games))
+        
+        # Query 2: head-to-head windows per unordered pair
+        h2h_rows = self._fetch_ranked_totals(
+            db,
+            (func.least(HistoricalMatch.home_team, HistoricalMatch.away_team),
+             func.greatest(HistoricalMatch.home_team, HistoricalMatch.away_team)),
+            tuple_(HistoricalMatch.home_team, HistoricalMatch.away_team).in_(list(pairs)),
+            min_day, max_day, games
+        )
+        h2h_history = self._group_totals(h2h_rows, lambda row: tuple(sorted((row.home_team, row.away_team))))
+        
+        # Query 3: league context windows
+        league_rows = self._fetch_ranked_totals(
+            db,
+            (HistoricalMatch.league,),
+            HistoricalMatch.league.in_(leagues),
+            min_day, max_day, league_games
+        )
+        league_history = self._group_totals(league_rows, lambda row: row.league)
+        
+        features = []
+        for fixture, day in zip(fixtures, days):
+            home_team, away_team = fixture['home_team'], fixture['away_team']
+            match_date = fixture['match_date']
             
-            'league_avg_goals': league_ctx['league_avg_goals'],
+            h2h_totals = self._last_n_totals(h2h_history, tuple(sorted((home_team, away_team))), day, games)
+            league_totals = self._last_n_totals(league_history, fixture['league'], day, league_games)
             
-            # Derived features
-            'total_avg_scored': home_form['avg_scored'] + away_form['avg_scored'],
-            'goal_diff_home': home_form['avg_scored'] - home_form['avg_conceded'],
-            'goal_diff_away': away_form['avg_scored'] - away_form['avg_conceded'],
+            h2h = {
+                'h2h_avg_goals': float(np.mean(h2h_totals)) if h2h_totals else 0.0,
+                'h2h_games': len(h2h_totals)
+            }
+            league_ctx = {
+                'league_avg_goals': float(np.mean(league_totals)) if league_totals else 2.5
+            }
             
-            # Bookmaker odds (NEW - for accuracy boost)
-            'over_25_odds': over_25_odds if over_25_odds is not None else 2.0,
-            'under_25_odds': under_25_odds if under_25_odds is not None else 2.0,
-        }
+            features.append(self._build_features(
+                team_index.team_form(home_team, match_date, 'all', games),
+                team_index.team_form(home_team, match_date, 'home', games),
+                team_index.team_form(away_team, match_date, 'all', games),
+                team_index.team_form(away_team, match_date, 'away', games),
+                h2h, league_ctx,
+                fixture.get('over_25_odds'), fixture.get('under_25_odds')
+            ))
         
         return features
+    
+    def _build_features(self, home_form: Dict, home_home_form: Dict, away_form: Dict,
+                        away_away_form: Dict, h2h: Dict, league_ctx: Dict,
+                        over_25_odds: float = None, under_25_odds: float = None) -> FeatureVector:
+        """Assemble the model features from the component statistics, written straight into a FeatureVector"""
+        features = FeatureVector()
+        
+        features['home_avg_scored'] = home_form['avg_scored']
+        features['home_avg_conceded'] = home_form['avg_conceded']
+        features['home_games_played'] = home_form['games_played']
+        features['home_home_avg_scored'] = home_home_form['avg_scored']
+        features['home_home_avg_conceded'] = home_home_form['avg_conceded']
+        
+        features['away_avg_scored'] = away_form['avg_scored']
+        features['away_avg_conceded'] = away_form['avg_conceded']
+        features['away_games_played'] = away_form['games_played']
+        features['away_away_avg_scored'] = away_away_form['avg_scored']
+        features['away_away_avg_conceded'] = away_away_form['avg_conceded']
+        
+        features['h2h_avg_goals'] = h2h['h2h_avg_goals']
+        features['h2h_games'] = h2h['h2h_games']
+        
+        features['league_avg_goals'] = league_ctx['league_avg_goals']
+        
+        # Derived features
+        features['total_avg_scored'] = home_form['avg_scored'] + away_form['avg_scored']
+        features['goal_diff_home'] = home_form['avg_scored'] - home_form['avg_conceded']
+        features['goal_diff_away'] = away_form['avg_scored'] - away_form['avg_conceded']
+        
+        # Bookmaker odds (NEW - for accuracy boost)
+        features['over_25_odds'] = over_25_odds if over_25_odds is not None else 2.0
+        features['under_25_odds'] = under_25_odds if under_25_odds is not None else 2.0
+        
+        return features
+    
+    def invalidate_cache(self) -> int:
+        """Drop memoized results, e.g. after new historical matches are loaded"""
+        return feature_cache.invalidate()
+    
+    def get_cache_stats(self) -> Dict:
+        """Get memoization hit/miss counters"""
+        return feature_cache.get_stats()
 
 
 # Global feature service instance
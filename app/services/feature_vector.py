@@ -0,0 +1,149 @@
+"""
+Feature Vector
+Array-backed container for model features, laid out in the model's column order
+"""
+
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Features produced by FeatureService, in the order the models are trained on
+FEATURE_NAMES = (
+    'home_avg_scored', 'home_avg_conceded', 'home_games_played',
+    'home_home_avg_scored', 'home_home_avg_conceded',
+    'away_avg_scored', 'away_avg_conceded', 'away_games_played',
+    'away_away_avg_scored', 'away_away_avg_conceded',
+    'h2h_avg_goals', 'h2h_games',
+    'league_avg_goals',
+    'total_avg_scored', 'goal_diff_home', 'goal_diff_away',
+    'over_25_odds', 'under_25_odds',
+)
+
+# Counts, read back as ints (the array stores every feature as float64)
+INTEGER_FEATURES = frozenset(('home_games_played', 'away_games_played', 'h2h_games'))
+
+
+class FeatureSchema:
+    """
+    Slot layout for a model: its feature_names first, then any produced
+    features it does not use. The model reads the first model_width slots.
+    """
+    
+    __slots__ = ('names', 'index', 'model_width')
+    
+    def __init__(self, model_feature_names: Iterable[str]):
+        model_names = tuple(model_feature_names)
+        self.names: Tuple[str, ...] = model_names + tuple(n for n in FEATURE_NAMES if n not in model_names)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.model_width = len(model_names)
+    
+    def __reduce__(self):
+        # Unpickle (e.g. in a process pool) to the interned schema, keeping identity checks valid
+        return (get_schema, (self.names[:self.model_width],))
+    
+    def new_vector(self) -> 'FeatureVector':
+        """Zeroed vector in this layout"""
+        return FeatureVector(self, np.zeros(len(self.names)))
+    
+    def new_matrix(self, rows: int) -> np.ndarray:
+        """Preallocated (rows, model_width) input matrix"""
+        return np.empty((rows, self.model_width))
+
+
+_schemas: Dict[Tuple[str, ...], FeatureSchema] = {}
+_schemas_lock = threading.Lock()
+
+
+def get_schema(model_feature_names: Iterable[str]) -> FeatureSchema:
+    """Shared schema per feature order, so vectors and models can be matched by identity"""
+    key = tuple(model_feature_names)
+    with _schemas_lock:
+        schema = _schemas.get(key)
+        if schema is None:
+            schema = _schemas[key] = FeatureSchema(key)
+        return schema
+
+
+DEFAULT_SCHEMA = get_schema(FEATURE_NAMES)
+
+# Layout new vectors are built in; follows the active model
+_active_schema = DEFAULT_SCHEMA
+
+
+def set_active_schema(schema: FeatureSchema) -> None:
+    """Make producers build vectors in this layout (called when a model is activated)"""
+    global _active_schema
+    _active_schema = schema
+
+
+def active_schema() -> FeatureSchema:
+    """Layout of newly built vectors"""
+    return _active_schema
+
+
+class FeatureVector(Mapping):
+    """
+    Model features stored in one float64 array instead of a dict.
+    
+    Reads like a read-only dict (features['h2h_games'], .get, .items()) so
+    existing consumers work unchanged; producers assign by name, which writes
+    straight into the array. Count features come back as ints, as they did
+    from the plain dicts.
+    """
+    
+    __slots__ = ('schema', 'values')
+    
+    def __init__(self, schema: Optional[FeatureSchema] = None, values: Optional[np.ndarray] = None):
+        self.schema = schema or _active_schema
+        self.values = values if values is not None else np.zeros(len(self.schema.names))
+    
+    def __getitem__(self, name: str) -> float:
+        value = self.values[self.schema.index[name]]
+        return int(value) if name in INTEGER_FEATURES else float(value)
+    
+    def __setitem__(self, name: str, value: float) -> None:
+        self.values[self.schema.index[name]] = value
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.names)
+    
+    def __len__(self) -> int:
+        return len(self.schema.names)
+    
+    def __repr__(self) -> str:
+        return f"FeatureVector({dict(self.items())})"
+    
+    def model_row(self, schema: FeatureSchema) -> np.ndarray:
+        """
+        Model input for `schema`: a view of this vector's first slots when the
+        layouts match (no copy), otherwise gathered by name.
+        """
+        if self.schema is schema:
+            return self.values[:schema.model_width]
+        return np.array([self.get(name, 0.0) for name in schema.names[:schema.model_width]])
+    
+    def to_dict(self) -> Dict[str, float]:
+        """Plain dict copy"""
+        return {
+            name: int(value) if name in INTEGER_FEATURES else value
+            for name, value in zip(self.schema.names, self.values.tolist())
+        }
+
+
+def stack_rows(features_list: List, schema: FeatureSchema) -> np.ndarray:
+    """
+    Model input matrix for many feature vectors (or plain dicts), written into
+    one preallocated array.
+    """
+    matrix = schema.new_matrix(len(features_list))
+    model_names = schema.names[:schema.model_width]
+    
+    for row, features in enumerate(features_list):
+        if isinstance(features, FeatureVector):
+            matrix[row] = features.model_row(schema)
+        else:
+            matrix[row] = [features.get(name, 0.0) for name in model_names]
+    
+    return matrix
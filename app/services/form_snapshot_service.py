@@ -0,0 +1,249 @@
+"""
+Form Snapshot Service
+Maintains team_form_snapshots, the materialized rolling form of every team after each match
+"""
+
+from collections import deque
+from datetime import date, datetime
+from typing import Dict
+from sqlalchemy import and_, distinct, func, or_
+from sqlalchemy.orm import Session
+from app.models.match import HistoricalMatch, TeamFormSnapshot
+from app.services.match_change_log import match_change_log
+
+# Rolling window stored in each snapshot
+SNAPSHOT_GAMES = 5
+
+
+class FormSnapshotService:
+    """Service for building and reading materialized team form"""
+    
+    def __init__(self):
+        self._changes = None  # ChangeCursor into matches_historical_changes, set by the first sync
+    
+    def _new_windows(self) -> Dict[str, deque]:
+        """Empty rolling windows of (scored, conceded) per venue"""
+        return {venue: deque(maxlen=SNAPSHOT_GAMES) for venue in ('all', 'home', 'away')}
+    
+    def _push(self, windows: Dict[str, deque], team: str, match) -> None:
+        """Add one match to a team's rolling windows"""
+        if match.home_team == team:
+            windows['all'].append((match.home_goals, match.away_goals))
+            windows['home'].append((match.home_goals, match.away_goals))
+        else:
+            windows['all'].append((match.away_goals, match.home_goals))
+            windows['away'].append((match.away_goals, match.home_goals))
+    
+    def _snapshot_row(self, team: str, match, windows: Dict[str, deque]) -> Dict:
+        """Build a snapshot row from the current windows"""
+        home = match.home_team == team
+        row = {
+            'team': team,
+            'date': match.date,
+            'match_id': match.id,
+            'scored': match.home_goals if home else match.away_goals,
+            'conceded': match.away_goals if home else match.home_goals,
+            'updated_at': datetime.utcnow()
+        }
+        
+        for prefix, venue in (('', 'all'), ('home_', 'home'), ('away_', 'away')):
+            window = windows[venue]
+            games = len(window)
+            row[f'{prefix}avg_scored'] = sum(s for s, _ in window) / games if games else 0.0
+            row[f'{prefix}avg_conceded'] = sum(c for _, c in window) / games if games else 0.0
+            row[f'{prefix}games_played'] = games
+        
+        return row
+    
+    def rebuild_all(self, db: Session) -> int:
+        """
+        Rebuild every snapshot from matches_historical in one ordered pass.
+        
+        Returns:
+            Number of snapshots written
+        """
+        matches = db.query(
+            HistoricalMatch.id,
+            HistoricalMatch.date,
+            HistoricalMatch.home_team,
+            HistoricalMatch.away_team,
+            HistoricalMatch.home_goals,
+            HistoricalMatch.away_goals
+        ).order_by(HistoricalMatch.date, HistoricalMatch.id).all()
+        
+        windows = {}
+        rows = []
+        for match in matches:
+            for team in (match.home_team, match.away_team):
+                team_windows = windows.setdefault(team, self._new_windows())
+                self._push(team_windows, team, match)
+                rows.append(self._snapshot_row(team, match, team_windows))
+        
+        db.query(TeamFormSnapshot).delete()
+        db.bulk_insert_mappings(TeamFormSnapshot, rows)
+        db.commit()
+        
+        return len(rows)
+    
+    def rebuild_team(self, db: Session, team: str, since: date) -> int:
+        """
+        Recompute one team's snapshots from a date onwards.
+        Windows are seeded from the team's last games before that date.
+        
+        Returns:
+            Number of snapshots written
+        """
+        windows = self._new_windows()
+        
+        # Seed: the last games before `since`, replayed oldest first
+        home_seed = db.query(HistoricalMatch).filter(
+            HistoricalMatch.home_team == team,
+            HistoricalMatch.date < since
+        ).order_by(HistoricalMatch.date.desc(), HistoricalMatch.id.desc()).limit(SNAPSHOT_GAMES).all()
+        
+        away_seed = db.query(HistoricalMatch).filter(
+            HistoricalMatch.away_team == team,
+            HistoricalMatch.date < since
+        ).order_by(HistoricalMatch.date.desc(), HistoricalMatch.id.desc()).limit(SNAPSHOT_GAMES).all()
+        
+        for match in sorted(home_seed + away_seed, key=lambda m: (m.date, m.id)):
+            self._push(windows, team, match)
+        
+        # Roll forward over everything from `since`
+        matches = db.query(HistoricalMatch).filter(
+            or_(HistoricalMatch.home_team == team, HistoricalMatch.away_team == team),
+            HistoricalMatch.date >= since
+        ).order_by(HistoricalMatch.date, HistoricalMatch.id).all()
+        
+        rows = []
+        for match in matches:
+            self._push(windows, team, match)
+            rows.append(self._snapshot_row(team, match, windows))
+        
+        db.query(TeamFormSnapshot).filter(
+            TeamFormSnapshot.team == team,
+            TeamFormSnapshot.date >= since
+        ).delete()
+        db.bulk_insert_mappings(TeamFormSnapshot, rows)
+        
+        return len(rows)
+    
+    def _stale_teams(self, db: Session) -> Dict[str, date]:
+        """
+        Earliest date from which each team's snapshots disagree with matches_historical.
+        
+        Compares every match with its snapshots, so backfilled, corrected and deleted
+        rows are found too. This scans both tables; sync_changes only runs it once.
+        """
+        since = {}
+        
+        def mark(team: str, day: date) -> None:
+            if day is not None and (team not in since or day < since[team]):
+                since[team] = day
+        
+        # Matches whose snapshot is missing (new or backfilled) or was built from other values (corrected)
+        for team_col, scored_col, conceded_col in (
+            (HistoricalMatch.home_team, HistoricalMatch.home_goals, HistoricalMatch.away_goals),
+            (HistoricalMatch.away_team, HistoricalMatch.away_goals, HistoricalMatch.home_goals)
+        ):
+            rows = db.query(
+                team_col.label('team'),
+                HistoricalMatch.date,
+                TeamFormSnapshot.date.label('snapshot_date')
+            ).outerjoin(
+                TeamFormSnapshot,
+                and_(TeamFormSnapshot.team == team_col, TeamFormSnapshot.match_id == HistoricalMatch.id)
+            ).filter(or_(
+                TeamFormSnapshot.id.is_(None),
+                TeamFormSnapshot.date != HistoricalMatch.date,
+                TeamFormSnapshot.scored != scored_col,
+                TeamFormSnapshot.conceded != conceded_col
+            )).all()
+            
+            for row in rows:
+                mark(row.team, row.date)
+                mark(row.team, row.snapshot_date)  # a moved match also changes the windows at its old date
+        
+        # Snapshots of matches that were deleted or no longer involve the team
+        orphans = db.query(TeamFormSnapshot.team, TeamFormSnapshot.date).outerjoin(
+            HistoricalMatch, HistoricalMatch.id == TeamFormSnapshot.match_id
+        ).filter(or_(
+            HistoricalMatch.id.is_(None),
+            and_(HistoricalMatch.home_team != TeamFormSnapshot.team, HistoricalMatch.away_team != TeamFormSnapshot.team)
+        )).all()
+        
+        for row in orphans:
+            mark(row.team, row.date)
+        
+        return since
+    
+    def _changed_teams(self, changes) -> Dict[str, date]:
+        """Earliest date each team's matches changed at, from change log entries"""
+        since = {}
+        for change in changes:
+            for team in (change.home_team, change.away_team):
+                if team not in since or change.date < since[team]:
+                    since[team] = change.date
+        return since
+    
+    def sync_changes(self, db: Session) -> int:
+        """
+        Pick up changes made by other writers (e.g. the ML pipeline loader):
+        new, backfilled, corrected and deleted matches. Only the affected teams
+        are rebuilt, from the earliest date that changed.
+        
+        The first call compares both tables in full (catching up on anything
+        written while the service was down); later calls only read the entries
+        added to matches_historical_changes since the previous call.
+        
+        Returns:
+            Number of teams rebuilt
+        """
+        changes, self._changes = self._changes, None  # a failed sync falls back to the full comparison
+        
+        if changes is None:
+            changes = match_change_log.cursor(db)  # positioned before the full comparison
+            since = self._stale_teams(db)
+        else:
+            entries = changes.read(db)
+            if any(entry.operation == 'TRUNCATE' for entry in entries):
+                self.rebuild_all(db)
+                self._changes = changes
+                return db.query(func.count(distinct(TeamFormSnapshot.team))).scalar()
+            since = self._changed_teams(entries)
+        
+        for team, team_since in since.items():
+            self.rebuild_team(db, team, team_since)
+        db.commit()
+        self._changes = changes
+        
+        return len(since)
+    
+    def latest_form(self, db: Session, team_name: str, as_of_date: datetime,
+                    venue: str = 'all') -> Dict[str, float]:
+        """
+        Team form as of a date: one indexed lookup of the latest snapshot before it.
+        Same contract as FeatureService.calculate_team_form for SNAPSHOT_GAMES games.
+        """
+        snapshot = db.query(TeamFormSnapshot).filter(
+            TeamFormSnapshot.team == team_name,
+            TeamFormSnapshot.date < as_of_date.date()
+        ).order_by(TeamFormSnapshot.date.desc(), TeamFormSnapshot.match_id.desc()).first()
+        
+        if snapshot is None:
+            return {
+                'avg_scored': 0.0,
+                'avg_conceded': 0.0,
+                'games_played': 0
+            }
+        
+        prefix = '' if venue == 'all' else f'{venue}_'
+        return {
+            'avg_scored': getattr(snapshot, f'{prefix}avg_scored'),
+            'avg_conceded': getattr(snapshot, f'{prefix}avg_conceded'),
+            'games_played': getattr(snapshot, f'{prefix}games_played')
+        }
+
+
+# Global form snapshot service instance
+form_snapshot_service = FormSnapshotService()
@@ -0,0 +1,443 @@
+"""
+Historical Match Index
+Loads matches_historical once into date-sorted NumPy arrays for in-memory feature lookups
+"""
+
+import threading
+import numpy as np
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from sqlalchemy.orm import Session
+from app.services.match_change_log import match_change_log
+
+
+# Seasons run August to May, so every season starts after the first of this month
+SEASON_START_MONTH = 7
+
+
+def _day(as_of_date: datetime) -> int:
+    """Convert a datetime to the proleptic ordinal of its date"""
+    return as_of_date.date().toordinal()
+
+
+def _season_start(day: int) -> int:
+    """Ordinal of the first day of the season a date falls in"""
+    as_of = date.fromordinal(day)
+    year = as_of.year if as_of.month >= SEASON_START_MONTH else as_of.year - 1
+    return date(year, SEASON_START_MONTH, 1).toordinal()
+
+
+class TeamHistory:
+    """Date-sorted goals for one team at one venue"""
+    
+    __slots__ = ('dates', 'scored', 'conceded')
+    
+    def __init__(self, dates: np.ndarray, scored: np.ndarray, conceded: np.ndarray):
+        self.dates = dates
+        self.scored = scored
+        self.conceded = conceded
+    
+    def merge(self, dates: List[int], scored: List[int], conceded: List[int]) -> 'TeamHistory':
+        """Return a new history with extra games merged in date order"""
+        all_dates = np.concatenate([self.dates, np.asarray(dates, dtype=np.int64)])
+        all_scored = np.concatenate([self.scored, np.asarray(scored, dtype=np.int16)])
+        all_conceded = np.concatenate([self.conceded, np.asarray(conceded, dtype=np.int16)])
+        
+        order = np.argsort(all_dates, kind='stable')
+        return TeamHistory(all_dates[order], all_scored[order], all_conceded[order])
+
+
+_EMPTY_HISTORY = TeamHistory(
+    np.empty(0, dtype=np.int64),
+    np.empty(0, dtype=np.int16),
+    np.empty(0, dtype=np.int16)
+)
+
+
+def _pair_key(team_a: str, team_b: str) -> Tuple[str, str]:
+    """Key for an unordered team pair"""
+    return (team_a, team_b) if team_a <= team_b else (team_b, team_a)
+
+
+class TotalsHistory:
+    """
+    Date-sorted total goals for one league or one team pair, with prefix sums.
+    
+    cumulative_goals[i] is the goal total of the first i matches, so the sum of
+    any contiguous window is one subtraction.
+    """
+    
+    __slots__ = ('dates', 'totals', 'cumulative_goals')
+    
+    def __init__(self, dates: np.ndarray, totals: np.ndarray):
+        self.dates = dates
+        self.totals = totals
+        self.cumulative_goals = np.concatenate([[0], np.cumsum(totals, dtype=np.int64)])
+    
+    def merge(self, dates: List[int], totals: List[int]) -> 'TotalsHistory':
+        """Return a new history with extra matches merged in date order"""
+        all_dates = np.concatenate([self.dates, np.asarray(dates, dtype=np.int64)])
+        all_totals = np.concatenate([self.totals, np.asarray(totals, dtype=np.int16)])
+        
+        order = np.argsort(all_dates, kind='stable')
+        return TotalsHistory(all_dates[order], all_totals[order])
+    
+    def window(self, day: int, games: Union[int, str]) -> Tuple[int, int]:
+        """
+        Start and end positions of the matches in a window before a date.
+        For 'season' that is every match since the start of the date's own
+        season, so a fixture before its season's first match gets an empty window.
+        """
+        end = int(np.searchsorted(self.dates, day, side='left'))
+        if games == 'season':
+            start = min(end, int(np.searchsorted(self.dates, _season_start(day), side='left')))
+        else:
+            start = max(0, end - games)
+        return start, end
+
+
+_EMPTY_TOTALS = TotalsHistory(
+    np.empty(0, dtype=np.int64),
+    np.empty(0, dtype=np.int16)
+)
+
+
+class HistoryIndex:
+    """
+    Columnar in-memory index over matches_historical.
+    
+    Each (team, venue) pair maps to arrays sorted by date, so "last N games
+    before date D" is a binary search plus a slice and never touches the database.
+    Each league and each unordered team pair keeps prefix sums of total goals,
+    so any "last K matches" or season-to-date average is a binary search plus
+    one subtraction.
+    """
+    
+    def __init__(self):
+        self._teams: Dict[Tuple[str, str], TeamHistory] = {}
+        self._leagues: Dict[str, TotalsHistory] = {}
+        self._pairs: Dict[Tuple[str, str], TotalsHistory] = {}
+        self._lock = threading.Lock()
+        self._version = 0  # bumped on every swap, so a refresh built on stale contents is redone
+        self._changes = None  # ChangeCursor into matches_historical_changes, positioned by load()
+        self.max_id = 0
+        self.rows_loaded = 0
+        self.loaded_at = None
+        self.refreshed_at = None
+    
+    def _fetch_rows(self, db: Session, after_id: int = 0, ids: Optional[List[int]] = None) -> List:
+        """Fetch the columns the index needs for rows newer than after_id, or for the given ids"""
+        from app.models.match import HistoricalMatch
+        
+        query = db.query(
+            HistoricalMatch.id,
+            HistoricalMatch.date,
+            HistoricalMatch.league,
+            HistoricalMatch.home_team,
+            HistoricalMatch.away_team,
+            HistoricalMatch.home_goals,
+            HistoricalMatch.away_goals,
+            HistoricalMatch.total_goals
+        )
+        if ids is not None:
+            query = query.filter(HistoricalMatch.id.in_(ids))
+        else:
+            query = query.filter(HistoricalMatch.id > after_id)
+        return query.order_by(HistoricalMatch.id).all()
+    
+    def _group_rows(self, rows: List) -> Dict[Tuple[str, str], Tuple[List, List, List]]:
+        """Split match rows into per-(team, venue) column lists"""
+        grouped = {}
+        
+        def add(team, venue, day, scored, conceded):
+            columns = grouped.setdefault((team, venue), ([], [], []))
+            columns[0].append(day)
+            columns[1].append(scored)
+            columns[2].append(conceded)
+        
+        for row in rows:
+            day = row.date.toordinal()
+            add(row.home_team, 'home', day, row.home_goals, row.away_goals)
+            add(row.home_team, 'all', day, row.home_goals, row.away_goals)
+            add(row.away_team, 'away', day, row.away_goals, row.home_goals)
+            add(row.away_team, 'all', day, row.away_goals, row.home_goals)
+        
+        return grouped
+    
+    @staticmethod
+    def _league_of(row) -> str:
+        """Grouping key for league histories"""
+        return row.league
+    
+    @staticmethod
+    def _pair_of(row) -> Tuple[str, str]:
+        """Grouping key for head-to-head histories"""
+        return _pair_key(row.home_team, row.away_team)
+    
+    def _group_totals_rows(self, rows: List, key) -> Dict:
+        """Split match rows into per-key (dates, totals) column lists"""
+        grouped = {}
+        
+        for row in rows:
+            columns = grouped.setdefault(key(row), ([], []))
+            columns[0].append(row.date.toordinal())
+            columns[1].append(row.total_goals)
+        
+        return grouped
+    
+    @staticmethod
+    def _merged(histories: Dict, grouped: Dict, empty) -> Dict:
+        """Copy of a histories dict with the grouped rows merged into their entries"""
+        merged = dict(histories)
+        for key, columns in grouped.items():
+            merged[key] = merged.get(key, empty).merge(*columns)
+        return merged
+    
+    def load(self, db: Session) -> int:
+        """
+        Load the full table into memory, replacing any previous contents.
+        
+        Returns:
+            Number of rows loaded
+        """
+        # Positioned before the rows are read, so nothing written meanwhile is missed
+        changes = match_change_log.cursor(db) if match_change_log.is_available(db) else None
+        loaded = self.load_rows(self._fetch_rows(db))
+        self._changes = changes
+        return loaded
+    
+    def load_rows(self, rows: List) -> int:
+        """
+        Build the index from already-fetched match rows.
+        Rows need id, date, home_team, away_team, home_goals and away_goals;
+        league and total_goals are needed for league lookups.
+        
+        Returns:
+            Number of rows loaded
+        """
+        grouped = self._group_rows(rows)
+        
+        teams = {
+            key: _EMPTY_HISTORY.merge(*columns)
+            for key, columns in grouped.items()
+        }
+        
+        leagues, pairs = {}, {}
+        if rows and hasattr(rows[0], 'total_goals'):
+            leagues = {
+                league: _EMPTY_TOTALS.merge(*columns)
+                for league, columns in self._group_totals_rows(rows, self._league_of).items()
+            }
+            pairs = {
+                pair: _EMPTY_TOTALS.merge(*columns)
+                for pair, columns in self._group_totals_rows(rows, self._pair_of).items()
+            }
+        
+        with self._lock:
+            self._teams = teams
+            self._leagues = leagues
+            self._pairs = pairs
+            self.max_id = max((row.id for row in rows), default=0)
+            self.rows_loaded = len(rows)
+            self.loaded_at = datetime.utcnow()
+            self.refreshed_at = self.loaded_at
+            self._version += 1
+        
+        return len(rows)
+    
+    def refresh(self, db: Session) -> int:
+        """
+        Pick up matches_historical changes since the last load/refresh.
+        
+        With the change log (migration 2), new rows are merged into only the teams,
+        leagues and pairs they touch, and an updated, deleted or backfilled row
+        reloads the whole index. Without it only rows with ids above the highest
+        loaded one are seen; corrections and deletions wait for the next load.
+        
+        Returns:
+            Number of changes picked up
+        """
+        changes, self._changes = self._changes, None  # a failed refresh reloads next time
+        
+        if changes is None:
+            if match_change_log.is_available(db):
+                return self.load(db)
+            return self._merge_rows(lambda max_id: self._fetch_rows(db, after_id=max_id))
+        
+        entries = changes.read(db)
+        if all(entry.operation == 'INSERT' and entry.match_id > self.max_id for entry in entries):
+            ids = [entry.match_id for entry in entries]
+            if ids:
+                # Skips rows a concurrent load already read
+                self._merge_rows(lambda max_id: [row for row in self._fetch_rows(db, ids=ids) if row.id > max_id])
+            else:
+                self.refreshed_at = datetime.utcnow()
+        else:
+            self.load_rows(self._fetch_rows(db))
+        
+        self._changes = changes
+        return len(entries)
+    
+    def _merge_rows(self, fetch) -> int:
+        """
+        Merge the rows returned by fetch(max_id) into the current contents.
+        
+        The query and the merge run without the lock on copies of the current
+        histories, which are then swapped in; lookups keep reading the old ones
+        until then.
+        
+        Returns:
+            Number of rows merged
+        """
+        while True:
+            with self._lock:
+                version, max_id = self._version, self.max_id
+                teams, leagues, pairs = self._teams, self._leagues, self._pairs
+            
+            rows = fetch(max_id)
+            
+            if rows:
+                teams = self._merged(teams, self._group_rows(rows), _EMPTY_HISTORY)
+                leagues = self._merged(leagues, self._group_totals_rows(rows, self._league_of), _EMPTY_TOTALS)
+                pairs = self._merged(pairs, self._group_totals_rows(rows, self._pair_of), _EMPTY_TOTALS)
+            
+            with self._lock:
+                if self._version != version:
+                    continue  # a concurrent load or refresh swapped first; merge on top of it
+                
+                if rows:
+                    self._teams, self._leagues, self._pairs = teams, leagues, pairs
+                    self.max_id = max(max_id, max(row.id for row in rows))
+                    self.rows_loaded += len(rows)
+                    self._version += 1
+                self.refreshed_at = datetime.utcnow()
+            
+            return len(rows)
+    
+    def is_loaded(self) -> bool:
+        """Check if the index has been loaded"""
+        return self.loaded_at is not None
+    
+    def team_form(self, team_name: str, as_of_date: datetime,
+                  venue: str = 'all', games: int = 5) -> Dict[str, float]:
+        """
+        Same contract as FeatureService.calculate_team_form, answered from memory.
+        """
+        history = self._teams.get((team_name, venue), _EMPTY_HISTORY)
+        
+        end = int(np.searchsorted(history.dates, _day(as_of_date), side='left'))
+        start = max(0, end - games)
+        
+        if end == start:
+            return {
+                'avg_scored': 0.0,
+                'avg_conceded': 0.0,
+                'games_played': 0
+            }
+        
+        return {
+            'avg_scored': float(history.scored[start:end].mean()),
+            'avg_conceded': float(history.conceded[start:end].mean()),
+            'games_played': end - start
+        }
+    
+    def league_average(self, league: str, as_of_date: datetime,
+                       games: Union[int, str] = 100) -> Tuple[Optional[float], int]:
+        """
+        Average total goals over a league window before a date.
+        
+        Args:
+            league: League name
+            as_of_date: Only matches strictly before this date count
+            games: Number of recent matches, or 'season' for season-to-date
+                (the season the date falls in, starting in SEASON_START_MONTH)
+        
+        Returns:
+            Tuple of (average goals or None if no matches, matches in window)
+        """
+        history = self._leagues.get(league, _EMPTY_TOTALS)
+        start, end = history.window(_day(as_of_date), games)
+        
+        if end == start:
+            return None, 0
+        
+        total = history.cumulative_goals[end] - history.cumulative_goals[start]
+        return float(total / (end - start)), end - start
+    
+    def league_averages(self, league: str, as_of_date: datetime,
+                        windows: Iterable[Union[int, str]] = (50, 100, 200, 'season')) -> Dict:
+        """Average total goals for several windows at once, keyed by window"""
+        return {window: self.league_average(league, as_of_date, window)[0] for window in windows}
+    
+    def _average_series(self, history: TotalsHistory, as_of_dates: Iterable[datetime],
+                        games: int) -> np.ndarray:
+        """Vectorized last-`games` averages for many dates; NaN where nothing precedes a date"""
+        days = np.fromiter((_day(d) for d in as_of_dates), dtype=np.int64)
+        
+        ends = np.searchsorted(history.dates, days, side='left')
+        starts = np.maximum(ends - games, 0)
+        counts = ends - starts
+        
+        totals = history.cumulative_goals[ends] - history.cumulative_goals[starts]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / counts, np.nan)
+    
+    def league_average_series(self, league: str, as_of_dates: Iterable[datetime],
+                              games: int = 100) -> np.ndarray:
+        """
+        Vectorized league averages for many dates (e.g. backtests).
+        Dates with no prior matches get NaN.
+        """
+        return self._average_series(self._leagues.get(league, _EMPTY_TOTALS), as_of_dates, games)
+    
+    def league_context(self, league: str, as_of_date: datetime, games: int = 100) -> Dict[str, float]:
+        """
+        Same contract as FeatureService.calculate_league_context, answered from memory.
+        """
+        average, _ = self.league_average(league, as_of_date, games)
+        return {'league_avg_goals': average if average is not None else 2.5}
+    
+    def h2h(self, home_team: str, away_team: str, as_of_date: datetime,
+            games: int = 5) -> Dict[str, float]:
+        """
+        Same contract as FeatureService.calculate_h2h, answered from memory.
+        The pair is unordered, so both home/away orientations are included.
+        """
+        history = self._pairs.get(_pair_key(home_team, away_team), _EMPTY_TOTALS)
+        start, end = history.window(_day(as_of_date), games)
+        
+        if end == start:
+            return {
+                'h2h_avg_goals': 0.0,
+                'h2h_games': 0
+            }
+        
+        total = history.cumulative_goals[end] - history.cumulative_goals[start]
+        return {
+            'h2h_avg_goals': float(total / (end - start)),
+            'h2h_games': end - start
+        }
+    
+    def h2h_series(self, home_team: str, away_team: str, as_of_dates: Iterable[datetime],
+                   games: int = 5) -> np.ndarray:
+        """Vectorized H2H average goals for many dates; NaN where the pair never met before"""
+        history = self._pairs.get(_pair_key(home_team, away_team), _EMPTY_TOTALS)
+        return self._average_series(history, as_of_dates, games)
+    
+    def get_info(self) -> Dict:
+        """Get index information"""
+        return {
+            "loaded": self.is_loaded(),
+            "rows": self.rows_loaded,
+            "teams": len({team for team, _ in self._teams}),
+            "leagues": len(self._leagues),
+            "pairs": len(self._pairs),
+            "max_id": self.max_id,
+            "follows_change_log": self._changes is not None,
+            "loaded_at": self.loaded_at,
+            "refreshed_at": self.refreshed_at
+        }
+
+
+# Global history index instance
+history_index = HistoryIndex()
@@ -0,0 +1,141 @@
+"""
+Inference Batcher
+Coalesces concurrent prediction requests into single predict_proba calls
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics, BATCH_SIZE_BUCKETS
+from app.services.ml_service import ml_service
+from app.services.inference_executor import inference_executor
+
+
+class InferenceBatcher:
+    """
+    Async micro-batcher in front of MLModelService.predict_many.
+    
+    Requests arriving while a batch is open (up to max_wait_ms after its first
+    request, or until max_batch_size requests) share one model call. The model
+    runs in a worker thread (or the inference executor's pool), so new requests
+    keep queueing during inference.
+    """
+    
+    def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[Dict[str, float], asyncio.Future]] = []
+        self._has_work: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+    
+    def start(self) -> None:
+        """Start the batching worker on the running event loop"""
+        if self._worker is not None and not self._worker.done():
+            return
+        
+        self._has_work = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the worker, failing any requests still waiting"""
+        if self._worker is None:
+            return
+        
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        
+        for _, future in self._pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Inference batcher stopped"))
+        self._pending.clear()
+    
+    async def predict(self, features: Dict[str, float]) -> Tuple[float, float, float]:
+        """
+        Queue one feature vector and wait for its prediction.
+        
+        Returns:
+            Tuple of (over_25_prob, under_25_prob, confidence_score)
+        """
+        self.start()
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((features, future))
+        self._has_work.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._batch_full.set()
+        
+        return await future
+    
+    async def _run(self) -> None:
+        """Collect batches and dispatch them to the model"""
+        while True:
+            await self._has_work.wait()
+            
+            # Hold the batch open briefly unless it is already full
+            if len(self._pending) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.max_wait_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            
+            if not self._pending:
+                self._has_work.clear()
+            if len(self._pending) < self.max_batch_size:
+                self._batch_full.clear()
+            
+            await self._run_batch(batch)
+    
+    async def _run_batch(self, batch: List[Tuple[Dict[str, float], asyncio.Future]]) -> None:
+        """Run one model call and fan the results back out"""
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        metrics.histogram('inference_batch_size', BATCH_SIZE_BUCKETS, source='micro_batch').observe(len(batch))
+        
+        features_list = [features for features, _ in batch]
+        try:
+            if inference_executor.enabled:
+                results = await inference_executor.predict_many(features_list)
+            else:
+                results = await asyncio.to_thread(ml_service.predict_many, features_list)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    def get_stats(self) -> Dict:
+        """Get batching counters"""
+        return {
+            "enabled": settings.INFERENCE_BATCH_ENABLED,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch
+        }
+
+
+# Global inference batcher instance
+inference_batcher = InferenceBatcher(
+    max_batch_size=settings.INFERENCE_BATCH_MAX_SIZE,
+    max_wait_ms=settings.INFERENCE_BATCH_MAX_WAIT_MS
+)
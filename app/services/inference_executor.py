@@ -0,0 +1,198 @@
+"""
+Inference Executor
+Runs feature computation and model inference off the event loop, in a thread
+or process pool, and measures queueing versus execution time
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.feature_service import feature_service
+from app.services.ml_service import ml_service
+
+metrics.describe('executor_wait_ms', "Time inference executor tasks wait for a worker (ms)")
+metrics.describe('executor_exec_ms', "Time inference executor tasks run in a worker (ms)")
+
+
+def _init_worker(model_source: Optional[str]) -> None:
+    """
+    Process pool initializer. Forked workers inherit the parent's loaded model
+    (shared pages); spawned workers load it from model_source.
+    """
+    # Latencies and counters recorded here go back to the parent with each result
+    metrics.forward()
+    
+    # Forked workers inherit the parent's pooled connections; leave those to the
+    # parent and open fresh ones in this process
+    database = sys.modules.get('app.core.database')
+    if database is not None:
+        database.engine.dispose(close=False)
+    
+    if ml_service.is_loaded() or not model_source:
+        return
+    
+    if Path(model_source).is_dir():
+        ml_service.registry.load(arrays_path=model_source, activate=True)
+    else:
+        ml_service.registry.load(model_path=model_source, activate=True)
+
+
+def _timed(fn: Callable, *args) -> Tuple[Any, float, float, List[Tuple]]:
+    """
+    Run fn in the worker and report when it started and finished (wall clock),
+    with the metrics recorded since the last task if the worker is a separate process
+    """
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time(), metrics.drain()
+
+
+def _compute_features(home_team: str, away_team: str, league: str, match_date: datetime,
+                      over_25_odds: float, under_25_odds: float):
+    """Engineer features on a session owned by the worker"""
+    from app.core.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        return feature_service.engineer_features_for_match(
+            db, home_team, away_team, league, match_date,
+            over_25_odds=over_25_odds,
+            under_25_odds=under_25_odds
+        )
+    finally:
+        db.close()
+
+
+def _predict_many(features_list: List) -> List[Tuple[float, float, float]]:
+    """Run the model in the worker"""
+    return ml_service.predict_many(features_list)
+
+
+class InferenceExecutor:
+    """
+    Pool for CPU-bound work called from async endpoints.
+    
+    Modes (settings.INFERENCE_EXECUTOR):
+        inline  - run on the event loop (previous behaviour)
+        thread  - ThreadPoolExecutor; numpy/sklearn release the GIL for most of predict_proba
+        process - ProcessPoolExecutor; workers hold their own (forked or loaded) model
+    """
+    
+    def __init__(self, mode: str = 'inline', workers: int = 4):
+        self.mode = mode
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self._wait_ms = metrics.histogram('executor_wait_ms', mode=mode)
+        self._exec_ms = metrics.histogram('executor_exec_ms', mode=mode)
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether work is moved off the event loop"""
+        return self.mode in ('thread', 'process')
+    
+    def start(self) -> None:
+        """Create the pool (after the model is loaded, so forked workers inherit it)"""
+        if not self.enabled or self._executor is not None:
+            return
+        
+        if self.mode == 'process':
+            active = ml_service.registry.active
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(active.source if active else None,)
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+    
+    def shutdown(self) -> None:
+        """Stop the pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def reload(self) -> None:
+        """
+        Recreate a process pool so its workers serve the currently active model.
+        Thread pools share the registry and need nothing.
+        """
+        if self.mode != 'process' or self._executor is None:
+            return
+        
+        old = self._executor
+        self._executor = None
+        self.start()
+        old.shutdown(wait=False)
+    
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in the pool, recording queue wait and execution time.
+        Until start() runs (at the end of startup loading), work goes to the
+        event loop's default thread pool rather than forking workers early.
+        """
+        with self._lock:
+            self.submitted += 1
+        
+        submitted_at = time.time()
+        try:
+            result, started, finished, events = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _timed, fn, *args
+            )
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.completed += 1
+        
+        metrics.replay(events)
+        self._wait_ms.observe((started - submitted_at) * 1000)
+        self._exec_ms.observe((finished - started) * 1000)
+        return result
+    
+    async def compute_features(self, home_team: str, away_team: str, league: str, match_date: datetime,
+                               over_25_odds: float = None, under_25_odds: float = None):
+        """FeatureService.engineer_features_for_match on a worker-owned session"""
+        return await self.run(
+            _compute_features, home_team, away_team, league, match_date, over_25_odds, under_25_odds
+        )
+    
+    async def predict_many(self, features_list: List) -> List[Tuple[float, float, float]]:
+        """MLModelService.predict_many in the pool"""
+        return await self.run(_predict_many, features_list)
+    
+    def get_stats(self) -> Dict:
+        """Get queue depth and wait / execution percentiles"""
+        in_flight = self.submitted - self.completed
+        
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "in_flight": in_flight,
+            "queue_depth": max(in_flight - self.workers, 0),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "wait_ms": self._wait_ms.percentiles(),
+            "exec_ms": self._exec_ms.percentiles()
+        }
+
+
+# Global inference executor instance
+inference_executor = InferenceExecutor(
+    mode=settings.INFERENCE_EXECUTOR,
+    workers=settings.INFERENCE_EXECUTOR_WORKERS
+)
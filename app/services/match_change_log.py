@@ -0,0 +1,124 @@
+"""
+Match Change Log
+Reads matches_historical_changes, the trigger-written log of inserted, updated and deleted
+matches (migration 2), so feature stores and caches follow new results without rescanning
+matches_historical
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func, inspect
+from sqlalchemy.orm import Session
+from app.models.match import HistoricalMatch, MatchChange
+
+# Log ids are taken when a row is written but become visible at commit, so a lower id can
+# appear after a higher one. A missing id is waited for this long before it is treated as
+# a rolled-back transaction.
+GAP_TIMEOUT_SECONDS = 600
+
+# Entries older than this are deleted; every reader is at most a refresh interval behind
+RETENTION_DAYS = 7
+
+
+class ChangeCursor:
+    """
+    One reader's position in the change log.
+    Every id up to `position` has been read; ids above it that were read are remembered
+    until the ids below them commit or time out.
+    """
+    
+    def __init__(self, position: int):
+        self.position = position
+        self._read = set()
+        self._gaps: Dict[int, float] = {}  # missing id -> when it was first seen missing
+    
+    def read(self, db: Session) -> List[MatchChange]:
+        """Entries that became visible since the last read, oldest first"""
+        rows = db.query(MatchChange).filter(
+            MatchChange.id > self.position
+        ).order_by(MatchChange.id).all()
+        
+        new = [row for row in rows if row.id not in self._read]
+        self._read.update(row.id for row in new)
+        self._advance()
+        
+        return new
+    
+    def _advance(self) -> None:
+        """Move the position over read ids and over gaps that timed out"""
+        now = time.monotonic()
+        highest = max(self._read, default=self.position)
+        
+        for missing in range(self.position + 1, highest):
+            if missing not in self._read:
+                self._gaps.setdefault(missing, now)
+        
+        while self._read:
+            following = self.position + 1
+            if following in self._read:
+                self._read.discard(following)
+                self._gaps.pop(following, None)
+            elif now - self._gaps[following] >= GAP_TIMEOUT_SECONDS:
+                del self._gaps[following]
+            else:
+                break
+            self.position = following
+
+
+class MatchChangeLog:
+    """Service for reading the matches_historical change log"""
+    
+    def __init__(self):
+        self._available = False
+        self._poll_cursor = None
+        self._watermark = None  # (row count, highest id) of matches_historical, without the log
+    
+    def is_available(self, db: Session) -> bool:
+        """Whether the change log exists (migration 2 applied)"""
+        if not self._available:
+            self._available = inspect(db.get_bind()).has_table(MatchChange.__tablename__)
+        return self._available
+    
+    def latest_id(self, db: Session) -> int:
+        """Highest id in the log, 0 if it is empty"""
+        return db.query(func.max(MatchChange.id)).scalar() or 0
+    
+    def cursor(self, db: Session, position: Optional[int] = None) -> ChangeCursor:
+        """A cursor that reads entries after `position` (default: the current end of the log)"""
+        return ChangeCursor(self.latest_id(db) if position is None else position)
+    
+    def poll(self, db: Session) -> int:
+        """
+        Number of matches_historical changes since the previous poll (0 on the first).
+        
+        Without the change log (migration 2 not applied) the row count and highest
+        id are compared instead, which sees new and deleted rows but not corrections.
+        """
+        if self.is_available(db):
+            if self._poll_cursor is None:
+                self._poll_cursor = self.cursor(db)
+                return 0
+            return len(self._poll_cursor.read(db))
+        
+        watermark = tuple(db.query(func.count(HistoricalMatch.id), func.max(HistoricalMatch.id)).one())
+        changed = self._watermark is not None and watermark != self._watermark
+        self._watermark = watermark
+        return int(changed)
+    
+    def prune(self, db: Session, days: int = RETENTION_DAYS) -> int:
+        """
+        Delete entries older than `days`.
+        
+        Returns:
+            Number of entries deleted
+        """
+        deleted = db.query(MatchChange).filter(
+            MatchChange.changed_at < datetime.utcnow() - timedelta(days=days)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+
+# Global match change log instance
+match_change_log = MatchChangeLog()
@@ -3,80 +3,160 @@ ML Model Service
 Loads and manages the trained ML model for predictions
 """
 
-import joblib
+import time
 import numpy as np
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from app.core.config import settings
+from app.core.metrics import metrics, BATCH_SIZE_BUCKETS
+from app.services.model_registry import model_registry
+
+
+metrics.describe('inference_batch_size', "Rows per model call (predict_many) and per micro-batch")
 
 
 class MLModelService:
     """Service for loading and using the trained ML model"""
     
     def __init__(self):
-        self.model = None
-        self.model_data = None
-        self.feature_names = None
-        self.model_version = None
+        self.registry = model_registry
         self.last_prediction_at = None
-        
+    
+    @property
+    def model(self):
+        """Active model object"""
+        return self.registry.active.model if self.registry.active else None
+    
+    @property
+    def predictor(self):
+        """Object whose predict_proba serves requests for the active version"""
+        return self.registry.active.predictor if self.registry.active else None
+    
+    @property
+    def feature_names(self):
+        """Feature order of the active model"""
+        return self.registry.active.feature_names if self.registry.active else None
+    
+    @property
+    def model_version(self):
+        """Active model version"""
+        return self.registry.active.version if self.registry.active else None
+    
+    @property
+    def inference_backend(self) -> str:
+        """Inference backend actually in use"""
+        return self.registry.active.inference_backend if self.registry.active else settings.INFERENCE_BACKEND
+    
     def load_model(self) -> bool:
-        """Load the trained model from disk"""
+        """Load the configured model from disk and make it the active version"""
         try:
-            model_path = Path(settings.MODEL_PATH)
-            
-            if not model_path.exists():
-                print(f"Model file not found: {model_path}")
-                return False
-            
-            # Load model data (contains model + metadata)
-            self.model_data = joblib.load(model_path)
-            
-            # Extract components
-            self.model = self.model_data['model']
-            self.feature_names = self.model_data['feature_names']
-            self.model_version = self.model_data['version']
+            # Pre-converted arrays are memory-mapped instead of unpickled
+            if settings.MODEL_ARRAYS_PATH and Path(settings.MODEL_ARRAYS_PATH).exists():
+                loaded = self.registry.load(arrays_path=settings.MODEL_ARRAYS_PATH, activate=True)
+            else:
+                loaded = self.registry.load(model_path=settings.MODEL_PATH, activate=True)
             
             print(f"✅ Model loaded successfully!")
-            print(f"   Version: {self.model_version}")
-            print(f"   Features: {len(self.feature_names)}")
+            print(f"   Version: {loaded.version}")
+            print(f"   Features: {len(loaded.feature_names)}")
+            print(f"   Inference: {loaded.inference_backend} ({loaded.source})")
             
             return True
-            
+        
+        except FileNotFoundError as e:
+            print(str(e))
+            return False
         except Exception as e:
             print(f"❌ Error loading model: {e}")
             return False
     
-    def predict(self, features: Dict[str, float]) -> Tuple[float, float, float]:
+    def load_variants(self) -> int:
+        """
+        Load the variants in settings.MODEL_VARIANTS ("route=path,...") and
+        route those endpoints to them.
+        
+        Returns:
+            Number of routes set
+        """
+        routed = 0
+        for entry in filter(None, (e.strip() for e in settings.MODEL_VARIANTS.split(','))):
+            route, _, path = entry.partition('=')
+            route, path = route.strip(), path.strip()
+            try:
+                if Path(path).is_dir():
+                    loaded = self.registry.load(arrays_path=path)
+                else:
+                    loaded = self.registry.load(model_path=path)
+                self.registry.set_route(route, loaded.version)
+                routed += 1
+                print(f"✅ Route '{route}' served by {loaded.version} ({loaded.inference_backend}, {path})")
+            except Exception as e:
+                print(f"⚠️  Could not load variant for route '{route}' from {path}: {e}")
+        return routed
+    
+    def model_version_for(self, route: Optional[str] = None) -> Optional[str]:
+        """Version serving a route (the active version unless a variant is routed to it)"""
+        model_version = self.registry.resolve(route)
+        return model_version.version if model_version else None
+    
+    def predict(self, features: Dict[str, float], route: Optional[str] = None) -> Tuple[float, float, float]:
         """
         Make a prediction given features.
         
         Args:
-            features: Dictionary of feature names to values
+            features: FeatureVector (or dictionary of feature names to values)
+            route: Endpoint route, to use the variant assigned to it
         
         Returns:
             Tuple of (over_25_prob, under_25_prob, confidence_score)
         """
-        if self.model is None:
+        return self.predict_many([features], route=route)[0]
+    
+    def predict_many(self, features_list: List[Dict[str, float]],
+                     route: Optional[str] = None) -> List[Tuple[float, float, float]]:
+        """
+        Make predictions for many feature vectors with a single predict_proba call.
+        
+        Args:
+            features_list: FeatureVectors (or feature dictionaries), one per match
+            route: Endpoint route, to use the variant assigned to it
+        
+        Returns:
+            List of (over_25_prob, under_25_prob, confidence_score) aligned with the input
+        """
+        # Read once, so a concurrent swap cannot mix versions within a batch
+        active = self.registry.resolve(route)
+        if active is None:
             raise RuntimeError("Model not loaded. Call load_model() first.")
         
-        # Convert features dict to numpy array in correct order
-        feature_vector = np.array([features.get(name, 0.0) for name in self.feature_names]).reshape(1, -1)
+        if not features_list:
+            return []
+        
+        # Model-ordered input matrix (a view for a single FeatureVector)
+        feature_matrix = active.feature_matrix(features_list)
         
         # Get probabilities
-        probabilities = self.model.predict_proba(feature_vector)[0]
+        probabilities = active.predict_proba(feature_matrix)
+        metrics.histogram('inference_batch_size', BATCH_SIZE_BUCKETS, source='predict_many').observe(len(features_list))
         
-        under_25_prob = float(probabilities[0])
-        over_25_prob = float(probabilities[1])
+        # Candidate model scores a sample in the background (compared with the active model only)
+        if active is self.registry.active:
+            self.registry.maybe_shadow(features_list, probabilities)
+        
+        under_25_probs = probabilities[:, 0]
+        over_25_probs = probabilities[:, 1]
         
         # Calculate confidence (how far from 50/50)
-        confidence = abs(over_25_prob - 0.5) * 2
+        confidences = np.abs(over_25_probs - 0.5) * 2
         
         # Update last prediction time
         self.last_prediction_at = datetime.utcnow()
         
-        return over_25_prob, under_25_prob, confidence
+        return [
+            (float(over), float(under), float(confidence))
+            for over, under, confidence in zip(over_25_probs, under_25_probs, confidences)
+        ]
     
     def get_confidence_level(self, confidence_score: float) -> str:
         """Convert confidence score to readable level"""
@@ -93,14 +173,58 @@ class MLModelService:
         """Check if model is loaded"""
         return self.model is not None
     
+    def warmup(self, rounds: int = 20) -> Dict:
+        """
+        Run dummy single-row and batch predictions on the active model, so the
+        first real request doesn't pay for cold caches or untouched mmap pages.
+        Bypasses latency metrics and shadow scoring.
+        
+        Returns:
+            First and last single-row latencies in ms
+        """
+        active = self.registry.active
+        if active is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        
+        rng = np.random.default_rng(0)
+        timings = []
+        for _ in range(rounds):
+            vectors = [active.schema.new_vector() for _ in range(64)]
+            for vector in vectors:
+                vector.values[:] = rng.random(len(vector.values)) * 4
+            
+            start = time.perf_counter()
+            active.predictor.predict_proba(active.feature_matrix(vectors[:1]))
+            timings.append((time.perf_counter() - start) * 1000)
+            active.predictor.predict_proba(active.feature_matrix(vectors))
+        
+        return {
+            "rounds": rounds,
+            "first_ms": round(timings[0], 3) if timings else None,
+            "last_ms": round(timings[-1], 3) if timings else None
+        }
+    
     def get_info(self) -> Dict:
         """Get model information"""
         return {
             "model_loaded": self.is_loaded(),
             "model_version": self.model_version or "unknown",
-            "model_path": settings.MODEL_PATH,
+            "model_path": self.registry.active.source if self.registry.active else settings.MODEL_PATH,
             "features_count": len(self.feature_names) if self.feature_names else 0,
-            "last_prediction_at": self.last_prediction_at
+            "inference_backend": self.inference_backend,
+            "last_prediction_at": self.last_prediction_at,
+            "latency_ms": {
+                "feature_engineering": metrics.get_histogram_summary('feature_engineering_ms'),
+                "predict_proba": metrics.get_histogram_summary('predict_proba_ms', version=self.model_version),
+                "end_to_end": metrics.get_histogram_summary('prediction_end_to_end_ms')
+            },
+            "batch_sizes": {
+                source: metrics.histogram('inference_batch_size', BATCH_SIZE_BUCKETS, source=source).distribution()
+                for source in ('predict_many', 'micro_batch')
+            },
+            "versions": self.registry.get_versions(),
+            "routes": self.registry.get_routes(),
+            "shadow": self.registry.get_shadow_info()
         }
 
 
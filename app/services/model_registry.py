@@ -0,0 +1,318 @@
+"""
+Model Registry
+Keeps several model versions resident, swaps the active one atomically and
+shadow-scores a candidate off the request path
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.compiled_forest import CompiledForest
+from app.services.feature_vector import FeatureVector, get_schema, set_active_schema, stack_rows
+
+# Shadow batches allowed to wait before new ones are dropped
+SHADOW_MAX_PENDING = 100
+
+
+metrics.describe('predict_proba_ms', "Model predict_proba call latency per version (ms)")
+metrics.describe('predictions_total', "Rows scored per model version")
+
+
+class ModelVersion:
+    """One loaded model with its per-version load time and latency"""
+    
+    def __init__(self, version: str, source: str, model, predictor, feature_names: List[str],
+                 load_seconds: float):
+        self.version = version
+        self.source = source
+        self.model = model
+        self.predictor = predictor
+        self.feature_names = list(feature_names)
+        self.schema = get_schema(self.feature_names)
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.utcnow()
+        self._latency = metrics.histogram('predict_proba_ms', version=version)
+    
+    @property
+    def inference_backend(self) -> str:
+        """Inference backend used by this version"""
+        return 'compiled' if isinstance(self.predictor, CompiledForest) else 'sklearn'
+    
+    def feature_matrix(self, features_list: List) -> np.ndarray:
+        """
+        Model input for FeatureVectors (or plain dicts) in this version's column order.
+        A single vector built in this version's layout is passed as a view, without copying.
+        """
+        if len(features_list) == 1 and isinstance(features_list[0], FeatureVector):
+            return features_list[0].model_row(self.schema).reshape(1, -1)
+        return stack_rows(features_list, self.schema)
+    
+    def predict_proba(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """Class probabilities, recording call latency"""
+        start = time.perf_counter()
+        probabilities = self.predictor.predict_proba(feature_matrix)
+        self._latency.observe((time.perf_counter() - start) * 1000)
+        metrics.inc('predictions_total', len(feature_matrix), version=self.version)
+        return probabilities
+    
+    def get_info(self) -> Dict:
+        """Get version metadata and latency percentiles"""
+        latency = self._latency.percentiles()
+        return {
+            "version": self.version,
+            "source": self.source,
+            "inference_backend": self.inference_backend,
+            "features_count": len(self.feature_names),
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 3),
+            "predictions": int(metrics.get_counter('predictions_total', version=self.version)),
+            "latency_p50_ms": latency["p50"],
+            "latency_p95_ms": latency["p95"],
+            "latency_p99_ms": latency["p99"]
+        }
+
+
+def load_model_version(model_path: Optional[str] = None, arrays_path: Optional[str] = None) -> ModelVersion:
+    """
+    Load a model from a joblib pickle or from arrays written by scripts/convert_model.py.
+    
+    Raises:
+        FileNotFoundError: If the path does not exist
+    """
+    start = time.perf_counter()
+    mmap_mode = settings.MODEL_MMAP_MODE or None
+    
+    # Pre-converted arrays: memory-mapped, no unpickling
+    if arrays_path:
+        if not Path(arrays_path).exists():
+            raise FileNotFoundError(f"Model arrays not found: {arrays_path}")
+        
+        forest = CompiledForest.load(arrays_path, mmap_mode=mmap_mode)
+        return ModelVersion(
+            version=forest.metadata['version'],
+            source=str(arrays_path),
+            model=forest,
+            predictor=forest,
+            feature_names=forest.metadata['feature_names'],
+            load_seconds=time.perf_counter() - start
+        )
+    
+    if not Path(model_path).exists():
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    
+    # Load model data (contains model + metadata)
+    model_data = joblib.load(model_path, mmap_mode=mmap_mode)
+    model = model_data['model']
+    
+    predictor = model
+    if settings.INFERENCE_BACKEND == 'compiled':
+        try:
+            predictor = CompiledForest(model)
+        except ValueError as e:
+            print(f"⚠️  {e}; using scikit-learn inference")
+    
+    return ModelVersion(
+        version=model_data['version'],
+        source=str(model_path),
+        model=model,
+        predictor=predictor,
+        feature_names=model_data['feature_names'],
+        load_seconds=time.perf_counter() - start
+    )
+
+
+class ModelRegistry:
+    """
+    Resident model versions.
+    
+    `active` is a single reference, so swapping it is atomic: a request that
+    already read it finishes on the old version, the next one uses the new.
+    """
+    
+    def __init__(self):
+        self._versions: Dict[str, ModelVersion] = {}
+        self._lock = threading.Lock()
+        self.active: Optional[ModelVersion] = None
+        self.shadow: Optional[ModelVersion] = None
+        self.shadow_fraction = 0.0
+        # Endpoint route -> version serving it instead of the active one (e.g. a fast variant)
+        self._routes: Dict[str, str] = {}
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._shadow_pending = 0
+        self._shadow_stats = {"scored": 0, "dropped": 0, "errors": 0, "agreements": 0, "abs_diff_sum": 0.0}
+    
+    def register(self, model_version: ModelVersion, activate: bool = False) -> ModelVersion:
+        """
+        Add a loaded version, optionally making it active.
+        
+        A version already resident is only replaced with activate=True, so a
+        retrained model that kept its version string can't go live unnoticed.
+        
+        Raises:
+            ValueError: If the version is already loaded and activate is False
+        """
+        with self._lock:
+            if model_version.version in self._versions and not activate:
+                raise ValueError(
+                    f"Model version already loaded: {model_version.version} "
+                    f"(unload it first, or load with activate=true to replace it)"
+                )
+            self._versions[model_version.version] = model_version
+            if activate or self.active is None:
+                self.active = model_version
+                set_active_schema(model_version.schema)
+                if self.shadow is not None and self.shadow.version == model_version.version:
+                    self.shadow = None
+        return model_version
+    
+    def load(self, model_path: Optional[str] = None, arrays_path: Optional[str] = None,
+             activate: bool = False) -> ModelVersion:
+        """Load a version from disk and register it (blocking; run in a thread from async code)"""
+        return self.register(load_model_version(model_path, arrays_path), activate=activate)
+    
+    def activate(self, version: str) -> ModelVersion:
+        """Make a resident version serve traffic"""
+        with self._lock:
+            if version not in self._versions:
+                raise KeyError(f"Model version not loaded: {version}")
+            self.active = self._versions[version]
+            set_active_schema(self.active.schema)
+            if self.shadow is self.active:
+                self.shadow = None
+            return self.active
+    
+    def unload(self, version: str) -> None:
+        """Drop a resident version (not the active one)"""
+        with self._lock:
+            if version not in self._versions:
+                raise KeyError(f"Model version not loaded: {version}")
+            if self.active is not None and self.active.version == version:
+                raise ValueError("Cannot unload the active model version")
+            if self.shadow is not None and self.shadow.version == version:
+                self.shadow = None
+            # Routes to it fall back to the active version
+            self._routes = {route: v for route, v in self._routes.items() if v != version}
+            del self._versions[version]
+    
+    def set_route(self, route: str, version: Optional[str]) -> None:
+        """Serve an endpoint route from a resident version; None routes it back to the active one"""
+        with self._lock:
+            if version is None:
+                self._routes.pop(route, None)
+                return
+            if version not in self._versions:
+                raise KeyError(f"Model version not loaded: {version}")
+            self._routes[route] = version
+    
+    def resolve(self, route: Optional[str] = None) -> Optional[ModelVersion]:
+        """Version serving a route: its assigned variant if resident, otherwise the active one"""
+        version = self._routes.get(route) if route else None
+        if version is not None:
+            model_version = self._versions.get(version)
+            if model_version is not None:
+                return model_version
+        return self.active
+    
+    def get_routes(self) -> Dict[str, str]:
+        """Endpoint routes served by a version other than the active one"""
+        return dict(self._routes)
+    
+    def set_shadow(self, version: Optional[str], fraction: float = 0.0) -> None:
+        """Shadow-score `fraction` of prediction batches on a candidate; None disables"""
+        with self._lock:
+            if version is None:
+                self.shadow = None
+                self.shadow_fraction = 0.0
+                return
+            if version not in self._versions:
+                raise KeyError(f"Model version not loaded: {version}")
+            self.shadow = self._versions[version]
+            self.shadow_fraction = min(max(fraction, 0.0), 1.0)
+            self._shadow_stats = {"scored": 0, "dropped": 0, "errors": 0, "agreements": 0, "abs_diff_sum": 0.0}
+    
+    def maybe_shadow(self, features_list: List[Dict[str, float]], active_probabilities: np.ndarray) -> None:
+        """
+        Queue a sampled batch for the shadow model on a background thread.
+        Returns immediately; batches are dropped rather than queued without bound.
+        """
+        shadow = self.shadow
+        if shadow is None or random.random() >= self.shadow_fraction:
+            return
+        
+        with self._lock:
+            if self._shadow_pending >= SHADOW_MAX_PENDING:
+                self._shadow_stats["dropped"] += 1
+                return
+            self._shadow_pending += 1
+        
+        self._shadow_executor.submit(self._score_shadow, shadow, features_list, active_probabilities)
+    
+    def _score_shadow(self, shadow: ModelVersion, features_list: List[Dict[str, float]],
+                      active_probabilities: np.ndarray) -> None:
+        """Score a batch on the shadow model and compare with the active model"""
+        try:
+            shadow_probabilities = shadow.predict_proba(shadow.feature_matrix(features_list))
+            over_diff = np.abs(shadow_probabilities[:, 1] - active_probabilities[:, 1])
+            agreements = (shadow_probabilities[:, 1] > 0.5) == (active_probabilities[:, 1] > 0.5)
+            
+            with self._lock:
+                # Results for a replaced shadow don't count towards the new one
+                if shadow is self.shadow:
+                    self._shadow_stats["scored"] += len(features_list)
+                    self._shadow_stats["agreements"] += int(agreements.sum())
+                    self._shadow_stats["abs_diff_sum"] += float(over_diff.sum())
+        except Exception as e:
+            with self._lock:
+                self._shadow_stats["errors"] += 1
+            print(f"Shadow scoring failed for {shadow.version}: {e}")
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+    
+    def get_versions(self) -> List[Dict]:
+        """Info for every resident version"""
+        active = self.active
+        shadow = self.shadow
+        routes = self.get_routes()
+        return [
+            {
+                **model_version.get_info(),
+                "active": model_version is active,
+                "shadow": model_version is shadow,
+                "routes": [route for route, version in routes.items() if version == model_version.version]
+            }
+            for model_version in list(self._versions.values())
+        ]
+    
+    def get_shadow_info(self) -> Optional[Dict]:
+        """Shadow version and how it compares with the active model"""
+        shadow = self.shadow
+        if shadow is None:
+            return None
+        
+        with self._lock:
+            stats = dict(self._shadow_stats)
+        scored = stats["scored"]
+        return {
+            "version": shadow.version,
+            "fraction": self.shadow_fraction,
+            "scored": scored,
+            "dropped": stats["dropped"],
+            "errors": stats["errors"],
+            "pending": self._shadow_pending,
+            "agreement_rate": stats["agreements"] / scored if scored else None,
+            "mean_abs_diff_over_prob": stats["abs_diff_sum"] / scored if scored else None
+        }
+
+
+# Global model registry instance
+model_registry = ModelRegistry()
@@ -0,0 +1,208 @@
+"""
+Odds API Gateway
+Single entry point for The Odds API: raw responses cached per URL and params,
+with concurrent identical requests sharing one call
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.cache import SingleFlight, TTLCache
+from app.core.config import settings
+from app.core.http import http_pool
+
+# Sport keys from The Odds API -> league names
+LEAGUES = {
+    'soccer_epl': 'Premier League',
+    'soccer_spain_la_liga': 'La Liga',
+    'soccer_italy_serie_a': 'Serie A',
+    'soccer_germany_bundesliga': 'Bundesliga',
+    'soccer_france_ligue_one': 'Ligue 1',
+    'soccer_uefa_champs_league': 'Champions League'
+}
+
+# Query for a league's events with Over/Under odds (fixtures and odds both come from it)
+LEAGUE_ODDS_PARAMS = {
+    'regions': 'uk',
+    'markets': 'totals',  # Over/Under markets
+    'oddsFormat': 'decimal'
+}
+
+
+class UpstreamResponse:
+    """
+    One parsed Odds API response. Views derived from the payload (fixtures,
+    odds by team) are built once per response and shared by every caller.
+    """
+    
+    def __init__(self, path: str, params: Dict, payload: Any):
+        self.path = path
+        self.params = params
+        self.payload = payload
+        self.fetched_at = datetime.utcnow()
+        self._fetched_monotonic = time.monotonic()
+        self._views: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def age_seconds(self) -> float:
+        """Seconds since the response was received"""
+        return time.monotonic() - self._fetched_monotonic
+    
+    def view(self, name: str, build: Callable[[Any], Any]) -> Any:
+        """The named view of the payload, built with build(payload) on first use"""
+        with self._lock:
+            if name not in self._views:
+                self._views[name] = build(self.payload)
+            return self._views[name]
+
+
+class OddsApiQuota:
+    """
+    Request quota as reported by the x-requests-* headers of every Odds API
+    response, with the observed burn rate over a rolling window.
+    """
+    
+    WINDOW_SECONDS = 24 * 3600
+    MIN_SPAN_SECONDS = 600  # shorter spans give meaningless hourly rates
+    
+    def __init__(self):
+        self.remaining: Optional[int] = None
+        self.used: Optional[int] = None
+        self.last_cost: int = 1
+        self.updated_at: Optional[datetime] = None
+        self._samples: deque = deque()  # (monotonic time, used)
+        self._lock = threading.Lock()
+    
+    def update(self, headers) -> None:
+        """Record the quota headers of a response (missing headers are ignored)"""
+        remaining, used, last = (
+            headers.get(name) for name in ('x-requests-remaining', 'x-requests-used', 'x-requests-last')
+        )
+        if remaining is None or used is None:
+            return
+        
+        now = time.monotonic()
+        with self._lock:
+            self.remaining = int(float(remaining))
+            self.used = int(float(used))
+            if last is not None:
+                self.last_cost = int(float(last))
+            self.updated_at = datetime.utcnow()
+            
+            # A drop in usage means the billing period reset
+            if self._samples and self.used < self._samples[-1][1]:
+                self._samples.clear()
+            self._samples.append((now, self.used))
+            while self._samples and now - self._samples[0][0] > self.WINDOW_SECONDS:
+                self._samples.popleft()
+    
+    def burn_per_hour(self) -> Optional[float]:
+        """Requests used per hour over the window, or None until it spans MIN_SPAN_SECONDS"""
+        with self._lock:
+            if len(self._samples) < 2:
+                return None
+            (first_at, first_used), (last_at, last_used) = self._samples[0], self._samples[-1]
+        if last_at - first_at < self.MIN_SPAN_SECONDS:
+            return None
+        return (last_used - first_used) / (last_at - first_at) * 3600
+    
+    def get_info(self) -> Dict:
+        """Latest quota headers and observed burn rate"""
+        burn = self.burn_per_hour()
+        return {
+            "remaining": self.remaining,
+            "used": self.used,
+            "last_cost": self.last_cost,
+            "updated_at": self.updated_at,
+            "observed_per_hour": round(burn, 3) if burn is not None else None
+        }
+
+
+class OddsApiGateway:
+    """Cached, single-flight GETs against The Odds API"""
+    
+    def __init__(self):
+        self.base_url = settings.ODDS_API_BASE_URL
+        self.api_key = settings.ODDS_API_KEY
+        self._responses = TTLCache(
+            max_entries=settings.ODDS_API_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ODDS_API_CACHE_TTL
+        )
+        self._flights = SingleFlight()
+        self.quota = OddsApiQuota()
+        self.stats = {"requests": 0, "errors": 0}
+    
+    @staticmethod
+    def _key(path: str, params: Dict) -> Tuple:
+        """Cache key: path plus sorted params (the API key is added per request, not part of it)"""
+        return (path, tuple(sorted(params.items())))
+    
+    def _request(self, path: str, params: Dict) -> UpstreamResponse:
+        """One upstream request (raises on failure)"""
+        self.stats["requests"] += 1
+        try:
+            response = http_pool.get(
+                f"{self.base_url}{path}",
+                params={'apiKey': self.api_key, **params}
+            )
+            # Error responses (e.g. 429 once the quota is spent) carry the headers too
+            self.quota.update(response.headers)
+            response.raise_for_status()
+            return UpstreamResponse(path, params, response.json())
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+    
+    def get(self, path: str, params: Optional[Dict] = None) -> UpstreamResponse:
+        """
+        GET a path, served from cache while younger than ODDS_API_CACHE_TTL.
+        
+        Args:
+            path: Path under ODDS_API_BASE_URL, e.g. /sports/soccer_epl/odds
+            params: Query parameters, without apiKey
+        
+        Returns:
+            The shared parsed response (raises if the request fails; failures are not cached)
+        """
+        params = dict(params or {})
+        key = self._key(path, params)
+        
+        cached = self._responses.get(key)
+        if cached is not None:
+            return cached
+        
+        def fetch():
+            # A caller that lost the race to an identical request finds its result here
+            response = self._responses.get(key)
+            if response is None:
+                response = self._request(path, params)
+                self._responses.set(key, response)
+            return response
+        
+        return self._flights.do(key, fetch)
+    
+    def league_odds(self, sport_key: str) -> UpstreamResponse:
+        """A league's upcoming events with Over/Under odds"""
+        return self.get(f"/sports/{sport_key}/odds", LEAGUE_ODDS_PARAMS)
+    
+    def invalidate(self, path: Optional[str] = None) -> int:
+        """Drop cached responses for one path, or all of them"""
+        if path is None:
+            return self._responses.invalidate()
+        return self._responses.invalidate(lambda key: key[0] == path)
+    
+    def get_stats(self) -> Dict:
+        """Upstream request counts, quota, response cache and single-flight counters"""
+        return {
+            **self.stats,
+            "quota": self.quota.get_info(),
+            "cache": self._responses.get_stats(),
+            "single_flight": self._flights.get_stats()
+        }
+
+
+# Global Odds API gateway instance
+odds_api = OddsApiGateway()
@@ -0,0 +1,353 @@
+"""
+Odds Polling Scheduler
+Refreshes league odds ahead of requests on per-league intervals planned
+to fit The Odds API's monthly request quota
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.odds_api import LEAGUES, odds_api
+from app.services.odds_service import OddsSnapshot, odds_service
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process election, every process polls
+    fcntl = None
+
+
+def parse_poll_tiers(spec: str) -> List[Tuple[float, float]]:
+    """(hours to kickoff, poll interval seconds) pairs from "3:900,24:3600,...", nearest kickoff first"""
+    tiers = []
+    for entry in filter(None, (e.strip() for e in spec.split(','))):
+        hours, _, seconds = entry.partition(':')
+        tiers.append((float(hours), float(seconds)))
+    return sorted(tiers)
+
+
+def next_quota_reset(now: datetime) -> datetime:
+    """Start of the next billing period (ODDS_API_QUOTA_RESET_DAY, midnight UTC)"""
+    day = min(max(settings.ODDS_API_QUOTA_RESET_DAY, 1), 28)
+    reset = now.replace(day=day, hour=0, minute=0, second=0, microsecond=0)
+    if reset <= now:
+        reset = reset.replace(year=reset.year + (reset.month == 12), month=reset.month % 12 + 1)
+    return reset
+
+
+class OddsPollingScheduler:
+    """
+    Polls each league more often as its next kickoff approaches and rarely
+    when it is days away. Target intervals come from ODDS_POLL_TIERS; when
+    they would spend more than the quota left for this billing period
+    (from the x-requests-* headers, minus ODDS_API_QUOTA_RESERVE), every
+    league's interval is stretched by the same factor.
+    
+    Between polls, on-demand odds lookups are served from the league's
+    snapshot instead of spending requests of their own.
+    
+    Of the app processes sharing ODDS_SCHEDULER_STATE_DIR (e.g. gunicorn
+    workers), only the one holding its lock file polls. It writes each
+    league's payload there; the others load those snapshots instead of
+    polling, and a restarted poller takes its last-poll times from them.
+    """
+    
+    def __init__(self):
+        self.tiers = parse_poll_tiers(settings.ODDS_POLL_TIERS)
+        self.state_dir = Path(settings.ODDS_SCHEDULER_STATE_DIR)
+        self._last_polled: Dict[str, float] = {}  # sport key -> wall-clock time of the payload
+        self._intervals: Dict[str, float] = {}  # sport key -> planned interval
+        self._loaded_mtimes: Dict[str, float] = {}  # state file name -> mtime last read or written
+        self._published_plan: Optional[Dict] = None
+        self._lock_file = None
+        self._task: Optional[asyncio.Task] = None
+        self.role: Optional[str] = None  # "poller" or "follower" once running
+        self.stats = {"polls": 0, "poll_errors": 0, "snapshots_loaded": 0}
+    
+    def target_interval(self, hours_to_kickoff: Optional[float]) -> float:
+        """Poll interval for a league before any quota stretch"""
+        if hours_to_kickoff is not None:
+            for hours, seconds in self.tiers:
+                if hours_to_kickoff <= hours:
+                    return max(seconds, settings.ODDS_POLL_MIN_INTERVAL)
+        return settings.ODDS_POLL_MAX_INTERVAL
+    
+    def _next_kickoff(self, sport_key: str, now: datetime) -> Optional[datetime]:
+        """Earliest kickoff still ahead in the league's current snapshot"""
+        snapshot = odds_service.peek_snapshot(sport_key)
+        if snapshot is None:
+            return None
+        
+        kickoffs = []
+        for fixture in snapshot.fixtures:
+            try:
+                kickoff = datetime.fromisoformat(fixture['commence_time'].replace('Z', '+00:00'))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if kickoff.tzinfo is not None:
+                kickoff = kickoff.astimezone(timezone.utc).replace(tzinfo=None)
+            if kickoff > now:
+                kickoffs.append(kickoff)
+        return min(kickoffs) if kickoffs else None
+    
+    def plan(self) -> Dict:
+        """
+        Per-league intervals that fit the remaining quota, and the burn rate they imply.
+        
+        Returns:
+            Dictionary with the quota figures, stretch factor and a plan entry per league
+        """
+        now = datetime.utcnow()
+        reset_at = next_quota_reset(now)
+        seconds_left = max((reset_at - now).total_seconds(), 1.0)
+        
+        quota = odds_api.quota
+        remaining = quota.remaining if quota.remaining is not None else settings.ODDS_API_MONTHLY_QUOTA
+        reserve = settings.ODDS_API_MONTHLY_QUOTA * settings.ODDS_API_QUOTA_RESERVE
+        available = max(remaining - reserve, 0.0)
+        cost = max(quota.last_cost, 1)
+        
+        leagues = {}
+        for sport_key in LEAGUES:
+            kickoff = self._next_kickoff(sport_key, now)
+            hours = (kickoff - now).total_seconds() / 3600 if kickoff is not None else None
+            leagues[sport_key] = {
+                "next_kickoff": kickoff,
+                "hours_to_kickoff": round(hours, 2) if hours is not None else None,
+                "target_interval_seconds": self.target_interval(hours)
+            }
+        
+        target_rate = sum(cost / league["target_interval_seconds"] for league in leagues.values())
+        allowed_rate = available / seconds_left
+        
+        # Out of quota: wait for the reset
+        if allowed_rate <= 0:
+            stretch = None
+        else:
+            stretch = max(target_rate / allowed_rate, 1.0)
+        
+        for league in leagues.values():
+            if stretch is None:
+                league["interval_seconds"] = seconds_left
+            else:
+                league["interval_seconds"] = league["target_interval_seconds"] * stretch
+        
+        planned_rate = sum(cost / league["interval_seconds"] for league in leagues.values())
+        
+        return {
+            "reset_at": reset_at,
+            "remaining": remaining,
+            "reserve": reserve,
+            "request_cost": cost,
+            "allowed_per_day": allowed_rate * 86400,
+            "target_per_day": target_rate * 86400,
+            "planned_per_day": planned_rate * 86400,
+            "stretch": stretch,
+            "leagues": leagues
+        }
+    
+    def _replan(self) -> Dict[str, float]:
+        """Current interval per league; on-demand lookups treat a snapshot as fresh until its next poll"""
+        for sport_key, league in self.plan()["leagues"].items():
+            self._intervals[sport_key] = league["interval_seconds"]
+        self._apply_ttls(self._intervals)
+        return self._intervals
+    
+    def _apply_ttls(self, intervals: Dict[str, float]) -> None:
+        for sport_key, interval in intervals.items():
+            odds_service.set_ttl(sport_key, round(interval + settings.ODDS_POLL_TICK_SECONDS))
+    
+    def due(self) -> List[str]:
+        """Leagues whose planned interval has elapsed since their last poll"""
+        now = time.time()
+        return [
+            sport_key for sport_key, interval in self._replan().items()
+            if sport_key not in self._last_polled or now - self._last_polled[sport_key] >= interval
+        ]
+    
+    def poll(self, sport_key: str) -> None:
+        """Refresh one league's snapshot and share it through the state directory"""
+        self._last_polled[sport_key] = time.time()
+        self.stats["polls"] += 1
+        
+        fetch_errors = odds_service.stats["fetch_errors"]
+        snapshot = odds_service.refresh(sport_key)
+        if odds_service.stats["fetch_errors"] > fetch_errors:
+            self.stats["poll_errors"] += 1
+            return
+        
+        self._write_state(f"{sport_key}.json", {
+            "fetched_at": snapshot.fetched_at.isoformat(),
+            "fixtures": snapshot.fixtures
+        })
+    
+    def _write_state(self, name: str, data: Dict) -> None:
+        """Replace a state file atomically, for readers in other processes"""
+        path = self.state_dir / name
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        self._loaded_mtimes[name] = path.stat().st_mtime
+    
+    def _read_state(self, name: str) -> Optional[Dict]:
+        """A state file written by another process since it was last read, or None"""
+        path = self.state_dir / name
+        try:
+            mtime = path.stat().st_mtime
+            if mtime <= self._loaded_mtimes.get(name, 0):
+                return None
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Could not read odds scheduler state {path}: {e}")
+            return None
+        
+        self._loaded_mtimes[name] = mtime
+        return data
+    
+    def _publish_plan(self) -> None:
+        """Share intervals and quota figures with the other processes (when they changed)"""
+        plan = {
+            "intervals": {key: round(interval) for key, interval in self._intervals.items()},
+            "quota": {
+                "x-requests-remaining": odds_api.quota.remaining,
+                "x-requests-used": odds_api.quota.used,
+                "x-requests-last": odds_api.quota.last_cost
+            }
+        }
+        if plan != self._published_plan:
+            self._write_state("plan.json", plan)
+            self._published_plan = plan
+    
+    def _load_state(self) -> None:
+        """Load the poller's plan, and league payloads newer than the ones held"""
+        plan = self._read_state("plan.json")
+        if plan is not None and self._lock_file is None:
+            self._apply_ttls(plan.get("intervals", {}))
+            # The poller's quota figures, so every process reports the same plan
+            odds_api.quota.update(plan.get("quota", {}))
+        
+        for sport_key in LEAGUES:
+            state = self._read_state(f"{sport_key}.json")
+            if state is None:
+                continue
+            try:
+                fetched_at = datetime.fromisoformat(state["fetched_at"])
+                fixtures = state["fixtures"]
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Could not load odds snapshot for {sport_key}: {e}")
+                continue
+            
+            current = odds_service.peek_snapshot(sport_key)
+            if current is not None and current.fetched_at >= fetched_at:
+                continue
+            
+            age = max((datetime.utcnow() - fetched_at).total_seconds(), 0.0)
+            odds_service.put_snapshot(OddsSnapshot(sport_key, fixtures, age_seconds=age))
+            # A restarted poller picks up where the previous one left off
+            self._last_polled[sport_key] = time.time() - age
+            self.stats["snapshots_loaded"] += 1
+    
+    def _try_lead(self) -> bool:
+        """Whether this process is (or has now become) the poller"""
+        if self._lock_file is not None or fcntl is None:
+            return True
+        
+        lock_file = open(self.state_dir / "poller.lock", 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held until this process exits or stops the scheduler
+        self._lock_file = lock_file
+        return True
+    
+    def tick(self) -> None:
+        """Pick up shared snapshots, then poll the due leagues if this process is the poller"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._load_state()
+        
+        if not self._try_lead():
+            self.role = "follower"
+            return
+        
+        self.role = "poller"
+        due = self.due()
+        for sport_key in due:
+            self.poll(sport_key)
+        if due:
+            # Replan with the kickoffs just fetched
+            self._replan()
+        self._publish_plan()
+    
+    async def run(self) -> None:
+        """Run a tick every ODDS_POLL_TICK_SECONDS"""
+        while True:
+            try:
+                await asyncio.to_thread(self.tick)
+            except Exception as e:
+                print(f"Error in odds polling scheduler: {e}")
+            await asyncio.sleep(settings.ODDS_POLL_TICK_SECONDS)
+    
+    def start(self) -> None:
+        """Start polling (or following the poller) on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+    
+    def stop(self) -> None:
+        """Stop polling and hand the lock over; on-demand lookups go back to ODDS_SNAPSHOT_TTL"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self.role = None
+        for sport_key in LEAGUES:
+            odds_service.set_ttl(sport_key, None)
+    
+    def get_info(self) -> Dict:
+        """Current plan, projected quota use by the reset and observed burn rate"""
+        plan = self.plan()
+        now = time.time()
+        used = odds_api.quota.used
+        seconds_left = (plan["reset_at"] - datetime.utcnow()).total_seconds()
+        observed = odds_api.quota.burn_per_hour()
+        projected = round(used + plan["planned_per_day"] * seconds_left / 86400) if used is not None else None
+        
+        for sport_key, league in plan["leagues"].items():
+            last = self._last_polled.get(sport_key)
+            since = now - last if last is not None else None
+            league["last_polled_seconds_ago"] = round(since, 1) if since is not None else None
+            league["next_poll_in_seconds"] = round(max(league["interval_seconds"] - since, 0), 1) if since is not None else 0.0
+            league["interval_seconds"] = round(league["interval_seconds"], 1)
+        
+        return {
+            "enabled": settings.ODDS_SCHEDULER_ENABLED,
+            "running": self._task is not None and not self._task.done(),
+            "role": self.role,
+            "state_dir": str(self.state_dir),
+            "monthly_quota": settings.ODDS_API_MONTHLY_QUOTA,
+            "used": used,
+            **{key: plan[key] for key in ("reset_at", "remaining", "reserve", "request_cost")},
+            "allowed_per_day": round(plan["allowed_per_day"], 2),
+            "planned_per_day": round(plan["planned_per_day"], 2),
+            "target_per_day": round(plan["target_per_day"], 2),
+            "stretch": round(plan["stretch"], 3) if plan["stretch"] is not None else None,
+            "observed_per_day": round(observed * 24, 2) if observed is not None else None,
+            "projected_used_at_reset": projected,
+            **self.stats,
+            "leagues": plan["leagues"]
+        }
+
+
+# Global odds polling scheduler instance
+odds_scheduler = OddsPollingScheduler()
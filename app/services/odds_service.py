@@ -3,17 +3,172 @@ Odds Fetching Service
 Fetches Over/Under 2.5 odds from The Odds API
 """
 
-import httpx
-from typing import Dict, Optional, List
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, List, Tuple
+from app.core.cache import SingleFlight
 from app.core.config import settings
+from app.core.http import http_pool
+from app.services.odds_api import LEAGUES, odds_api
+from app.services.team_registry import team_registry
+
+
+def extract_totals_odds(fixture: Dict) -> Optional[Dict]:
+    """Over/Under odds from a fixture's first bookmaker with a totals market, or None"""
+    if not fixture.get('bookmakers'):
+        return None
+    
+    bookmaker = fixture['bookmakers'][0]  # Use first bookmaker
+    
+    for market in bookmaker.get('markets', []):
+        if market['key'] == 'totals':
+            odds = {}
+            for outcome in market['outcomes']:
+                if 'Over' in outcome['name']:
+                    odds['over_25_odds'] = outcome['price']
+                    odds['over_25_point'] = outcome.get('point', 2.5)
+                elif 'Under' in outcome['name']:
+                    odds['under_25_odds'] = outcome['price']
+                    odds['under_25_point'] = outcome.get('point', 2.5)
+            
+            if odds:
+                odds['bookmaker'] = bookmaker['title']
+                odds['last_update'] = bookmaker.get('last_update')
+                return odds
+    
+    return None
+
+
+class OddsSnapshot:
+    """One league's odds payload, parsed once into odds keyed by canonical (home, away) team"""
+    
+    def __init__(self, sport_key: str, fixtures: List[Dict], age_seconds: float = 0.0):
+        self.sport_key = sport_key
+        self.fixtures = fixtures
+        # Age counts from when the upstream payload was received, which may predate this snapshot
+        self.fetched_at = datetime.utcnow() - timedelta(seconds=age_seconds)
+        self._fetched_monotonic = time.monotonic() - age_seconds
+        self.by_teams: Dict[Tuple[str, str], Dict] = {}
+        
+        for fixture in fixtures:
+            key = (
+                team_registry.team_key(fixture['home_team'], source='odds_api'),
+                team_registry.team_key(fixture['away_team'], source='odds_api')
+            )
+            if key not in self.by_teams:
+                odds = extract_totals_odds(fixture)
+                if odds:
+                    self.by_teams[key] = odds
+    
+    @property
+    def age_seconds(self) -> float:
+        """Seconds since the payload was fetched"""
+        return time.monotonic() - self._fetched_monotonic
+    
+    def lookup(self, home_team: str, away_team: str) -> Optional[Dict]:
+        """Odds for a match, whichever source's spelling the names use"""
+        return self.by_teams.get((
+            team_registry.team_key(home_team, source='odds_lookup'),
+            team_registry.team_key(away_team, source='odds_lookup')
+        ))
 
 
 class OddsFetchingService:
     """Service for fetching odds from The Odds API"""
     
     def __init__(self):
-        self.base_url = settings.ODDS_API_BASE_URL
-        self.api_key = settings.ODDS_API_KEY
+        self._snapshots: Dict[str, OddsSnapshot] = {}
+        self._flights = SingleFlight()
+        self._refreshing = set()
+        self._ttls: Dict[str, float] = {}  # per-league fresh TTL set by the polling scheduler
+        self._lock = threading.Lock()
+        self.stats = {"fresh_hits": 0, "stale_hits": 0, "fetches": 0, "fetch_errors": 0}
+    
+    def _request_league_odds(self, sport_key: str) -> OddsSnapshot:
+        """A league's snapshot from the gateway's shared response (raises on failure)"""
+        response = odds_api.league_odds(sport_key)
+        return response.view(
+            'odds_snapshot',
+            lambda payload: OddsSnapshot(sport_key, payload, age_seconds=response.age_seconds)
+        )
+    
+    def _refresh_snapshot(self, sport_key: str) -> OddsSnapshot:
+        """Fetch and parse a league's payload; keeps the previous snapshot if the fetch fails"""
+        self.stats["fetches"] += 1
+        try:
+            snapshot = self._request_league_odds(sport_key)
+        except Exception as e:
+            self.stats["fetch_errors"] += 1
+            print(f"Error fetching odds for {sport_key}: {e}")
+            previous = self._snapshots.get(sport_key)
+            if previous is not None:
+                return previous
+            # Cache the empty result too, so a failing API isn't retried for every match
+            snapshot = OddsSnapshot(sport_key, [])
+        
+        self._snapshots[sport_key] = snapshot
+        return snapshot
+    
+    def _refresh_in_background(self, sport_key: str) -> None:
+        """Start one background refresh per league"""
+        with self._lock:
+            if sport_key in self._refreshing:
+                return
+            self._refreshing.add(sport_key)
+        
+        def refresh():
+            try:
+                self._flights.do(sport_key, lambda: self._refresh_snapshot(sport_key))
+            finally:
+                with self._lock:
+                    self._refreshing.discard(sport_key)
+        
+        threading.Thread(target=refresh, name=f"odds-refresh-{sport_key}", daemon=True).start()
+    
+    def get_snapshot(self, sport_key: str = 'soccer_epl') -> OddsSnapshot:
+        """
+        Latest parsed odds for a league.
+        
+        Fresh (younger than ODDS_SNAPSHOT_TTL, or than the league's polling
+        interval when the scheduler runs) snapshots are returned as is; stale
+        ones within ODDS_SNAPSHOT_STALE_TTL more are returned while a
+        background refresh runs; older or missing ones are fetched, with
+        concurrent callers sharing one request.
+        """
+        snapshot = self._snapshots.get(sport_key)
+        
+        if snapshot is not None:
+            age = snapshot.age_seconds
+            ttl = self._ttls.get(sport_key, settings.ODDS_SNAPSHOT_TTL)
+            if age < ttl:
+                self.stats["fresh_hits"] += 1
+                return snapshot
+            if age < ttl + settings.ODDS_SNAPSHOT_STALE_TTL:
+                self.stats["stale_hits"] += 1
+                self._refresh_in_background(sport_key)
+                return snapshot
+        
+        return self._flights.do(sport_key, lambda: self._refresh_snapshot(sport_key))
+    
+    def peek_snapshot(self, sport_key: str) -> Optional[OddsSnapshot]:
+        """The league's current snapshot, if any, without fetching"""
+        return self._snapshots.get(sport_key)
+    
+    def put_snapshot(self, snapshot: OddsSnapshot) -> None:
+        """Serve a snapshot obtained elsewhere (e.g. by the polling process)"""
+        self._snapshots[snapshot.sport_key] = snapshot
+    
+    def refresh(self, sport_key: str) -> OddsSnapshot:
+        """Fetch a league's snapshot now, whatever the age of the current one"""
+        return self._flights.do(sport_key, lambda: self._refresh_snapshot(sport_key))
+    
+    def set_ttl(self, sport_key: str, seconds: Optional[float]) -> None:
+        """Serve a league's snapshot as fresh for this long (None restores ODDS_SNAPSHOT_TTL)"""
+        if seconds is None:
+            self._ttls.pop(sport_key, None)
+        else:
+            self._ttls[sport_key] = seconds
     
     def fetch_league_odds(self, sport_key: str = 'soccer_epl') -> List[Dict]:
         """
@@ -23,28 +178,9 @@ class OddsFetchingService:
             sport_key: Sport key from Odds API (soccer_epl, soccer_spain_la_liga, etc.)
         
         Returns:
-            List of matches with odds
+            List of matches with odds (from the league's cached snapshot)
         """
-        params = {
-            'apiKey': self.api_key,
-            'regions': 'uk',
-            'markets': 'totals',  # Over/Under markets
-            'oddsFormat': 'decimal'
-        }
-        
-        try:
-            response = httpx.get(
-                f"{self.base_url}/sports/{sport_key}/odds",
-                params=params,
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            return response.json()
-            
-        except Exception as e:
-            print(f"Error fetching odds for {sport_key}: {e}")
-            return []
+        return self.get_snapshot(sport_key).fixtures
     
     def get_match_odds(self, home_team: str, away_team: str, sport_key: str = 'soccer_epl') -> Optional[Dict]:
         """
@@ -58,64 +194,58 @@ class OddsFetchingService:
         Returns:
             Dictionary with over_25_odds and under_25_odds, or None
         """
-        fixtures = self.fetch_league_odds(sport_key)
-        
-        # Find matching fixture
-        for fixture in fixtures:
-            if (self._match_team(fixture['home_team'], home_team) and 
-                self._match_team(fixture['away_team'], away_team)):
-                
-                # Extract Over/Under 2.5 odds
-                if fixture.get('bookmakers'):
-                    bookmaker = fixture['bookmakers'][0]  # Use first bookmaker
-                    
-                    for market in bookmaker.get('markets', []):
-                        if market['key'] == 'totals':
-                            odds = {}
-                            for outcome in market['outcomes']:
-                                if 'Over' in outcome['name']:
-                                    odds['over_25_odds'] = outcome['price']
-                                    odds['over_25_point'] = outcome.get('point', 2.5)
-                                elif 'Under' in outcome['name']:
-                                    odds['under_25_odds'] = outcome['price']
-                                    odds['under_25_point'] = outcome.get('point', 2.5)
-                            
-                            if odds:
-                                odds['bookmaker'] = bookmaker['title']
-                                odds['last_update'] = bookmaker.get('last_update')
-                                return odds
-        
-        return None
+        odds = self.get_snapshot(sport_key).lookup(home_team, away_team)
+        return dict(odds) if odds is not None else None
+    
+    def invalidate(self, sport_key: Optional[str] = None) -> None:
+        """Drop one league's snapshot (and the gateway's cached response), or all of them"""
+        if sport_key is None:
+            self._snapshots.clear()
+            odds_api.invalidate()
+        else:
+            self._snapshots.pop(sport_key, None)
+            odds_api.invalidate(f"/sports/{sport_key}/odds")
+    
+    def get_cache_stats(self) -> Dict:
+        """Snapshot ages and hit / fetch counters"""
+        return {
+            "ttl_seconds": settings.ODDS_SNAPSHOT_TTL,
+            "stale_ttl_seconds": settings.ODDS_SNAPSHOT_STALE_TTL,
+            **self.stats,
+            "snapshots": {
+                sport_key: {
+                    "fetched_at": snapshot.fetched_at,
+                    "age_seconds": round(snapshot.age_seconds, 1),
+                    "ttl_seconds": self._ttls.get(sport_key, settings.ODDS_SNAPSHOT_TTL),
+                    "fixtures": len(snapshot.fixtures),
+                    "with_odds": len(snapshot.by_teams)
+                }
+                for sport_key, snapshot in list(self._snapshots.items())
+            }
+        }
     
     def _match_team(self, api_name: str, our_name: str) -> bool:
-        """Fuzzy match team names (case-insensitive, remove spaces)"""
-        api_clean = api_name.lower().replace(' ', '').replace('-', '')
-        our_clean = our_name.lower().replace(' ', '').replace('-', '')
-        return api_clean in our_clean or our_clean in api_clean
+        """Whether two team names resolve to the same canonical team"""
+        return team_registry.same_team(api_name, our_name)
     
     def fetch_all_leagues_odds(self) -> Dict[str, List]:
-        """Fetch odds for all supported leagues"""
+        """
+        Fetch odds for all supported leagues concurrently.
+        Leagues that miss UPSTREAM_DEADLINE_SECONDS come back empty.
+        """
         
-        sport_keys = {
-            'soccer_epl': 'Premier League',
-            'soccer_spain_la_liga': 'La Liga',
-            'soccer_italy_serie_a': 'Serie A',
-            'soccer_germany_bundesliga': 'Bundesliga',
-            'soccer_france_ligue_one': 'Ligue 1',
-            'soccer_uefa_champs_league': 'Champions League'
-        }
+        results, missing = http_pool.fetch_all({
+            sport_key: (lambda key=sport_key: self.fetch_league_odds(key))
+            for sport_key in LEAGUES
+        })
         
         all_odds = {}
-        
-        for sport_key, league_name in sport_keys.items():
-            print(f"Fetching {league_name} odds...")
-            try:
-                odds = self.fetch_league_odds(sport_key)
-                all_odds[league_name] = odds
-                print(f"  Found odds for {len(odds)} matches")
-            except Exception as e:
-                print(f"  Error: {e}")
-                all_odds[league_name] = []
+        for sport_key, league_name in LEAGUES.items():
+            all_odds[league_name] = results.get(sport_key, [])
+            if sport_key in missing:
+                print(f"{league_name} odds: not received in time")
+            else:
+                print(f"{league_name} odds: found odds for {len(all_odds[league_name])} matches")
         
         return all_odds
 
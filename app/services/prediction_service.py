@@ -3,17 +3,36 @@ Prediction Service
 Coordinates feature calculation and model prediction
 """
 
+import asyncio
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List
+from typing import Dict, Hashable, List, Optional, Tuple
+from app.core.cache import SingleFlight, TTLCache
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.services.ml_service import ml_service
 from app.services.feature_service import feature_service
+from app.services.inference_batcher import inference_batcher
+from app.services.inference_executor import inference_executor
 from app.schemas.prediction import PredictionResponse
 
+# Finished predictions keyed by their inputs and the model version
+prediction_cache = TTLCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL
+)
+
+# Concurrent identical requests share one computation
+prediction_flights = SingleFlight()
+
+metrics.describe('feature_engineering_ms', "Feature engineering latency per prediction (ms)")
+metrics.describe('prediction_end_to_end_ms', "Single prediction latency including cache hits (ms)")
+
 
 class PredictionService:
     """Service for generating predictions"""
     
+    @metrics.timed('prediction_end_to_end_ms')
     def generate_prediction(
         self,
         db: Session,
@@ -23,7 +42,8 @@ class PredictionService:
         match_date: datetime,
         fixture_id: str = None,
         over_25_odds: float = None,
-        under_25_odds: float = None
+        under_25_odds: float = None,
+        route: Optional[str] = None
     ) -> PredictionResponse:
         """
         Generate a prediction for a match.
@@ -35,6 +55,7 @@ class PredictionService:
             league: League name
             match_date: Match date
             fixture_id: Optional fixture ID
+            route: Endpoint route, to use the model variant assigned to it
         
         Returns:
             PredictionResponse with full prediction details
@@ -43,15 +64,185 @@ class PredictionService:
         if fixture_id is None:
             fixture_id = f"match_{home_team}_{away_team}_{match_date.strftime('%Y%m%d')}"
         
-        # Step 1: Engineer features
-        features = feature_service.engineer_features_for_match(
-            db, home_team, away_team, league, match_date,
-            over_25_odds=over_25_odds,
-            under_25_odds=under_25_odds
-        )
+        def compute() -> PredictionResponse:
+            # Step 1: Engineer features
+            with metrics.timer('feature_engineering_ms'):
+                features = feature_service.engineer_features_for_match(
+                    db, home_team, away_team, league, match_date,
+                    over_25_odds=over_25_odds,
+                    under_25_odds=under_25_odds
+                )
+            
+            # Step 2: Get prediction from ML model
+            probabilities = ml_service.predict(features, route=route)
+            
+            return self._build_prediction(
+                features, probabilities, fixture_id, home_team, away_team, league, match_date, route
+            )
+        
+        if not settings.PREDICTION_CACHE_ENABLED:
+            return compute()
+        
+        key = self._cache_key(home_team, away_team, league, match_date, over_25_odds, under_25_odds, route)
+        prediction = prediction_cache.get(key)
+        
+        if prediction is None:
+            prediction = prediction_flights.do(key, lambda: self._compute_and_cache(key, compute))
+        
+        return prediction.model_copy(update={'fixture_id': fixture_id})
+    
+    @metrics.timed('prediction_end_to_end_ms')
+    async def generate_prediction_async(
+        self,
+        home_team: str,
+        away_team: str,
+        league: str,
+        match_date: datetime,
+        fixture_id: str = None,
+        over_25_odds: float = None,
+        under_25_odds: float = None,
+        session_factory=None,
+        db: Session = None,
+        route: Optional[str] = None
+    ) -> PredictionResponse:
+        """
+        Generate a prediction without blocking the event loop.
+        
+        Features come from concurrent queries on the async pool when session_factory
+        is given, otherwise from the inference executor (or db in a worker thread).
+        With INFERENCE_BATCH_ENABLED the model call is coalesced with other
+        in-flight requests; otherwise it runs on the inference executor if enabled,
+        or in a worker thread. Routes served by a variant skip the batcher and
+        process workers, which only hold the active model.
+        """
+        if fixture_id is None:
+            fixture_id = f"match_{home_team}_{away_team}_{match_date.strftime('%Y%m%d')}"
+        
+        async def compute() -> PredictionResponse:
+            with metrics.timer('feature_engineering_ms'):
+                if session_factory is not None:
+                    features = await feature_service.engineer_features_for_match_async(
+                        session_factory, home_team, away_team, league, match_date,
+                        over_25_odds=over_25_odds,
+                        under_25_odds=under_25_odds
+                    )
+                elif inference_executor.enabled:
+                    features = await inference_executor.compute_features(
+                        home_team, away_team, league, match_date,
+                        over_25_odds=over_25_odds,
+                        under_25_odds=under_25_odds
+                    )
+                else:
+                    features = await asyncio.to_thread(
+                        feature_service.engineer_features_for_match,
+                        db, home_team, away_team, league, match_date,
+                        over_25_odds=over_25_odds,
+                        under_25_odds=under_25_odds
+                    )
+            
+            if ml_service.registry.resolve(route) is not ml_service.registry.active:
+                # Variants are loaded in this process only: thread pools can run them, process workers can't
+                if inference_executor.mode == 'thread':
+                    probabilities = await inference_executor.run(ml_service.predict, features, route)
+                else:
+                    probabilities = await asyncio.to_thread(ml_service.predict, features, route)
+            elif settings.INFERENCE_BATCH_ENABLED:
+                probabilities = await inference_batcher.predict(features)
+            elif inference_executor.enabled:
+                probabilities = (await inference_executor.predict_many([features]))[0]
+            else:
+                probabilities = await asyncio.to_thread(ml_service.predict, features)
+            
+            return self._build_prediction(
+                features, probabilities, fixture_id, home_team, away_team, league, match_date, route
+            )
+        
+        if not settings.PREDICTION_CACHE_ENABLED:
+            return await compute()
+        
+        key = self._cache_key(home_team, away_team, league, match_date, over_25_odds, under_25_odds, route)
+        prediction = prediction_cache.get(key)
         
-        # Step 2: Get prediction from ML model
-        over_prob, under_prob, confidence = ml_service.predict(features)
+        if prediction is None:
+            prediction = await prediction_flights.do_async(key, lambda: self._compute_and_cache_async(key, compute))
+        
+        return prediction.model_copy(update={'fixture_id': fixture_id})
+    
+    def _cache_key(self, home_team: str, away_team: str, league: str, match_date: datetime,
+                   over_25_odds: float, under_25_odds: float, route: Optional[str] = None) -> Hashable:
+        """Prediction cache key: everything the result depends on, except the fixture ID"""
+        return (home_team, away_team, league, match_date, over_25_odds, under_25_odds,
+                ml_service.model_version_for(route))
+    
+    def _compute_and_cache(self, key: Hashable, compute) -> PredictionResponse:
+        """Compute a prediction and store it"""
+        prediction = compute()
+        prediction_cache.set(key, prediction)
+        return prediction
+    
+    async def _compute_and_cache_async(self, key: Hashable, compute) -> PredictionResponse:
+        """Await a prediction and store it"""
+        prediction = await compute()
+        prediction_cache.set(key, prediction)
+        return prediction
+    
+    def invalidate_cache(self) -> int:
+        """Drop cached predictions (e.g. after new results change the features)"""
+        return prediction_cache.invalidate()
+    
+    def get_cache_stats(self) -> Dict:
+        """Get prediction cache and in-flight dedup counters"""
+        return {
+            "enabled": settings.PREDICTION_CACHE_ENABLED,
+            **prediction_cache.get_stats(),
+            "single_flight": prediction_flights.get_stats()
+        }
+    
+    def generate_predictions(self, db: Session, fixtures: List[Dict]) -> List[PredictionResponse]:
+        """
+        Generate predictions for many fixtures, engineering all features in one batch.
+        
+        Args:
+            db: Database session
+            fixtures: Dicts with home_team, away_team, league, match_date and
+                optional fixture_id / over_25_odds / under_25_odds
+        
+        Returns:
+            List of PredictionResponse aligned with the input order
+        """
+        features_list = feature_service.engineer_features_for_matches(db, fixtures)
+        return self.predict_features(fixtures, features_list)
+    
+    def predict_features(self, fixtures: List[Dict], features_list: List) -> List[PredictionResponse]:
+        """
+        Predictions for fixtures whose features are already engineered.
+        
+        Args:
+            fixtures: Dicts as for generate_predictions
+            features_list: Their FeatureVectors (or feature dicts), in the same order
+        
+        Returns:
+            List of PredictionResponse aligned with the input order
+        """
+        probabilities_list = ml_service.predict_many(features_list)
+        
+        predictions = []
+        for fixture, features, probabilities in zip(fixtures, features_list, probabilities_list):
+            fixture_id = fixture.get('fixture_id') or (
+                f"match_{fixture['home_team']}_{fixture['away_team']}_{fixture['match_date'].strftime('%Y%m%d')}"
+            )
+            predictions.append(self._build_prediction(
+                features, probabilities, fixture_id, fixture['home_team'], fixture['away_team'],
+                fixture['league'], fixture['match_date']
+            ))
+        
+        return predictions
+    
+    def _build_prediction(self, features: Dict[str, float], probabilities: Tuple[float, float, float],
+                          fixture_id: str, home_team: str, away_team: str, league: str,
+                          match_date: datetime, route: Optional[str] = None) -> PredictionResponse:
+        """Build the response from engineered features and model output"""
+        over_prob, under_prob, confidence = probabilities
         
         # Step 3: Get confidence level
         confidence_level = ml_service.get_confidence_level(confidence)
@@ -71,7 +262,7 @@ class PredictionService:
             confidence_score=confidence,
             confidence_level=confidence_level,
             key_factors=key_factors,
-            model_version=ml_service.model_version,
+            model_version=ml_service.model_version_for(route),
             generated_at=datetime.utcnow()
         )
         
@@ -97,7 +288,7 @@ class PredictionService:
         # H2H
         if features['h2h_games'] >= 3 and features['h2h_avg_goals'] >= 2.5:
             factors.append(
-                f"Last {int(features['h2h_games'])} H2H matches averaged {features['h2h_avg_goals']:.1f} total goals"
+                f"Last {features['h2h_games']} H2H matches averaged {features['h2h_avg_goals']:.1f} total goals"
             )
         
         # League context
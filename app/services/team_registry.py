@@ -0,0 +1,246 @@
+"""
+Team Registry
+Maps team names from The Odds API, API-Football and matches_historical to one canonical team ID
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher, get_close_matches
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+# Minimum difflib ratio for a fuzzy match, and how far ahead of a different team it must be
+FUZZY_CUTOFF = 0.85
+FUZZY_MARGIN = 0.05
+
+# Club-type tokens that vary between sources ("FC", "AFC", "SSC", "1. FC", "1899")
+STOP_TOKENS = {'fc', 'afc', 'cf', 'sc', 'ac', 'as', 'ssc', 'cd', 'ud', 'rcd', 'sv', 'vfb', 'vfl', 'tsg', 'bsc', 'rc', 'ogc', 'sco'}
+
+# Canonical name -> spellings used by the upstream APIs and the historical data
+TEAM_ALIASES: Dict[str, Tuple[str, ...]] = {
+    # Premier League
+    'Manchester United': ('Man United', 'Man Utd', 'Manchester Utd'),
+    'Manchester City': ('Man City',),
+    'Tottenham Hotspur': ('Tottenham', 'Spurs'),
+    'Wolverhampton Wanderers': ('Wolves', 'Wolverhampton'),
+    'Newcastle United': ('Newcastle',),
+    'West Ham United': ('West Ham',),
+    'Brighton and Hove Albion': ('Brighton', 'Brighton & Hove Albion'),
+    'Nottingham Forest': ("Nott'm Forest", 'Nottm Forest'),
+    'Leicester City': ('Leicester',),
+    'Leeds United': ('Leeds',),
+    'Sheffield United': ('Sheffield Utd', 'Sheff Utd'),
+    'Ipswich Town': ('Ipswich',),
+    'Luton Town': ('Luton',),
+    'AFC Bournemouth': ('Bournemouth',),
+    # La Liga
+    'Atletico Madrid': ('Ath Madrid', 'Atl. Madrid', 'Club Atletico de Madrid'),
+    'Athletic Bilbao': ('Ath Bilbao', 'Athletic Club'),
+    'Real Betis': ('Betis',),
+    'Real Sociedad': ('Sociedad',),
+    'Celta Vigo': ('Celta',),
+    'Rayo Vallecano': ('Vallecano',),
+    'Espanyol': ('Espanol',),
+    'Alaves': ('Deportivo Alaves',),
+    # Serie A
+    'Inter Milan': ('Inter', 'Internazionale'),
+    'AC Milan': ('Milan',),
+    'AS Roma': ('Roma',),
+    'Hellas Verona': ('Verona',),
+    # Bundesliga
+    'Bayern Munich': ('Bayern Munchen', 'Bayern'),
+    'Borussia Dortmund': ('Dortmund',),
+    'Borussia Monchengladbach': ("M'gladbach", 'Monchengladbach', 'Gladbach'),
+    'Bayer Leverkusen': ('Leverkusen',),
+    'Eintracht Frankfurt': ('Ein Frankfurt',),
+    'FC Koln': ('Koln', 'Cologne'),
+    'RB Leipzig': ('Leipzig',),
+    'FSV Mainz 05': ('Mainz',),
+    'TSG Hoffenheim': ('Hoffenheim',),
+    'Werder Bremen': ('Bremen',),
+    'Union Berlin': ('FC Union Berlin',),
+    # Ligue 1
+    'Paris Saint Germain': ('Paris SG', 'PSG'),
+    'Marseille': ('Olympique Marseille',),
+    'Lyon': ('Olympique Lyonnais',),
+    'Saint Etienne': ('St Etienne',),
+}
+
+
+def normalize_team_name(name: str) -> str:
+    """Alias-index key: ASCII, lowercase, '&' as 'and', club-type and numeric tokens dropped"""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    tokens = re.findall(r'[a-z0-9]+', ascii_name.replace('&', ' and ').replace("'", ''))
+    kept = [token for token in tokens if token not in STOP_TOKENS and not token.isdigit()]
+    return ''.join(kept or tokens)
+
+
+def _slug(name: str) -> str:
+    """Canonical team ID from a display name"""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    return '-'.join(re.findall(r'[a-z0-9]+', ascii_name))
+
+
+class TeamRegistry:
+    """
+    Canonical teams with a precomputed normalized-alias index.
+    
+    Lookups are one dict hit; names missing from the index fall back to a
+    difflib match whose result (hit or miss) is cached. Names that stay
+    unresolved are counted per source for review.
+    """
+    
+    def __init__(self):
+        self._names: Dict[str, str] = {}  # team ID -> display name
+        self._index: Dict[str, str] = {}  # normalized alias -> team ID
+        self._fuzzy: Dict[str, Optional[Tuple[str, float]]] = {}  # normalized name -> (team ID, ratio) or None
+        self._history_names: Dict[str, Counter] = {}  # team ID -> matches_historical spelling counts
+        self._unresolved: Counter = Counter()
+        self._conflicts: Dict[str, Tuple[str, str]] = {}
+        self._aliases_version = 0  # bumped by add_team, so fuzzy results from an older index are not cached
+        self._lock = threading.Lock()
+        
+        for canonical, aliases in TEAM_ALIASES.items():
+            self.add_team(canonical, aliases)
+    
+    def add_team(self, name: str, aliases: Iterable[str] = ()) -> str:
+        """Register a team (or more aliases for it) and return its ID"""
+        team_id = self._index.get(normalize_team_name(name)) or _slug(name)
+        with self._lock:
+            self._names.setdefault(team_id, name)
+            for alias in (name, *aliases):
+                key = normalize_team_name(alias)
+                existing = self._index.setdefault(key, team_id)
+                if existing != team_id:
+                    self._conflicts[alias] = (existing, team_id)
+            # New aliases can turn earlier fuzzy misses into hits
+            self._fuzzy.clear()
+            self._aliases_version += 1
+        return team_id
+    
+    def load_history_names(self, db: Session) -> int:
+        """
+        Register every team name in matches_historical, remembering which
+        spelling feature queries should use for each canonical team.
+        
+        Returns:
+            Number of distinct historical names
+        """
+        from app.models.match import HistoricalMatch
+        
+        names = union_all(
+            select(HistoricalMatch.home_team.label('team')),
+            select(HistoricalMatch.away_team.label('team'))
+        ).subquery()
+        rows = db.execute(
+            select(names.c.team, func.count()).group_by(names.c.team)
+        ).all()
+        
+        for name, matches in rows:
+            team_id = self.add_team(name)
+            with self._lock:
+                self._history_names.setdefault(team_id, Counter())[name] = matches
+        
+        return len(rows)
+    
+    def resolve(self, name: str, source: str = 'unknown') -> Optional[str]:
+        """Canonical team ID for a name from any source, or None if unresolved"""
+        if not name:
+            return None
+        
+        key = normalize_team_name(name)
+        team_id = self._index.get(key)
+        if team_id is not None:
+            return team_id
+        
+        with self._lock:
+            cached = key in self._fuzzy
+            match = self._fuzzy.get(key)
+            version = self._aliases_version
+        
+        if not cached:
+            # difflib is slow, so it runs outside the lock
+            match = self._fuzzy_match(key)
+            with self._lock:
+                if self._aliases_version == version:
+                    self._fuzzy[key] = match
+        
+        if match is None:
+            with self._lock:
+                self._unresolved[(source, name)] += 1
+            return None
+        return match[0]
+    
+    def _fuzzy_match(self, key: str) -> Optional[Tuple[str, float]]:
+        """Closest alias if it is close enough and clearly ahead of any other team"""
+        # Runners-up just under the cutoff still count against the best match ("Manchester")
+        candidates = get_close_matches(key, list(self._index), n=5, cutoff=FUZZY_CUTOFF - FUZZY_MARGIN)
+        if not candidates:
+            return None
+        
+        best_id = self._index[candidates[0]]
+        best_ratio = SequenceMatcher(None, key, candidates[0]).ratio()
+        if best_ratio < FUZZY_CUTOFF:
+            return None
+        for other in candidates[1:]:
+            if self._index[other] != best_id and best_ratio - SequenceMatcher(None, key, other).ratio() < FUZZY_MARGIN:
+                return None
+        return best_id, best_ratio
+    
+    def team_key(self, name: str, source: str = 'unknown') -> str:
+        """Hashable key for matching names across sources: the team ID, or the normalized name if unresolved"""
+        return self.resolve(name, source) or normalize_team_name(name)
+    
+    def same_team(self, name_a: str, name_b: str) -> bool:
+        """Whether two names refer to the same team"""
+        return self.team_key(name_a) == self.team_key(name_b)
+    
+    def display_name(self, team_id: str) -> Optional[str]:
+        """Canonical display name of a team ID"""
+        return self._names.get(team_id)
+    
+    def history_name(self, name: str) -> str:
+        """
+        Spelling of this team in matches_historical (its most frequent one), so
+        feature queries find its matches whichever source the name came from.
+        Unknown names are returned unchanged.
+        """
+        team_id = self.resolve(name, source='features')
+        spellings = self._history_names.get(team_id) if team_id else None
+        if not spellings:
+            return name
+        return spellings.most_common(1)[0][0]
+    
+    def get_report(self, limit: int = 100) -> Dict:
+        """Unresolved names by source, fuzzy matches made, and aliases claimed by two teams"""
+        with self._lock:
+            unresolved = self._unresolved.most_common(limit)
+            fuzzy = [
+                {"name": key, "team_id": match[0], "ratio": round(match[1], 3)}
+                for key, match in self._fuzzy.items() if match is not None
+            ]
+            conflicts = dict(self._conflicts)
+        
+        return {
+            "teams": len(self._names),
+            "aliases": len(self._index),
+            "history_names": sum(len(spellings) for spellings in self._history_names.values()),
+            "unresolved": [
+                {"source": source, "name": name, "lookups": count}
+                for (source, name), count in unresolved
+            ],
+            "fuzzy_matches": fuzzy,
+            "alias_conflicts": conflicts
+        }
+    
+    def get_unresolved(self) -> List[str]:
+        """Distinct unresolved names"""
+        return sorted({name for _, name in self._unresolved})
+
+
+# Global team registry instance
+team_registry = TeamRegistry()
@@ -0,0 +1,126 @@
+"""
+Feature Query Benchmark
+Shows query plans and timings for the feature-engineering queries on matches_historical
+
+Usage:
+    python scripts/benchmark_feature_queries.py            # current schema only
+    python scripts/benchmark_feature_queries.py --apply    # before, apply the index migration, after
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, text
+from app.core.database import SessionLocal, engine
+from app.core.migrations import migrate_up
+from app.models.match import HistoricalMatch
+
+
+def build_queries(db):
+    """Representative feature queries for the busiest team, pair and league"""
+    home_team, away_team, league = db.query(
+        HistoricalMatch.home_team, HistoricalMatch.away_team, HistoricalMatch.league
+    ).group_by(
+        HistoricalMatch.home_team, HistoricalMatch.away_team, HistoricalMatch.league
+    ).order_by(func.count().desc()).first()
+    
+    as_of = db.query(func.max(HistoricalMatch.date)).scalar()
+    
+    queries = {
+        "team_form_home": db.query(HistoricalMatch).filter(
+            HistoricalMatch.home_team == home_team,
+            HistoricalMatch.date < as_of
+        ).order_by(HistoricalMatch.date.desc()).limit(5),
+        "team_form_away": db.query(HistoricalMatch).filter(
+            HistoricalMatch.away_team == away_team,
+            HistoricalMatch.date < as_of
+        ).order_by(HistoricalMatch.date.desc()).limit(5),
+        "h2h": db.query(HistoricalMatch).filter(
+            ((HistoricalMatch.home_team == home_team) & (HistoricalMatch.away_team == away_team)) |
+            ((HistoricalMatch.home_team == away_team) & (HistoricalMatch.away_team == home_team)),
+            HistoricalMatch.date < as_of
+        ).order_by(HistoricalMatch.date.desc()).limit(5),
+        "league_context": db.query(HistoricalMatch).filter(
+            HistoricalMatch.league == league,
+            HistoricalMatch.date < as_of
+        ).order_by(HistoricalMatch.date.desc()).limit(100),
+    }
+    
+    print(f"Sample: {home_team} vs {away_team} ({league}) as of {as_of}\n")
+    
+    return {
+        name: str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+        for name, query in queries.items()
+    }
+
+
+def run_benchmark(queries, runs: int):
+    """Print EXPLAIN ANALYZE output and timing percentiles per query"""
+    results = {}
+    
+    with engine.connect() as conn:
+        for name, sql in queries.items():
+            plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")).scalars().all()
+            
+            # Warm the cache, then time
+            conn.execute(text(sql)).all()
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                conn.execute(text(sql)).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            
+            results[name] = (np.percentile(timings, 50), np.percentile(timings, 95))
+            
+            print(f"--- {name} ---")
+            for line in plan:
+                print(f"  {line}")
+            print(f"  p50 {results[name][0]:.2f} ms | p95 {results[name][1]:.2f} ms\n")
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark feature queries")
+    parser.add_argument("--apply", action="store_true", help="Apply the index migration between runs")
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs per query")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        queries = build_queries(db)
+    finally:
+        db.close()
+    
+    print("=" * 60)
+    print(f"BEFORE ({datetime.now():%Y-%m-%d %H:%M})" if args.apply else "CURRENT SCHEMA")
+    print("=" * 60)
+    before = run_benchmark(queries, args.runs)
+    
+    if not args.apply:
+        return
+    
+    # Only the index migration, so a benchmark run doesn't create the snapshot tables
+    applied = migrate_up(engine, target=1)
+    print(f"Applied migrations: {applied or 'none pending'}\n")
+    
+    print("=" * 60)
+    print("AFTER")
+    print("=" * 60)
+    after = run_benchmark(queries, args.runs)
+    
+    print("=" * 60)
+    print(f"{'query':<18}{'before p50':>12}{'after p50':>12}{'speedup':>10}")
+    for name in queries:
+        speedup = before[name][0] / after[name][0] if after[name][0] else float('inf')
+        print(f"{name:<18}{before[name][0]:>10.2f}ms{after[name][0]:>10.2f}ms{speedup:>9.1f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
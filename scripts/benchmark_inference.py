@@ -0,0 +1,80 @@
+"""
+Inference Benchmark
+Compares scikit-learn and compiled flat-array inference for the trained model
+
+Usage:
+    python scripts/benchmark_inference.py [--model PATH] [--features data/features]
+"""
+
+import sys
+import time
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.compiled_forest import CompiledForest
+
+
+def load_rows(feature_names, features_dir: str, rows: int) -> np.ndarray:
+    """Exported feature rows if available, otherwise random rows in a plausible range"""
+    if features_dir and Path(features_dir).exists():
+        frame = pd.read_parquet(features_dir, columns=feature_names)
+        return frame.sample(min(rows, len(frame)), random_state=0).to_numpy(dtype=np.float64)
+    
+    rng = np.random.default_rng(0)
+    return rng.random((rows, len(feature_names))) * 4
+
+
+def time_calls(predict_proba, X: np.ndarray, runs: int):
+    """p50 / p95 latency in ms of predict_proba(X)"""
+    predict_proba(X)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predict_proba(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model inference backends")
+    parser.add_argument("--model", default=settings.MODEL_PATH, help="Model .pkl path")
+    parser.add_argument("--features", default="data/features", help="Exported feature dataset")
+    parser.add_argument("--batch", type=int, default=256, help="Batch size")
+    parser.add_argument("--runs", type=int, default=200, help="Timed runs per case")
+    args = parser.parse_args()
+    
+    model_data = joblib.load(args.model)
+    model = model_data['model']
+    feature_names = model_data['feature_names']
+    
+    start = time.perf_counter()
+    compiled = CompiledForest(model)
+    compile_ms = (time.perf_counter() - start) * 1000
+    
+    X = load_rows(feature_names, args.features, args.batch)
+    
+    # Accuracy check
+    max_diff = np.abs(model.predict_proba(X) - compiled.predict_proba(X)).max()
+    
+    print("=" * 60)
+    print(f"Model: {args.model} ({model_data.get('version', 'unknown')})")
+    print(f"Compiled: {compiled.get_info()} in {compile_ms:.0f} ms")
+    print(f"Max |sklearn - compiled| probability: {max_diff:.2e}")
+    print("=" * 60)
+    print(f"{'case':<22}{'sklearn p50':>13}{'compiled p50':>14}{'speedup':>10}")
+    
+    for name, rows in (("single row", X[:1]), (f"batch of {len(X)}", X)):
+        sk = time_calls(model.predict_proba, rows, args.runs)
+        cf = time_calls(compiled.predict_proba, rows, args.runs)
+        print(f"{name:<22}{sk[0]:>11.3f}ms{cf[0]:>12.3f}ms{sk[0] / cf[0]:>9.1f}x")
+        print(f"{'  p95':<22}{sk[1]:>11.3f}ms{cf[1]:>12.3f}ms")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
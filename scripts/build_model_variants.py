@@ -0,0 +1,234 @@
+"""
+Build Model Variants
+Derives smaller, cheaper models from the trained forest and reports their
+accuracy / latency / memory trade-off on the most recent historical matches.
+The report scores each recipe from a copy of the forest refitted on the older
+matches only, so the held-out matches are unseen by every evaluated model.
+
+Variants:
+    trees-N    the first N trees of the forest (no retraining)
+    depth-D    the forest's settings retrained with max_depth=D
+    distill-*  gradient-boosted / logistic students fitted to the forest's predictions
+
+Usage:
+    python scripts/build_model_variants.py [--model PATH] [--features data/features] [--output models/variants]
+
+Then route an endpoint to a variant, e.g.
+    MODEL_VARIANTS=predict_fast=models/variants/trees-25.pkl
+"""
+
+import sys
+import copy
+import time
+import pickle
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.compiled_forest import CompiledForest
+from app.services.feature_export import load_matches_frame, compute_point_in_time_features
+
+
+def load_dataset(features_dir: str) -> pd.DataFrame:
+    """Exported point-in-time features if available, otherwise computed from matches_historical"""
+    if features_dir and Path(features_dir).exists():
+        frame = pd.read_parquet(features_dir)
+        print(f"1. Loaded {len(frame)} feature rows from {features_dir}")
+    else:
+        from app.core.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            frame = compute_point_in_time_features(load_matches_frame(db))
+        finally:
+            db.close()
+        print(f"1. Computed features for {len(frame)} matches from matches_historical")
+    
+    return frame.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def split_chronological(frame: pd.DataFrame, feature_names, test_fraction: float):
+    """Train on older matches, evaluate on the most recent ones"""
+    cut = int(len(frame) * (1 - test_fraction))
+    X = frame[list(feature_names)].to_numpy(dtype=np.float64)
+    y = frame['over_25'].to_numpy()
+    return X[:cut], y[:cut], X[cut:], y[cut:]
+
+
+def fewer_trees(model, n_trees: int):
+    """Forest that keeps only its first n_trees (they are independent, so no retraining)"""
+    variant = copy.copy(model)
+    variant.estimators_ = model.estimators_[:n_trees]
+    variant.n_estimators = n_trees
+    return variant
+
+
+def limited_depth(model, max_depth: int, X: np.ndarray, y: np.ndarray):
+    """The forest's settings retrained with a depth limit"""
+    return clone(model).set_params(max_depth=max_depth).fit(X, y)
+
+
+def distill(student, teacher, X: np.ndarray):
+    """Fit a student model to the teacher's predictions"""
+    return student.fit(X, teacher.predict(X))
+
+
+def derive_variants(base, trees, depths, X_train: np.ndarray, y_train: np.ndarray,
+                    retrained: dict = None) -> dict:
+    """
+    Every variant recipe applied to one base forest. depth-D variants only reuse the
+    base's settings, so already retrained ones can be passed in instead of fitted again.
+    """
+    variants = {}
+    for n_trees in trees:
+        if n_trees < len(base.estimators_):
+            variants[f"trees-{n_trees}"] = fewer_trees(base, n_trees)
+    for max_depth in depths:
+        if base.max_depth is None or max_depth < base.max_depth:
+            name = f"depth-{max_depth}"
+            if retrained and name in retrained:
+                variants[name] = retrained[name]
+            else:
+                variants[name] = limited_depth(base, max_depth, X_train, y_train)
+    variants['distill-gbm'] = distill(
+        GradientBoostingClassifier(n_estimators=50, max_depth=3, random_state=0), base, X_train
+    )
+    variants['distill-logistic'] = distill(
+        make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000)), base, X_train
+    )
+    return variants
+
+
+def single_row_ms(predict_proba, X: np.ndarray, runs: int) -> float:
+    """p50 latency in ms of one-row predict_proba calls"""
+    predict_proba(X[:1])
+    timings = []
+    for i in range(runs):
+        row = X[i % len(X):i % len(X) + 1]
+        start = time.perf_counter()
+        predict_proba(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50))
+
+
+def evaluate(name: str, model, X_test: np.ndarray, y_test: np.ndarray,
+             base_predictions: np.ndarray, runs: int) -> dict:
+    """Accuracy, agreement with the full forest, single-row latency and size"""
+    probabilities = model.predict_proba(X_test)
+    predictions = model.classes_[probabilities.argmax(axis=1)]
+    
+    try:
+        compiled = CompiledForest(model)
+        compiled_ms = single_row_ms(compiled.predict_proba, X_test, runs)
+    except ValueError:
+        compiled_ms = None
+    
+    return {
+        'variant': name,
+        'accuracy': accuracy_score(y_test, predictions),
+        'log_loss': log_loss(y_test, probabilities, labels=model.classes_),
+        'agreement': float((predictions == base_predictions).mean()),
+        'sklearn_ms': single_row_ms(model.predict_proba, X_test, runs),
+        'compiled_ms': compiled_ms,
+        'size_mb': len(pickle.dumps(model)) / 1e6
+    }
+
+
+def print_table(rows: list) -> None:
+    """Trade-off table, with speedup against the full forest on the configured INFERENCE_BACKEND"""
+    def served_ms(row):
+        if settings.INFERENCE_BACKEND == 'compiled' and row['compiled_ms'] is not None:
+            return row['compiled_ms']
+        return row['sklearn_ms']
+    
+    base_ms = served_ms(rows[0])
+    
+    print(f"{'variant':<18}{'accuracy':>9}{'log loss':>10}{'agree':>8}"
+          f"{'sklearn':>10}{'compiled':>10}{'speedup':>9}{'size':>10}")
+    for row in rows:
+        compiled = f"{row['compiled_ms']:.3f}ms" if row['compiled_ms'] is not None else "-"
+        print(f"{row['variant']:<18}{row['accuracy']:>9.3f}{row['log_loss']:>10.4f}{row['agreement']:>8.3f}"
+              f"{row['sklearn_ms']:>8.3f}ms{compiled:>10}{base_ms / served_ms(row):>8.1f}x{row['size_mb']:>8.2f}MB")
+
+
+def build_variants(model_path: str, features_dir: str, output_dir: str, trees, depths,
+                   test_fraction: float, runs: int):
+    """Build, evaluate and save the variants"""
+    print("=" * 60)
+    print("BUILDING MODEL VARIANTS")
+    print("=" * 60)
+    
+    model_data = joblib.load(model_path)
+    model = model_data['model']
+    feature_names = model_data['feature_names']
+    base_version = model_data['version']
+    
+    frame = load_dataset(features_dir)
+    X_train, y_train, X_test, y_test = split_chronological(frame, feature_names, test_fraction)
+    print(f"2. Chronological split: {len(X_train)} train / {len(X_test)} test rows")
+    
+    start = time.perf_counter()
+    variants = derive_variants(model, trees, depths, X_train, y_train)
+    print(f"3. Built {len(variants)} variants ({time.perf_counter() - start:.1f}s)")
+    
+    # The shipped forest may have been trained on the test rows, which would flatter it and
+    # its trees-N / distilled variants. Every recipe is therefore scored from a reference
+    # forest with the same settings fitted on the train rows only, so no evaluated model
+    # has seen the holdout.
+    start = time.perf_counter()
+    reference = clone(model).fit(X_train, y_train)
+    reference_variants = derive_variants(reference, trees, depths, X_train, y_train, retrained=variants)
+    print(f"4. Fitted the reference forest on the train rows ({time.perf_counter() - start:.1f}s)")
+    
+    base_predictions = reference.predict(X_test)
+    rows = [evaluate(f"full ({len(model.estimators_)} trees)", reference, X_test, y_test, base_predictions, runs)]
+    for name, variant in reference_variants.items():
+        rows.append(evaluate(name, variant, X_test, y_test, base_predictions, runs))
+    
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    for name, variant in variants.items():
+        joblib.dump({
+            'model': variant,
+            'feature_names': list(feature_names),
+            'version': f"{base_version}-{name}",
+            'variant': name,
+            'base_version': base_version
+        }, output / f"{name}.pkl")
+    pd.DataFrame(rows).to_csv(output / "report.csv", index=False)
+    print(f"5. Wrote {len(variants)} variants and report.csv to {output_dir}")
+    
+    print("=" * 60)
+    print_table(rows)
+    print("=" * 60)
+    print(f"\n✅ Route an endpoint to a variant, e.g. MODEL_VARIANTS=predict_fast={output / 'trees-25.pkl'}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build and compare smaller model variants")
+    parser.add_argument("--model", default=settings.MODEL_PATH, help="Model .pkl path")
+    parser.add_argument("--features", default="data/features", help="Exported feature dataset (else computed from the database)")
+    parser.add_argument("--output", default="models/variants", help="Output directory")
+    parser.add_argument("--trees", default="10,25,50", help="Tree counts to keep")
+    parser.add_argument("--depths", default="4,6,8", help="Depth limits to retrain with")
+    parser.add_argument("--test-fraction", type=float, default=0.2, help="Most recent share of matches held out")
+    parser.add_argument("--runs", type=int, default=200, help="Timed single-row calls per variant")
+    args = parser.parse_args()
+    
+    build_variants(
+        args.model, args.features, args.output,
+        trees=[int(n) for n in args.trees.split(',') if n],
+        depths=[int(d) for d in args.depths.split(',') if d],
+        test_fraction=args.test_fraction,
+        runs=args.runs
+    )
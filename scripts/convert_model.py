@@ -0,0 +1,61 @@
+"""
+Convert Model to Memory-mappable Arrays
+Flattens the trained forest into .npy arrays that every worker can memory-map
+
+Usage:
+    python scripts/convert_model.py [--model PATH] [--output models/compiled]
+
+Then set MODEL_ARRAYS_PATH to the output directory.
+"""
+
+import sys
+import time
+import argparse
+import joblib
+import numpy as np
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.compiled_forest import CompiledForest
+
+
+def convert_model(model_path: str, output_dir: str):
+    """Compile the pickled model and write its arrays"""
+    print("=" * 60)
+    print("CONVERTING MODEL")
+    print("=" * 60)
+    
+    start = time.perf_counter()
+    model_data = joblib.load(model_path)
+    print(f"1. Unpickled {model_path} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    
+    model = model_data['model']
+    forest = CompiledForest(model)
+    forest.save(output_dir, metadata={
+        'feature_names': list(model_data['feature_names']),
+        'version': model_data['version'],
+        'source': str(model_path)
+    })
+    print(f"2. Wrote {output_dir} ({forest.get_info()['bytes'] / 1e6:.1f} MB of arrays)")
+    
+    # Round-trip check on random rows
+    start = time.perf_counter()
+    loaded = CompiledForest.load(output_dir, mmap_mode='r')
+    print(f"3. Memory-mapped load ({(time.perf_counter() - start) * 1000:.1f} ms)")
+    
+    X = np.random.default_rng(0).random((1000, forest.n_features)) * 4
+    max_diff = np.abs(model.predict_proba(X) - loaded.predict_proba(X)).max()
+    print(f"4. Max |sklearn - converted| probability: {max_diff:.2e}")
+    
+    print(f"\n✅ Set MODEL_ARRAYS_PATH={output_dir}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert the model to memory-mappable arrays")
+    parser.add_argument("--model", default=settings.MODEL_PATH, help="Model .pkl path")
+    parser.add_argument("--output", default="models/compiled", help="Output directory")
+    args = parser.parse_args()
+    
+    convert_model(args.model, args.output)
@@ -0,0 +1,62 @@
+"""
+Export Point-in-time Features
+Writes the 18 model features for every historical match, as of its kickoff,
+to a Parquet dataset partitioned by league and season. The features of upcoming
+fixtures are recorded at prediction time by scripts/generate_predictions.py,
+in PREDICTION_FEATURES_DIR
+
+Usage:
+    python scripts/export_features.py [--output data/features]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.feature_export import (
+    load_matches_frame,
+    compute_point_in_time_features,
+    add_team_ids,
+    export_features_parquet
+)
+from app.services.team_registry import team_registry
+
+
+def export_features(output_dir: str):
+    """Load matches, compute features in one pass and write Parquet"""
+    print("=" * 60)
+    print("EXPORTING POINT-IN-TIME FEATURES")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        matches = load_matches_frame(db)
+        # Historical spellings map to the same team IDs as the predicted fixtures
+        team_registry.load_history_names(db)
+        print(f"1. Loaded {len(matches)} matches ({time.perf_counter() - start:.1f}s)")
+    finally:
+        db.close()
+    
+    start = time.perf_counter()
+    features = add_team_ids(compute_point_in_time_features(matches))
+    print(f"2. Computed features ({time.perf_counter() - start:.1f}s)")
+    
+    start = time.perf_counter()
+    export_features_parquet(features, output_dir)
+    print(f"3. Wrote {output_dir} ({time.perf_counter() - start:.1f}s)")
+    
+    print(f"\n✅ {len(features)} feature rows, "
+          f"{features['league'].nunique()} leagues, {features['season'].nunique()} seasons")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export point-in-time features to Parquet")
+    parser.add_argument("--output", default="data/features", help="Output dataset directory")
+    args = parser.parse_args()
+    
+    export_features(args.output)
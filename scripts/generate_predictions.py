@@ -10,10 +10,14 @@ sys.path.append(str(Path(__file__).parent.parent))
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.config import settings
+from app.services.feature_export import add_team_ids, append_prediction_features, prediction_features_frame
+from app.services.feature_service import feature_service
 from app.services.fixture_service import fixture_service
 from app.services.odds_service import odds_service
 from app.services.prediction_service import prediction_service
 from app.services.ml_service import ml_service
+from app.services.team_registry import team_registry
 
 
 def generate_predictions_for_upcoming_fixtures():
@@ -24,6 +28,7 @@ def generate_predictions_for_upcoming_fixtures():
        - Generate prediction
        - Fetch odds (if available)
        - Save prediction with odds
+    3. Append the features behind each prediction to PREDICTION_FEATURES_DIR
     """
     print("=" * 60)
     print("GENERATING PREDICTIONS FOR UPCOMING FIXTURES")
@@ -51,22 +56,54 @@ def generate_predictions_for_upcoming_fixtures():
     print("2. Generating predictions...")
     db = next(get_db())
     
+    # Feature queries look teams up by their matches_historical spelling
+    team_registry.load_history_names(db)
+    
     predictions_generated = 0
     predictions_with_odds = 0
     
-    for i, fixture in enumerate(fixtures, 1):
+    # Parse dates up front; a fixture with a bad date is skipped, not the whole run
+    batch, batch_fixtures = [], []
+    for fixture in fixtures:
+        try:
+            batch.append({
+                'fixture_id': fixture['fixture_id'],
+                'home_team': fixture['home_team'],
+                'away_team': fixture['away_team'],
+                'league': fixture['league'],
+                'match_date': datetime.fromisoformat(fixture['date'].replace('Z', '+00:00'))
+            })
+            batch_fixtures.append(fixture)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            print(f"   ❌ Skipping {fixture.get('home_team')} vs {fixture.get('away_team')}: {e}")
+    
+    # Engineer features for every fixture in one batch (a few queries in total).
+    # If the batch fails, predict one fixture at a time so a bad one only skips itself
+    try:
+        features_list = feature_service.engineer_features_for_matches(db, batch)
+        predictions = prediction_service.predict_features(batch, features_list)
+    except Exception as e:
+        print(f"   ⚠️  Batch prediction failed ({e}); predicting fixtures one at a time")
+        db.rollback()
+        features_list, predictions = [], []
+        for item in batch:
+            features = None
+            try:
+                features = feature_service.engineer_features_for_match(
+                    db, item['home_team'], item['away_team'], item['league'], item['match_date']
+                )
+                predictions.append(prediction_service.predict_features([item], [features])[0])
+            except Exception as e:
+                db.rollback()
+                predictions.append(e)
+            features_list.append(features)
+    
+    for i, (fixture, prediction) in enumerate(zip(batch_fixtures, predictions), 1):
         try:
-            print(f"\n   [{i}/{len(fixtures)}] {fixture['home_team']} vs {fixture['away_team']}")
+            print(f"\n   [{i}/{len(batch_fixtures)}] {fixture['home_team']} vs {fixture['away_team']}")
             
-            # Generate prediction
-            prediction = prediction_service.generate_prediction(
-                db=db,
-                home_team=fixture['home_team'],
-                away_team=fixture['away_team'],
-                league=fixture['league'],
-                match_date=datetime.fromisoformat(fixture['date'].replace('Z', '+00:00')),
-                fixture_id=fixture['fixture_id']
-            )
+            if isinstance(prediction, Exception):
+                raise prediction
             
             print(f"      Prediction: Over 2.5 ({prediction.over_25_probability:.1%})")
             print(f"      Confidence: {prediction.confidence_level} ({prediction.confidence_score:.1%})")
@@ -100,11 +137,27 @@ def generate_predictions_for_upcoming_fixtures():
             
             # TODO: Save prediction to database
             # For now, just print
-            
+        
         except Exception as e:
             print(f"      ❌ Error: {e}")
             continue
     
+    # Record the features each prediction was made from, for retraining and audits
+    predicted = [
+        (item, features, prediction)
+        for item, features, prediction in zip(batch, features_list, predictions)
+        if not isinstance(prediction, Exception)
+    ]
+    if settings.PREDICTION_FEATURES_DIR and predicted:
+        print("\n3. Saving prediction features...")
+        try:
+            append_prediction_features(
+                add_team_ids(prediction_features_frame(*zip(*predicted))), settings.PREDICTION_FEATURES_DIR
+            )
+            print(f"   Saved {len(predicted)} rows to {settings.PREDICTION_FEATURES_DIR}")
+        except Exception as e:
+            print(f"   ❌ Error: {e}")
+    
     print("\n" + "=" * 60)
     print("SUMMARY")
     print("=" * 60)
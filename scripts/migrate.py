@@ -0,0 +1,55 @@
+"""
+Migration Command
+Applies or rolls back versioned schema migrations
+
+Usage:
+    python scripts/migrate.py status
+    python scripts/migrate.py up [--to VERSION]
+    python scripts/migrate.py down --to VERSION
+"""
+
+import sys
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import engine
+from app.core.migrations import MIGRATIONS, get_applied_versions, migrate_up, migrate_down
+
+
+def show_status():
+    """Print each migration and whether it is applied"""
+    applied = get_applied_versions(engine)
+    
+    print("=" * 60)
+    print("MIGRATION STATUS")
+    print("=" * 60)
+    for migration in MIGRATIONS:
+        applied_at = applied.get(migration.version)
+        state = f"applied {applied_at:%Y-%m-%d %H:%M}" if applied_at else "pending"
+        print(f"  {migration.version:>3}  {migration.name:<45} {state}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stratobet schema migrations")
+    parser.add_argument("command", choices=["status", "up", "down"])
+    parser.add_argument("--to", type=int, default=None, help="Target version")
+    args = parser.parse_args()
+    
+    if args.command == "status":
+        show_status()
+    elif args.command == "up":
+        done = migrate_up(engine, target=args.to)
+        print(f"✅ Applied {len(done)} migration(s)")
+        show_status()
+    else:
+        if args.to is None:
+            parser.error("down requires --to VERSION (use 0 to roll back everything)")
+        done = migrate_down(engine, target=args.to)
+        print(f"✅ Rolled back {len(done)} migration(s)")
+        show_status()
+
+
+if __name__ == '__main__':
+    main()
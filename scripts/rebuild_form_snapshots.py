@@ -0,0 +1,31 @@
+"""
+Rebuild Form Snapshots
+Backfills team_form_snapshots from matches_historical (run after migration 2)
+"""
+
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.form_snapshot_service import form_snapshot_service
+
+
+def rebuild_form_snapshots():
+    """Rebuild every team's rolling form snapshots"""
+    print("=" * 60)
+    print("REBUILDING TEAM FORM SNAPSHOTS")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        written = form_snapshot_service.rebuild_all(db)
+        print(f"✅ Wrote {written} snapshots in {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    rebuild_form_snapshots()
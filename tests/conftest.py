@@ -0,0 +1,129 @@
+"""
+Pytest fixtures: an in-memory SQLite matches_historical with a synthetic schedule
+
+Run with:
+    python -m pytest tests
+"""
+
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.models.match import Base, HistoricalMatch
+from app.services.feature_service import feature_cache
+from app.services.feature_vector import DEFAULT_SCHEMA, set_active_schema
+
+# Manual scripts that call the live APIs and the production database; run them directly
+collect_ignore = [
+    'test_api_football.py',
+    'test_demo_predictions.py',
+    'test_model_with_odds.py',
+    'test_odds_api.py',
+    'test_pipeline.py',
+]
+
+# League -> teams. Every team plays once per matchday, so no team has two
+# matches on one date and every last-N window has a single possible cut
+LEAGUES = {
+    'Premier League': [f'England {i}' for i in range(10)],
+    'La Liga': [f'Spain {i}' for i in range(8)],
+}
+
+MATCHDAYS = 120
+FIRST_MATCHDAY = date(2018, 8, 4)
+
+
+# SQLite stand-ins for migration 2's change log trigger
+_CHANGE_LOG_TRIGGERS = [
+    f"CREATE TRIGGER log_{event_name.lower()} AFTER {event_name} ON matches_historical BEGIN "
+    + "".join(
+        "INSERT INTO matches_historical_changes (operation, match_id, date, home_team, away_team, changed_at) "
+        f"VALUES ('{event_name}', {row}.id, {row}.date, {row}.home_team, {row}.away_team, CURRENT_TIMESTAMP); "
+        for row in rows
+    )
+    + "END"
+    for event_name, rows in (('INSERT', ['NEW']), ('UPDATE', ['OLD', 'NEW']), ('DELETE', ['OLD']))
+]
+
+
+def _make_engine(change_log: bool = False):
+    """In-memory SQLite with the Postgres functions the feature queries use"""
+    engine = create_engine('sqlite://')
+    
+    @event.listens_for(engine, 'connect')
+    def register_functions(connection, record):
+        connection.create_function('least', 2, min)
+        connection.create_function('greatest', 2, max)
+    
+    Base.metadata.create_all(engine)
+    if change_log:
+        with engine.begin() as connection:
+            for trigger in _CHANGE_LOG_TRIGGERS:
+                connection.execute(text(trigger))
+    return engine
+
+
+def _add_matches(db, seed: int = 1) -> None:
+    """A season-like schedule per league: random pairings, every 3, 4 or 7 days"""
+    rng = random.Random(seed)
+    
+    for league, teams in LEAGUES.items():
+        day = FIRST_MATCHDAY
+        for matchday in range(MATCHDAYS):
+            shuffled = teams[:]
+            rng.shuffle(shuffled)
+            for home_team, away_team in zip(shuffled[::2], shuffled[1::2]):
+                home_goals, away_goals = rng.randint(0, 4), rng.randint(0, 3)
+                db.add(HistoricalMatch(
+                    date=day,
+                    league=league,
+                    season=str(2018 + matchday // 38),
+                    home_team=home_team,
+                    away_team=away_team,
+                    home_goals=home_goals,
+                    away_goals=away_goals,
+                    total_goals=home_goals + away_goals,
+                    over_25_odds=round(rng.uniform(1.5, 2.5), 2),
+                    under_25_odds=round(rng.uniform(1.5, 2.5), 2)
+                ))
+            day += timedelta(days=rng.choice([3, 4, 7]))
+    
+    db.commit()
+
+
+@pytest.fixture(scope='session')
+def db():
+    """Session over a populated in-memory matches_historical"""
+    session = sessionmaker(bind=_make_engine())()
+    _add_matches(session)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def changing_db():
+    """Session over its own populated matches_historical whose changes are logged, for tests that modify it"""
+    session = sessionmaker(bind=_make_engine(change_log=True))()
+    _add_matches(session)
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(monkeypatch):
+    """Feature settings and shared caches reset around every test"""
+    monkeypatch.setattr(settings, 'FEATURE_BACKEND', 'orm')
+    monkeypatch.setattr(settings, 'FEATURE_CACHE_ENABLED', False)
+    feature_cache.invalidate()
+    yield
+    feature_cache.invalidate()
+    set_active_schema(DEFAULT_SCHEMA)
@@ -0,0 +1,197 @@
+"""
+TTLCache and SingleFlight behaviour
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import SingleFlight, TTLCache
+
+
+class FakeClock:
+    """Stands in for time.monotonic"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', fake)
+    return fake
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    cache.set('key', 'value')
+    
+    clock.now += 59
+    assert cache.get('key') == 'value'
+    clock.now += 2
+    assert cache.get('key') is None
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_invalidate_with_predicate():
+    cache = TTLCache()
+    for key in [('h2h', 1), ('h2h', 2), ('team_form', 1)]:
+        cache.set(key, key)
+    
+    assert cache.invalidate(lambda key: key[0] == 'h2h') == 2
+    assert cache.get(('team_form', 1)) == ('team_form', 1)
+    assert cache.invalidate() == 1
+
+
+def test_get_or_compute_runs_concurrent_misses_once():
+    cache = TTLCache()
+    calls = []
+    started = threading.Barrier(8)
+    
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'value'
+    
+    def worker(results):
+        started.wait()
+        results.append(cache.get_or_compute('key', compute))
+    
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert cache.get_or_compute('key', compute) == 'value' and len(calls) == 1
+
+
+def test_do_shares_result_and_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        release.wait()
+        raise RuntimeError('upstream failed')
+    
+    errors = []
+    
+    def worker():
+        try:
+            flights.do('key', compute)
+        except RuntimeError as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while flights.get_stats()['shared'] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert len(errors) == 4 and len({id(e) for e in errors}) == 1
+    assert flights.get_stats() == {'in_flight': 0, 'computations': 1, 'shared': 3}
+
+
+def test_do_async_shares_one_computation():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'value'
+        
+        results = await asyncio.gather(*(flights.do_async('key', compute) for _ in range(5)))
+        return results, calls, flights.get_stats()
+    
+    results, calls, stats = asyncio.run(scenario())
+    
+    assert results == ['value'] * 5
+    assert len(calls) == 1
+    assert stats['in_flight'] == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        flights = SingleFlight()
+        
+        async def compute():
+            await asyncio.sleep(0.05)
+            return 'value'
+        
+        leader = asyncio.create_task(flights.do_async('key', compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do_async('key', compute))
+        await asyncio.sleep(0)
+        
+        leader.cancel()
+        return leader, await follower
+    
+    leader, result = asyncio.run(scenario())
+    
+    assert leader.cancelled()
+    assert result == 'value'
+
+
+def test_computation_is_cancelled_when_every_caller_gives_up():
+    async def scenario():
+        flights = SingleFlight()
+        state = {'cancelled': False, 'calls': 0}
+        
+        async def compute():
+            state['calls'] += 1
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                state['cancelled'] = True
+                raise
+            return 'value'
+        
+        callers = [asyncio.create_task(flights.do_async('key', compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        
+        # A later caller starts a fresh computation
+        async def quick():
+            state['calls'] += 1
+            return 'fresh'
+        
+        return state, await flights.do_async('key', quick), flights.get_stats()
+    
+    state, result, stats = asyncio.run(scenario())
+    
+    assert state['cancelled']
+    assert result == 'fresh' and state['calls'] == 2
+    assert stats['in_flight'] == 0
@@ -0,0 +1,65 @@
+"""
+CompiledForest must reproduce scikit-learn's predict_proba
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+
+from app.services.compiled_forest import CompiledForest
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.random((2000, 18)) * 4
+    y = (X[:, 0] + X[:, 5] + rng.normal(0, 1, len(X)) > 4).astype(int)
+    return X[:1500], y[:1500], X[1500:]
+
+
+@pytest.mark.parametrize('model', [
+    RandomForestClassifier(n_estimators=30, random_state=0),
+    RandomForestClassifier(n_estimators=50, max_depth=6, min_samples_leaf=5, random_state=1),
+    ExtraTreesClassifier(n_estimators=30, max_depth=10, random_state=2),
+], ids=['forest', 'shallow-forest', 'extra-trees'])
+def test_predict_proba_matches_sklearn(data, model):
+    X_train, y_train, X_test = data
+    model.fit(X_train, y_train)
+    compiled = CompiledForest(model)
+    
+    np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(X_test), atol=1e-12)
+    # Single rows, as served per request
+    np.testing.assert_allclose(compiled.predict_proba(X_test[0]), model.predict_proba(X_test[:1]), atol=1e-12)
+
+
+def test_values_on_split_thresholds(data):
+    X_train, y_train, _ = data
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X_train, y_train)
+    compiled = CompiledForest(model)
+    
+    # Rows sitting exactly on the split thresholds exercise the <= comparison
+    tree = model.estimators_[0].tree_
+    split_nodes = np.flatnonzero(tree.children_left != -1)[:50]
+    X = np.tile(X_train[:1], (len(split_nodes), 1))
+    X[np.arange(len(split_nodes)), tree.feature[split_nodes]] = tree.threshold[split_nodes]
+    
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+
+def test_save_and_load_round_trip(data, tmp_path):
+    X_train, y_train, X_test = data
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X_train, y_train)
+    CompiledForest(model).save(tmp_path, metadata={'version': 'v-test'})
+    
+    loaded = CompiledForest.load(tmp_path)
+    
+    assert loaded.metadata == {'version': 'v-test'}
+    np.testing.assert_allclose(loaded.predict_proba(X_test), model.predict_proba(X_test), atol=1e-12)
+
+
+def test_rejects_boosted_ensembles(data):
+    X_train, y_train, _ = data
+    model = GradientBoostingClassifier(n_estimators=5).fit(X_train, y_train)
+    
+    with pytest.raises(ValueError):
+        CompiledForest(model)
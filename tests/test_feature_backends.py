@@ -0,0 +1,117 @@
+"""
+Feature backend parity: every backend must produce the ORM backend's 18 features
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.services.feature_export import (
+    FEATURE_COLUMNS, compute_point_in_time_features, export_features_parquet, load_matches_frame
+)
+from app.services.feature_service import feature_service
+from app.services.form_snapshot_service import form_snapshot_service
+from app.services.history_index import history_index
+
+from conftest import FIRST_MATCHDAY, LEAGUES, MATCHDAYS
+
+
+def _fixtures(count: int = 120, seed: int = 7):
+    """Random fixtures between league rivals, from before the first match to past the last"""
+    rng = random.Random(seed)
+    fixtures = []
+    for _ in range(count):
+        league = rng.choice(list(LEAGUES))
+        home_team, away_team = rng.sample(LEAGUES[league], 2)
+        match_date = datetime.combine(FIRST_MATCHDAY, datetime.min.time()) + timedelta(days=rng.randint(-10, 700))
+        fixtures.append({
+            'home_team': home_team,
+            'away_team': away_team,
+            'league': league,
+            'match_date': match_date,
+            'over_25_odds': 1.9,
+            'under_25_odds': 1.95
+        })
+    return fixtures
+
+
+def _orm_features(db, fixture):
+    settings.FEATURE_BACKEND = 'orm'
+    return feature_service.engineer_features_for_match(db, **fixture)
+
+
+def _assert_same(expected, actual, context):
+    for name in FEATURE_COLUMNS:
+        assert actual[name] == pytest.approx(expected[name], abs=1e-9), (name, context)
+
+
+@pytest.fixture(scope='module')
+def prepared(db):
+    """Index and snapshots built from the test database"""
+    history_index.load(db)
+    form_snapshot_service.rebuild_all(db)
+    return db
+
+
+@pytest.mark.parametrize('backend', ['sql', 'index', 'snapshots'])
+def test_backend_matches_orm(prepared, backend):
+    for fixture in _fixtures():
+        expected = _orm_features(prepared, fixture)
+        settings.FEATURE_BACKEND = backend
+        actual = feature_service.engineer_features_for_match(prepared, **fixture)
+        _assert_same(expected, actual, (backend, fixture))
+
+
+def test_batch_matches_orm(prepared):
+    fixtures = _fixtures()
+    batch = feature_service.engineer_features_for_matches(prepared, fixtures)
+    
+    assert len(batch) == len(fixtures)
+    for fixture, actual in zip(fixtures, batch):
+        _assert_same(_orm_features(prepared, fixture), actual, fixture)
+
+
+def test_cached_results_match_uncached(prepared):
+    fixtures = _fixtures(40)
+    expected = [_orm_features(prepared, fixture) for fixture in fixtures]
+    
+    settings.FEATURE_CACHE_ENABLED = True
+    for _ in range(2):  # miss, then hit
+        for fixture, features in zip(fixtures, expected):
+            _assert_same(features, feature_service.engineer_features_for_match(prepared, **fixture), fixture)
+
+
+def test_export_matches_orm(prepared):
+    exported = compute_point_in_time_features(load_matches_frame(prepared))
+    
+    assert len(exported) == sum(len(teams) // 2 for teams in LEAGUES.values()) * MATCHDAYS
+    for _, row in exported.sample(150, random_state=3).iterrows():
+        fixture = {
+            'home_team': row['home_team'],
+            'away_team': row['away_team'],
+            'league': row['league'],
+            'match_date': row['date'].to_pydatetime(),
+            'over_25_odds': row['over_25_odds'],
+            'under_25_odds': row['under_25_odds']
+        }
+        _assert_same(_orm_features(prepared, fixture), row, row['id'])
+
+
+def test_export_replaces_an_earlier_export(prepared, tmp_path):
+    exported = compute_point_in_time_features(load_matches_frame(prepared))
+    
+    for _ in range(2):
+        export_features_parquet(exported, str(tmp_path))
+    
+    assert len(pd.read_parquet(tmp_path)) == len(exported)
+
+
+def test_count_features_are_ints(prepared):
+    features = _orm_features(prepared, _fixtures(1)[0])
+    
+    for name in ('home_games_played', 'away_games_played', 'h2h_games'):
+        assert isinstance(features[name], int)
+        assert isinstance(features.to_dict()[name], int)
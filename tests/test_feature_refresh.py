@@ -0,0 +1,168 @@
+"""
+Feature stores following changes to matches_historical through the change log
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.match import HistoricalMatch, MatchChange, TeamFormSnapshot
+from app.services import match_change_log as change_log_module
+from app.services.form_snapshot_service import FormSnapshotService
+from app.services.history_index import HistoryIndex
+from app.services.match_change_log import MatchChangeLog, match_change_log
+
+from conftest import LEAGUES
+
+
+def _change_matches(db):
+    """A new result, a corrected score, a rescheduled match and a deleted match"""
+    teams = LEAGUES['Premier League']
+    db.add(HistoricalMatch(
+        date=date(2030, 1, 1), league='Premier League', season='2029',
+        home_team=teams[0], away_team=teams[1],
+        home_goals=5, away_goals=0, total_goals=5
+    ))
+    
+    matches = db.query(HistoricalMatch).filter(
+        HistoricalMatch.league == 'Premier League'
+    ).order_by(HistoricalMatch.id).all()
+    
+    corrected, moved, deleted = matches[100], matches[200], matches[300]
+    corrected.home_goals, corrected.total_goals = corrected.home_goals + 3, corrected.total_goals + 3
+    moved.date = moved.date + timedelta(days=30)
+    db.delete(deleted)
+    db.commit()
+
+
+def _snapshot_rows(db):
+    return sorted(
+        tuple(getattr(row, column.name) for column in TeamFormSnapshot.__table__.columns
+              if column.name not in ('id', 'updated_at'))
+        for row in db.query(TeamFormSnapshot).all()
+    )
+
+
+def test_snapshot_sync_follows_the_change_log(changing_db, monkeypatch):
+    db = changing_db
+    service = FormSnapshotService()
+    service.rebuild_all(db)
+    
+    assert service.sync_changes(db) == 0  # full comparison, nothing stale
+    
+    # Later syncs only read the change log
+    monkeypatch.setattr(service, '_stale_teams', lambda db: pytest.fail('full comparison after the first sync'))
+    _change_matches(db)
+    
+    assert service.sync_changes(db) > 0
+    assert service.sync_changes(db) == 0
+    
+    synced = _snapshot_rows(db)
+    service.rebuild_all(db)
+    assert synced == _snapshot_rows(db)
+
+
+def test_first_sync_catches_up_without_the_log(changing_db):
+    db = changing_db
+    service = FormSnapshotService()
+    service.rebuild_all(db)
+    _change_matches(db)
+    db.query(MatchChange).delete()
+    db.commit()
+    
+    assert service.sync_changes(db) > 0
+    
+    synced = _snapshot_rows(db)
+    service.rebuild_all(db)
+    assert synced == _snapshot_rows(db)
+
+
+def test_cursor_reads_entries_that_commit_out_of_order(changing_db, monkeypatch):
+    db = changing_db
+    cursor = match_change_log.cursor(db)
+    start = cursor.position
+    
+    def log(*offsets):
+        for offset in offsets:
+            db.add(MatchChange(id=start + offset, operation='INSERT'))
+        db.commit()
+    
+    log(1, 3)
+    assert [entry.id - start for entry in cursor.read(db)] == [1, 3]
+    assert cursor.position == start + 1  # waits for 2
+    
+    log(2)
+    assert [entry.id - start for entry in cursor.read(db)] == [2]
+    assert cursor.position == start + 3
+    
+    # A gap that never fills (a rolled-back transaction) is skipped after GAP_TIMEOUT_SECONDS
+    log(5)
+    assert [entry.id - start for entry in cursor.read(db)] == [5]
+    monkeypatch.setattr(change_log_module, 'GAP_TIMEOUT_SECONDS', 0)
+    assert cursor.read(db) == []
+    assert cursor.position == start + 5
+
+
+def test_poll_sees_every_change(changing_db):
+    log = MatchChangeLog()
+    
+    assert log.poll(changing_db) == 0
+    _change_matches(changing_db)
+    assert log.poll(changing_db) == 6  # an insert, two updates logged as old and new row, a delete
+    assert log.poll(changing_db) == 0
+
+
+def test_poll_without_the_change_log(changing_db, monkeypatch):
+    log = MatchChangeLog()
+    monkeypatch.setattr(log, 'is_available', lambda db: False)
+    
+    assert log.poll(changing_db) == 0
+    _change_matches(changing_db)  # the added and the deleted match leave the count unchanged
+    assert log.poll(changing_db) == 1
+    assert log.poll(changing_db) == 0
+
+
+def _index_contents(index):
+    """Every array of every history, to compare two indexes"""
+    return {
+        (name, key): [getattr(history, slot).tolist() for slot in history.__slots__]
+        for name, histories in (('teams', index._teams), ('leagues', index._leagues), ('pairs', index._pairs))
+        for key, history in histories.items()
+    }
+
+
+def test_index_refresh_merges_new_rows(changing_db, monkeypatch):
+    db = changing_db
+    index = HistoryIndex()
+    index.load(db)
+    monkeypatch.setattr(index, 'load_rows', lambda rows: pytest.fail('reloaded for an insert'))
+    
+    teams = LEAGUES['La Liga']
+    db.add(HistoricalMatch(
+        date=date(2030, 1, 1), league='La Liga', season='2029',
+        home_team=teams[0], away_team=teams[1],
+        home_goals=2, away_goals=2, total_goals=4
+    ))
+    db.commit()
+    
+    assert index.refresh(db) == 1
+    assert index.refresh(db) == 0
+    monkeypatch.undo()
+    
+    fresh = HistoryIndex()
+    fresh.load(db)
+    assert _index_contents(index) == _index_contents(fresh)
+
+
+def test_index_refresh_sees_corrections_and_deletions(changing_db):
+    db = changing_db
+    index = HistoryIndex()
+    index.load(db)
+    
+    _change_matches(db)
+    
+    assert index.refresh(db) > 0
+    fresh = HistoryIndex()
+    fresh.load(db)
+    assert _index_contents(index) == _index_contents(fresh)
+    assert index.rows_loaded == fresh.rows_loaded
@@ -0,0 +1,25 @@
+"""
+Metrics recorded in executor worker processes reach the parent's registry
+"""
+
+from app.core.metrics import BATCH_SIZE_BUCKETS, MetricsRegistry
+
+
+def test_forwarded_observations_replay_in_the_parent():
+    worker, parent = MetricsRegistry(), MetricsRegistry()
+    latency = worker.histogram('predict_proba_ms', version='v1')  # created before forwarding, as when forked
+    
+    assert worker.drain() == []
+    worker.forward()
+    latency.observe(2.0)
+    worker.observe('predict_proba_ms', 4.0, version='v1')
+    worker.histogram('inference_batch_size', BATCH_SIZE_BUCKETS, source='predict_many').observe(8)
+    worker.inc('predictions_total', 3, version='v1')
+    
+    parent.replay(worker.drain())
+    
+    assert parent.get_histogram_summary('predict_proba_ms', version='v1')['count'] == 2
+    assert parent.get_histogram_summary('predict_proba_ms', version='v1')['mean'] == 3.0
+    assert parent.histogram('inference_batch_size', BATCH_SIZE_BUCKETS, source='predict_many').distribution()['<=8'] == 1
+    assert parent.get_counter('predictions_total', version='v1') == 3
+    assert worker.drain() == []
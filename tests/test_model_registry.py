@@ -0,0 +1,110 @@
+"""
+ModelRegistry register / activate / unload semantics
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.services.feature_vector import FEATURE_NAMES, active_schema
+from app.services.model_registry import ModelRegistry, ModelVersion
+
+
+@pytest.fixture(scope='module')
+def model():
+    rng = np.random.default_rng(0)
+    X = rng.random((300, len(FEATURE_NAMES)))
+    y = (X[:, 0] > 0.5).astype(int)
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+
+
+@pytest.fixture
+def make_version(model):
+    def make(version, feature_names=FEATURE_NAMES):
+        return ModelVersion(version, 'test', model, model, feature_names, load_seconds=0.0)
+    return make
+
+
+def test_first_version_becomes_active(make_version):
+    registry = ModelRegistry()
+    v1 = registry.register(make_version('v1'))
+    registry.register(make_version('v2'))
+    
+    assert registry.active is v1
+    assert [info['version'] for info in registry.get_versions()] == ['v1', 'v2']
+
+
+def test_register_does_not_replace_a_resident_version(make_version):
+    registry = ModelRegistry()
+    original = registry.register(make_version('v1'))
+    
+    with pytest.raises(ValueError):
+        registry.register(make_version('v1'))
+    assert registry.active is original
+    
+    replacement = registry.register(make_version('v1'), activate=True)
+    assert registry.active is replacement
+
+
+def test_activate_swaps_the_active_version_and_schema(make_version):
+    registry = ModelRegistry()
+    registry.register(make_version('v1'))
+    reordered = registry.register(make_version('v2', list(reversed(FEATURE_NAMES))))
+    
+    assert registry.activate('v2') is reordered
+    assert registry.active is reordered
+    assert active_schema() is reordered.schema
+    
+    with pytest.raises(KeyError):
+        registry.activate('missing')
+    assert registry.active is reordered
+
+
+def test_activating_the_shadow_clears_it(make_version):
+    registry = ModelRegistry()
+    registry.register(make_version('v1'))
+    registry.register(make_version('v2'))
+    registry.set_shadow('v2', fraction=0.5)
+    
+    registry.activate('v2')
+    
+    assert registry.shadow is None
+
+
+def test_unload_refuses_the_active_version(make_version):
+    registry = ModelRegistry()
+    registry.register(make_version('v1'))
+    
+    with pytest.raises(ValueError):
+        registry.unload('v1')
+    with pytest.raises(KeyError):
+        registry.unload('missing')
+
+
+def test_unload_drops_routes_and_shadow(make_version):
+    registry = ModelRegistry()
+    v1 = registry.register(make_version('v1'))
+    v2 = registry.register(make_version('v2'))
+    registry.set_route('predict_fast', 'v2')
+    registry.set_shadow('v2', fraction=0.1)
+    
+    assert registry.resolve('predict_fast') is v2
+    registry.unload('v2')
+    
+    assert registry.shadow is None
+    assert registry.get_routes() == {}
+    assert registry.resolve('predict_fast') is v1
+    assert [info['version'] for info in registry.get_versions()] == ['v1']
+
+
+def test_routes_need_a_resident_version(make_version):
+    registry = ModelRegistry()
+    v1 = registry.register(make_version('v1'))
+    
+    with pytest.raises(KeyError):
+        registry.set_route('predict_fast', 'missing')
+    
+    registry.register(make_version('v2'))
+    registry.set_route('predict_fast', 'v2')
+    registry.set_route('predict_fast', None)
+    assert registry.resolve('predict_fast') is v1